@@ -0,0 +1,97 @@
+"""Задержка "лёгких" эндпоинтов во время шторма логинов.
+
+Сравнивает проверку пароля прямо в event loop (как было раньше)
+и через PasswordHasher. Пока --pings запросов к дешёвому эндпоинту /ping
+выполняются один за другим, --storm клиентов непрерывно проверяют пароли.
+
+Запуск из каталога backend:
+    python -m benchmarks.auth_storm --storm 16 --pings 100
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+from passlib.context import CryptContext
+
+from benchmarks.common import asgi_request, summarize
+from src.users.hashing import password_hasher
+
+PASSWORD = "benchmark-password"
+PING_INTERVAL = 0.01
+
+
+def build_app(mode: str, context: CryptContext, hashed: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/auth")
+    async def auth():
+        if mode == "inline":
+            is_valid = context.verify(PASSWORD, hashed)
+        else:
+            is_valid = await password_hasher.verify(PASSWORD, hashed)
+        return {"ok": is_valid}
+
+    return app
+
+
+async def run_mode(mode: str, storm: int, pings: int, hashed: str) -> dict:
+    app = build_app(mode, password_hasher.context, hashed)
+    ping_done = asyncio.Event()
+    ping_latencies = []
+    auth_latencies = []
+
+    async def auth_worker():
+        while not ping_done.is_set():
+            started = time.perf_counter()
+            await asgi_request(app, "POST", "/auth")
+            auth_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0)
+
+    async def ping_worker():
+        # Задержка считается от запланированного момента отправки, чтобы
+        # учитывать время, когда event loop не мог даже начать запрос
+        scheduled_at = time.perf_counter()
+        for _ in range(pings):
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await asgi_request(app, "GET", "/ping")
+            ping_latencies.append(time.perf_counter() - scheduled_at)
+            scheduled_at += PING_INTERVAL
+        ping_done.set()
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        ping_worker(),
+        *(auth_worker() for _ in range(storm)),
+    )
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": mode,
+        "ping": summarize(ping_latencies, elapsed),
+        "auth": summarize(auth_latencies, elapsed),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    hashed = password_hasher.context.hash(PASSWORD)
+    results = []
+    for mode in ("inline", "service"):
+        results.append(
+            await run_mode(mode, args.storm, args.pings, hashed)
+        )
+    results.append({"hasher": password_hasher.stats()})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storm", type=int, default=32)
+    parser.add_argument("--pings", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
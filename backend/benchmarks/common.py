@@ -0,0 +1,110 @@
+"""Общие утилиты бенчмарков: in-process ASGI-клиент и статистика задержек."""
+import asyncio
+import json
+import statistics
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+
+class ASGIResponse:
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.status = status
+        self.headers = {
+            key.decode().lower(): value.decode() for key, value in headers
+        }
+        self.body = body
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+async def asgi_request(
+    app: Any,
+    method: str,
+    path: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    json_body: Any = None,
+    form: Optional[Dict[str, str]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> ASGIResponse:
+    """Выполняет HTTP-запрос к ASGI-приложению без сети и без httpx"""
+    request_headers = dict(headers or {})
+    body = b""
+    if json_body is not None:
+        body = json.dumps(json_body, default=str).encode()
+        request_headers.setdefault("content-type", "application/json")
+    elif form is not None:
+        body = urlencode(form).encode()
+        request_headers.setdefault(
+            "content-type", "application/x-www-form-urlencoded"
+        )
+    request_headers.setdefault("content-length", str(len(body)))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method.upper(),
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params or {}, doseq=True).encode(),
+        "root_path": "",
+        "headers": [
+            (key.lower().encode(), str(value).encode())
+            for key, value in request_headers.items()
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+
+    response_done = asyncio.Event()
+    request_sent = False
+    status = 500
+    response_headers: List[Tuple[bytes, bytes]] = []
+    chunks: List[bytes] = []
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = list(message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    response_done.set()
+    return ASGIResponse(status, response_headers, b"".join(chunks))
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Перцентиль q (0..100) методом ближайшего ранга"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies: Sequence[float], elapsed: float) -> Dict[str, float]:
+    """Сводка по задержкам (в миллисекундах) и пропускной способности"""
+    return {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000 if latencies else 0.0,
+    }
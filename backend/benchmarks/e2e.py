@@ -0,0 +1,293 @@
+"""Сквозной бенчмарк API на заполненной БД (см. benchmarks.seed).
+
+Приложение src.main:app выполняется в том же процессе (без сети),
+--clients конкурентных клиентов в течение --duration секунд выполняют
+запросы к эндпоинтам в пропорциях WEIGHTS. Каждый клиент - один из
+заполненных пользователей: в начале он получает токен через /auth.
+
+Для каждого эндпоинта сохраняются пропускная способность и задержки
+p50/p95/p99; результат пишется в JSON (--output) вместе с коммитом
+и параметрами запуска, --compare печатает разницу с предыдущим
+результатом.
+
+Запуск из каталога backend:
+    python -m benchmarks.seed --users 10000 --reset
+    python -m benchmarks.e2e --clients 32 --duration 30 \\
+        --output benchmarks/results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.e2e --compare old.json new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import asgi_request, summarize
+from benchmarks.seed import SEED_PASSWORD, SEED_PREFIX, seeded_users
+
+# Доля запросов к каждому эндпоинту (auth выполняется при старте клиента
+# и затем с этим весом)
+WEIGHTS = {
+    "register": 1,
+    "auth": 2,
+    "get_profile": 20,
+    "get_many_profiles": 15,
+    "swipes": 30,
+    "create_post": 7,
+    "user_posts": 25,
+}
+
+
+class Client:
+    """Клиент бенчмарка: заполненный пользователь со своим токеном"""
+
+    def __init__(self, app: Any, user: Dict[str, Any], users: List[Dict[str, Any]], rng: random.Random):
+        self.app = app
+        self.user = user
+        self.users = users
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+        self.candidates: List[str] = []
+
+    async def register(self):
+        tg_id = f"{SEED_PREFIX}reg-{uuid.uuid4().hex[:12]}"
+        return await asgi_request(
+            self.app, "POST", "/api/register",
+            json_body={
+                "email": f"{tg_id}@example.com",
+                "password": SEED_PASSWORD,
+                "tg_id": tg_id,
+                "name": "Benchmark",
+                "birth_date": "1995-05-05",
+                "city": "Москва",
+                "about": "benchmark",
+            },
+        )
+
+    async def auth(self):
+        response = await asgi_request(
+            self.app, "POST", "/api/auth",
+            form={"username": self.user["tg_id"], "password": SEED_PASSWORD},
+        )
+        if response.status == 200:
+            token = response.json()["access_token"]
+            self.headers = {"authorization": f"Bearer {token}"}
+        return response
+
+    async def get_profile(self):
+        return await asgi_request(
+            self.app, "GET", "/api/get_profile", headers=self.headers
+        )
+
+    async def get_many_profiles(self):
+        response = await asgi_request(
+            self.app, "GET", "/api/get_many_profiles",
+            params={"limit": 10}, headers=self.headers,
+        )
+        if response.status == 200:
+            self.candidates.extend(
+                str(profile["profile_id"])
+                for profile in response.json()["profiles"]
+            )
+        return response
+
+    async def swipes(self):
+        if self.candidates:
+            target_id = self.candidates.pop()
+        else:
+            target_id = str(self.rng.choice(self.users)["id"])
+        if target_id == str(self.user["id"]):
+            target_id = str(self.users[0]["id"])
+        return await asgi_request(
+            self.app, "POST", "/api/swipes",
+            json_body={
+                "target_user_id": target_id,
+                "action": self.rng.choice(("like", "dislike")),
+            },
+            headers=self.headers,
+        )
+
+    async def create_post(self):
+        return await asgi_request(
+            self.app, "POST", "/api_post/create_post",
+            params={"content": f"benchmark post {uuid.uuid4().hex}"},
+            headers=self.headers,
+        )
+
+    async def user_posts(self):
+        author = self.rng.choice(self.users)
+        return await asgi_request(
+            self.app, "GET", f"/api_post/user/{author['id']}",
+            params={"limit": 20}, headers=self.headers,
+        )
+
+
+async def run(
+    app: Any,
+    clients: int,
+    duration: float,
+    users_limit: int,
+    seed_value: int,
+) -> Dict[str, Any]:
+    users = await seeded_users(limit=users_limit)
+    if len(users) < clients + 1:
+        raise SystemExit(
+            f"Недостаточно заполненных пользователей ({len(users)}): "
+            f"выполните python -m benchmarks.seed"
+        )
+
+    rng = random.Random(seed_value)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    names = list(WEIGHTS)
+    weights = [WEIGHTS[name] for name in names]
+
+    async def call(client: Client, name: str) -> None:
+        started = time.perf_counter()
+        response = await getattr(client, name)()
+        latencies[name].append(time.perf_counter() - started)
+        statuses[name][response.status] += 1
+
+    bench_clients = [
+        Client(app, user, users, random.Random(rng.random()))
+        for user in rng.sample(users, clients)
+    ]
+    # Токены получаются до начала замера
+    await asyncio.gather(*(client.auth() for client in bench_clients))
+
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: Client) -> None:
+        while time.perf_counter() < deadline:
+            name = client.rng.choices(names, weights)[0]
+            await call(client, name)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in bench_clients))
+    elapsed = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "total": summarize(all_latencies, elapsed),
+        "endpoints": {
+            name: {
+                **summarize(latencies[name], elapsed),
+                "statuses": dict(statuses[name]),
+                "errors": sum(
+                    count for status, count in statuses[name].items()
+                    if status >= 400
+                ),
+            }
+            for name in names
+            if latencies[name]
+        },
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> str:
+    """Таблица изменений throughput и p50/p95/p99 между двумя запусками"""
+    lines = [
+        f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}",
+        f"{'endpoint':<20}{'rps':>18}{'p50 ms':>22}{'p95 ms':>22}{'p99 ms':>22}",
+    ]
+
+    def cell(before: float, after: float) -> str:
+        change = (after - before) / before * 100 if before else 0.0
+        return f"{before:.1f}->{after:.1f} ({change:+.0f}%)"
+
+    for name in [*new["endpoints"], "total"]:
+        after = new["total"] if name == "total" else new["endpoints"][name]
+        before = (
+            old["total"] if name == "total"
+            else old["endpoints"].get(name)
+        )
+        if before is None:
+            continue
+        lines.append(
+            f"{name:<20}"
+            f"{cell(before['throughput_rps'], after['throughput_rps']):>18}"
+            f"{cell(before['p50_ms'], after['p50_ms']):>22}"
+            f"{cell(before['p95_ms'], after['p95_ms']):>22}"
+            f"{cell(before['p99_ms'], after['p99_ms']):>22}"
+        )
+    return "\n".join(lines)
+
+
+async def main(args: argparse.Namespace) -> None:
+    from src.dao.database import engine, engine_settings
+    from src.main import app
+
+    result = await run(
+        app, args.clients, args.duration, args.users, args.seed
+    )
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "clients": args.clients,
+            "duration": args.duration,
+            "users": args.users,
+            "seed": args.seed,
+            "weights": WEIGHTS,
+            "engine": engine_settings.model_dump(),
+        },
+        **result,
+    }
+    await engine.dispose()
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument(
+        "--users", type=int, default=None,
+        help="из скольких заполненных пользователей выбирать клиентов "
+             "и авторов (по умолчанию - из всех)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="файл для JSON-результата")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("OLD", "NEW"),
+        help="сравнить два сохранённых результата и выйти",
+    )
+    args = parser.parse_args()
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as old_file:
+            old_result = json.load(old_file)
+        with open(args.compare[1], encoding="utf-8") as new_file:
+            new_result = json.load(new_file)
+        print(compare(old_result, new_result))
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,224 @@
+"""Заполнение локальной БД синтетическими данными для бенчмарков.
+
+Пользователи, посты и свайпы загружаются через COPY (asyncpg
+copy_records_to_table). У всех пользователей один пароль (SEED_PASSWORD),
+tg_id начинается с SEED_PREFIX - по нему бенчмарк находит пользователей,
+а --reset удаляет данные предыдущего заполнения.
+
+Запуск из каталога backend:
+    python -m benchmarks.seed --users 10000 --posts-per-user 5 \\
+        --swipe-density 0.01 --reset
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from src.dao.database import Base, engine
+from src.posts.models import Post  # noqa: F401 (регистрация таблицы)
+from src.users.hashing import password_hasher
+from src.users.models import User  # noqa: F401
+
+SEED_PREFIX = "bench-"
+SEED_PASSWORD = "benchmark-password"
+CITIES = [
+    "Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Екатеринбург",
+    "Нижний Новгород", "Самара", "Омск", "Ростов-на-Дону", "Уфа",
+]
+WORDS = [
+    "лыжи", "походы", "кофе", "кошки", "книги", "музыка", "кино", "спорт",
+    "путешествия", "горы", "море", "велосипед", "фотография", "театр",
+    "python", "программирование", "йога", "танцы", "шахматы", "готовка",
+]
+COPY_BATCH_SIZE = 50_000
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+async def _copy(connection: Any, table: str, columns: List[str], rows) -> int:
+    """Загружает строки пачками через COPY"""
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= COPY_BATCH_SIZE:
+            await connection.copy_records_to_table(
+                table, records=batch, columns=columns
+            )
+            total += len(batch)
+            batch = []
+    if batch:
+        await connection.copy_records_to_table(
+            table, records=batch, columns=columns
+        )
+        total += len(batch)
+    return total
+
+
+async def reset() -> None:
+    """Удаляет данные предыдущего заполнения (по префиксу tg_id)"""
+    async with engine.begin() as connection:
+        seeded = (
+            "SELECT id FROM users WHERE tg_id LIKE :prefix"
+        )
+        params = {"prefix": f"{SEED_PREFIX}%"}
+        await connection.execute(
+            text(f"DELETE FROM posts WHERE user_id IN ({seeded})"), params
+        )
+        await connection.execute(
+            text(
+                f"DELETE FROM swipes WHERE swiper_id IN ({seeded}) "
+                f"OR target_id IN ({seeded})"
+            ),
+            params,
+        )
+        await connection.execute(
+            text("DELETE FROM users WHERE tg_id LIKE :prefix"), params
+        )
+
+
+async def seed(
+    users: int,
+    posts_per_user: int,
+    swipe_density: float,
+    seed_value: int = 42,
+) -> Dict[str, Any]:
+    """Создаёт users пользователей, по posts_per_user постов у каждого
+    и swipe_density * users свайпов от каждого пользователя (половина -
+    лайки, поэтому часть свайпов образует мэтчи)"""
+    rng = random.Random(seed_value)
+    # bcrypt для каждого пользователя занял бы минуты - хэш общий
+    hashed = await password_hasher.hash(SEED_PASSWORD)
+    run_id = uuid.uuid4().hex[:8]
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    now = datetime.utcnow()
+    started = time.perf_counter()
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    async with engine.connect() as connection:
+        raw = await connection.get_raw_connection()
+        driver = raw.driver_connection
+        async with driver.transaction():
+            user_rows = (
+                (
+                    user_id,
+                    f"{SEED_PREFIX}{run_id}-{index}@example.com",
+                    hashed,
+                    f"{SEED_PREFIX}{run_id}-{index}",
+                    f"User {index}",
+                    date(1970, 1, 1) + timedelta(days=rng.randrange(365 * 35)),
+                    rng.choice(CITIES),
+                    _text(rng, rng.randint(3, 12)),
+                )
+                for index, user_id in enumerate(user_ids)
+            )
+            loaded_users = await _copy(
+                driver, "users",
+                ["id", "email", "password", "tg_id", "name",
+                 "birth_date", "city", "about"],
+                user_rows,
+            )
+
+            post_rows = (
+                (
+                    uuid.uuid4(),
+                    user_id,
+                    _text(rng, rng.randint(5, 40)),
+                    now - timedelta(seconds=rng.randrange(90 * 24 * 3600)),
+                )
+                for user_id in user_ids
+                for _ in range(posts_per_user)
+            )
+            loaded_posts = await _copy(
+                driver, "posts",
+                ["id", "user_id", "content", "created_at"],
+                post_rows,
+            )
+
+            swipes_per_user = min(users - 1, int(users * swipe_density))
+
+            def swipe_rows():
+                for swiper_id in user_ids:
+                    targets = [
+                        target_id
+                        for target_id in rng.sample(
+                            user_ids, swipes_per_user + 1
+                        )
+                        if target_id != swiper_id
+                    ][:swipes_per_user]
+                    for target_id in targets:
+                        yield (
+                            swiper_id,
+                            target_id,
+                            "like" if rng.random() < 0.5 else "dislike",
+                            now,
+                        )
+
+            loaded_swipes = await _copy(
+                driver, "swipes",
+                ["swiper_id", "target_id", "action", "created_at"],
+                swipe_rows(),
+            )
+
+    # Статистика планировщика для только что загруженных таблиц
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(
+            isolation_level="AUTOCOMMIT"
+        )
+        await connection.execute(text("ANALYZE users, posts, swipes"))
+
+    return {
+        "run_id": run_id,
+        "users": loaded_users,
+        "posts": loaded_posts,
+        "swipes": loaded_swipes,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+async def seeded_users(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """id и tg_id пользователей, созданных seed()"""
+    query = "SELECT id, tg_id FROM users WHERE tg_id LIKE :prefix ORDER BY tg_id"
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+    async with engine.connect() as connection:
+        result = await connection.execute(
+            text(query), {"prefix": f"{SEED_PREFIX}%"}
+        )
+        return [{"id": row.id, "tg_id": row.tg_id} for row in result]
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.reset:
+        await reset()
+    summary = await seed(
+        args.users, args.posts_per_user, args.swipe_density, args.seed
+    )
+    await engine.dispose()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--posts-per-user", type=int, default=5)
+    parser.add_argument(
+        "--swipe-density", type=float, default=0.01,
+        help="доля пользователей, по которым свайпнул каждый пользователь",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--reset", action="store_true",
+        help="удалить данные предыдущего заполнения",
+    )
+    asyncio.run(main(parser.parse_args()))
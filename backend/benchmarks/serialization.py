@@ -0,0 +1,150 @@
+"""Сериализация списочных ответов: response_model против RowSerializer.
+
+Для каждого размера списка (--sizes) строятся два эндпоинта над одними
+и теми же данными (без БД, чтобы измерялась только сериализация):
+    orm  - ORM-объекты, проверка и JSON по response_model (текущий путь);
+    rows - строки-кортежи и RowSerializer (FAST_SERIALIZATION).
+Оба выполняются --requests раз через in-process ASGI-клиент; перед
+замером проверяется, что ответы совпадают байт в байт.
+
+Запуск из каталога backend:
+    python -m benchmarks.serialization --sizes 20 100 1000 --requests 300
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from fastapi import FastAPI
+
+from benchmarks.common import asgi_request, summarize
+from src.dao.serialization import RowSerializer
+from src.posts.models import Post
+from src.posts.schemas import PostResponse
+from src.users.models import User
+from src.users.schemas import UserProfileResponse
+
+
+def make_posts(size: int, rng: random.Random) -> List[Post]:
+    now = datetime.utcnow()
+    return [
+        Post(
+            id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            content=f"Пост номер {index}: " + "текст " * rng.randint(5, 40),
+            created_at=now - timedelta(seconds=rng.randrange(10 ** 6)),
+        )
+        for index in range(size)
+    ]
+
+
+def make_users(size: int, rng: random.Random) -> List[User]:
+    return [
+        User(
+            id=uuid.uuid4(),
+            email=f"user{index}@example.com",
+            tg_id=f"tg-{index}",
+            name=f"Пользователь {index}",
+            birth_date=date(1970, 1, 1) + timedelta(days=rng.randrange(15000)),
+            city=rng.choice(["Москва", "Казань", "Омск"]),
+            about=None if index % 3 else "о себе " * rng.randint(1, 10),
+        )
+        for index in range(size)
+    ]
+
+
+def build_app(
+    schema: Any, objects: List[Any], serializer: RowSerializer
+) -> FastAPI:
+    app = FastAPI()
+    rows: List[Tuple[Any, ...]] = [
+        tuple(getattr(item, field) for field in serializer.fields)
+        for item in objects
+    ]
+
+    @app.get("/orm", response_model=List[schema])
+    async def orm_path():
+        return objects
+
+    @app.get("/rows", response_model=List[schema])
+    async def rows_path():
+        return serializer.respond(rows)
+
+    return app
+
+
+async def measure(app: FastAPI, path: str, requests: int) -> Dict[str, Any]:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started = time.perf_counter()
+        response = await asgi_request(app, "GET", path)
+        latencies.append(time.perf_counter() - request_started)
+        assert response.status == 200, response.body
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def run(sizes: List[int], requests: int, seed_value: int) -> Dict[str, Any]:
+    rng = random.Random(seed_value)
+    results: Dict[str, Any] = {}
+    cases = (
+        ("posts", PostResponse, make_posts),
+        ("users", UserProfileResponse, make_users),
+    )
+    for name, schema, factory in cases:
+        serializer = RowSerializer(schema, enabled=True)
+        for size in sizes:
+            app = build_app(schema, factory(size, rng), serializer)
+            orm_response = await asgi_request(app, "GET", "/orm")
+            rows_response = await asgi_request(app, "GET", "/rows")
+            if orm_response.body != rows_response.body:
+                raise SystemExit(
+                    f"{name}/{size}: ответы отличаются\n"
+                    f"{orm_response.body[:300]!r}\n{rows_response.body[:300]!r}"
+                )
+            orm = await measure(app, "/orm", requests)
+            rows = await measure(app, "/rows", requests)
+            results[f"{name}/{size}"] = {
+                "bytes": len(orm_response.body),
+                "orm": orm,
+                "rows": rows,
+                "speedup_p50": round(orm["p50_ms"] / rows["p50_ms"], 2)
+                if rows["p50_ms"] else None,
+            }
+    return results
+
+
+def table(results: Dict[str, Any]) -> str:
+    lines = [
+        f"{'case':<14}{'bytes':>10}{'orm p50 ms':>14}"
+        f"{'rows p50 ms':>14}{'speedup':>10}"
+    ]
+    for case, result in results.items():
+        lines.append(
+            f"{case:<14}{result['bytes']:>10}"
+            f"{result['orm']['p50_ms']:>14.3f}"
+            f"{result['rows']['p50_ms']:>14.3f}"
+            f"{result['speedup_p50']:>9.2f}x"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 1000])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="вывести JSON")
+    args = parser.parse_args()
+    benchmark_results = asyncio.run(run(args.sizes, args.requests, args.seed))
+    if args.json:
+        print(json.dumps(benchmark_results, indent=2))
+    else:
+        print(table(benchmark_results))
@@ -36,7 +36,7 @@ def do_run_migrations(connection):
         context.run_migrations()
 
 async def run_migrations_online():
-    async with engine.begin() as connection:
+    async with engine.connect() as connection:
         await connection.run_sync(do_run_migrations)
 
 if context.is_offline_mode():
@@ -0,0 +1,69 @@
+"""initial schema
+
+Revision ID: 0001_initial_schema
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_initial_schema'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Схема раньше создавалась через Base.metadata.create_all при старте
+    # приложения, поэтому на существующих базах таблицы уже есть
+    existing_tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing_tables:
+        op.create_table(
+            'users',
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('email', sa.String(), nullable=False),
+            sa.Column('password', sa.String(), nullable=False),
+            sa.Column('tg_id', sa.String(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('birth_date', sa.Date(), nullable=False),
+            sa.Column('city', sa.String(), nullable=False),
+            sa.Column('about', sa.String(), nullable=True),
+            sa.Column(
+                'liked_users', postgresql.JSONB(), nullable=False,
+                server_default=sa.text("'[]'::jsonb")
+            ),
+            sa.Column(
+                'matched_users', postgresql.JSONB(), nullable=False,
+                server_default=sa.text("'[]'::jsonb")
+            ),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_users_id', 'users', ['id'], unique=True)
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+        op.create_index('ix_users_tg_id', 'users', ['tg_id'], unique=True)
+
+    if 'posts' not in existing_tables:
+        op.create_table(
+            'posts',
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('posts')
+    op.drop_index('ix_users_tg_id', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_table('users')
@@ -0,0 +1,133 @@
+"""swipes table
+
+Revision ID: 0002_swipes_table
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_swipes_table'
+down_revision: Union[str, None] = '0001_initial_schema'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOW_UTC = sa.text("(now() AT TIME ZONE 'utc')")
+UUID_PATTERN = '^[0-9a-fA-F]{8}-?([0-9a-fA-F]{4}-?){3}[0-9a-fA-F]{12}$'
+
+
+def upgrade() -> None:
+    # Приложение раньше вызывало Base.metadata.create_all при старте и
+    # могло создать swipes (с индексом) до этой миграции
+    inspector = sa.inspect(op.get_bind())
+    if 'swipes' not in inspector.get_table_names():
+        _create_swipes()
+    else:
+        # create_all не задаёт server_default (в модели default на стороне
+        # Python), а перенос лайков ниже на него рассчитывает
+        op.alter_column(
+            'swipes',
+            'created_at',
+            existing_type=sa.DateTime(),
+            server_default=NOW_UTC,
+        )
+    user_columns = {column['name'] for column in inspector.get_columns('users')}
+
+    # Переносим лайки из JSONB-колонок. Мэтч означает взаимный лайк,
+    # поэтому matched_users тоже переносятся как лайки.
+    # Некорректные и "висячие" идентификаторы пропускаются.
+    for column in ('liked_users', 'matched_users'):
+        if column not in user_columns:
+            continue
+        op.execute(
+            sa.text(
+                f"""
+                INSERT INTO swipes (swiper_id, target_id, action)
+                SELECT src.swiper_id, target.id, 'like'
+                FROM (
+                    SELECT
+                        u.id AS swiper_id,
+                        CASE WHEN item.value ~ :pattern
+                             THEN item.value::uuid END AS target_id
+                    FROM users u
+                    CROSS JOIN LATERAL
+                        jsonb_array_elements_text(u.{column}) AS item(value)
+                    WHERE jsonb_typeof(u.{column}) = 'array'
+                ) AS src
+                JOIN users target ON target.id = src.target_id
+                WHERE src.target_id <> src.swiper_id
+                ON CONFLICT (swiper_id, target_id) DO NOTHING
+                """
+            ).bindparams(pattern=UUID_PATTERN)
+        )
+        op.drop_column('users', column)
+
+
+def _create_swipes() -> None:
+    op.create_table(
+        'swipes',
+        sa.Column('swiper_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('target_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column(
+            'created_at', sa.DateTime(), nullable=False,
+            server_default=NOW_UTC
+        ),
+        sa.CheckConstraint(
+            "action IN ('like', 'dislike')", name='ck_swipes_action'
+        ),
+        sa.ForeignKeyConstraint(
+            ['swiper_id'], ['users.id'], ondelete='CASCADE'
+        ),
+        sa.ForeignKeyConstraint(
+            ['target_id'], ['users.id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('swiper_id', 'target_id'),
+    )
+    op.create_index(
+        'ix_swipes_target_id_action', 'swipes', ['target_id', 'action']
+    )
+
+
+def downgrade() -> None:
+    op.add_column(
+        'users',
+        sa.Column(
+            'liked_users', postgresql.JSONB(), nullable=False,
+            server_default=sa.text("'[]'::jsonb")
+        ),
+    )
+    op.add_column(
+        'users',
+        sa.Column(
+            'matched_users', postgresql.JSONB(), nullable=False,
+            server_default=sa.text("'[]'::jsonb")
+        ),
+    )
+    op.execute(
+        """
+        UPDATE users u SET
+            liked_users = COALESCE((
+                SELECT jsonb_agg(s.target_id::text ORDER BY s.created_at)
+                FROM swipes s
+                WHERE s.swiper_id = u.id AND s.action = 'like'
+            ), '[]'::jsonb),
+            matched_users = COALESCE((
+                SELECT jsonb_agg(s.target_id::text ORDER BY s.created_at)
+                FROM swipes s
+                JOIN swipes r
+                  ON r.swiper_id = s.target_id
+                 AND r.target_id = s.swiper_id
+                 AND r.action = 'like'
+                WHERE s.swiper_id = u.id AND s.action = 'like'
+            ), '[]'::jsonb)
+        """
+    )
+    op.drop_index('ix_swipes_target_id_action', table_name='swipes')
+    op.drop_table('swipes')
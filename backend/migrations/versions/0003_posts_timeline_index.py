@@ -0,0 +1,55 @@
+"""posts timeline index
+
+Revision ID: 0003_posts_timeline_index
+Revises: 0002_swipes_table
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_posts_timeline_index'
+down_revision: Union[str, None] = '0002_swipes_table'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Сравнение (created_at, id) в курсоре не работает с NULL
+    op.execute(
+        "UPDATE posts SET created_at = now() AT TIME ZONE 'utc' "
+        "WHERE created_at IS NULL"
+    )
+    op.alter_column(
+        'posts',
+        'created_at',
+        existing_type=sa.DateTime(),
+        nullable=False,
+        server_default=sa.text("(now() AT TIME ZONE 'utc')"),
+    )
+
+    # Индекс строится без блокировки записи в posts
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+            "ix_posts_user_id_created_at_id "
+            "ON posts (user_id, created_at DESC, id DESC)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_posts_user_id_created_at_id"
+        )
+    op.alter_column(
+        'posts',
+        'created_at',
+        existing_type=sa.DateTime(),
+        nullable=True,
+        server_default=None,
+    )
@@ -0,0 +1,126 @@
+"""search indexes
+
+Revision ID: 0004_search_indexes
+Revises: 0003_posts_timeline_index
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_search_indexes'
+down_revision: Union[str, None] = '0003_posts_timeline_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Поля users, поиск подстроки по которым обслуживается индексами pg_trgm
+USER_TRGM_FIELDS = ('name', 'city', 'about')
+
+# Поисковый вектор поста
+SEARCH_VECTOR = "to_tsvector('russian'::regconfig, coalesce({}, ''))"
+
+# Число постов, поисковый вектор которых заполняется одной транзакцией
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _trgm_available() -> bool:
+    """Есть ли pg_trgm на сервере (установлен или доступен для установки)"""
+    return op.get_bind().execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_available_extensions "
+            "WHERE name = 'pg_trgm')"
+        )
+    ).scalar()
+
+
+def _backfill_search_vector() -> None:
+    """Заполняет вектор существующих постов пачками по первичному ключу;
+    каждая пачка - отдельная короткая транзакция (autocommit_block), и
+    блокируются только строки пачки"""
+    bind = op.get_bind()
+    last_id = None
+    while True:
+        ids = bind.execute(
+            sa.text(
+                "SELECT id FROM posts "
+                + ("WHERE id > :last_id " if last_id is not None else "")
+                + "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE},
+        ).scalars().all()
+        if not ids:
+            return
+        bind.execute(
+            sa.text(
+                f"UPDATE posts SET search_vector = "
+                f"{SEARCH_VECTOR.format('content')} "
+                f"WHERE id = ANY(:ids) AND search_vector IS NULL"
+            ),
+            {"ids": ids},
+        )
+        last_id = ids[-1]
+
+
+def upgrade() -> None:
+    # Поисковый вектор постов. Колонка без значения по умолчанию
+    # добавляется без перезаписи таблицы (GENERATED ... STORED
+    # переписал бы posts целиком под ACCESS EXCLUSIVE); новые и
+    # изменённые посты получают вектор в триггере, существующие -
+    # пакетным заполнением
+    op.execute(
+        "ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector"
+    )
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION posts_search_vector_update()
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR.format('NEW.content')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS posts_search_vector_update ON posts")
+    op.execute(
+        "CREATE TRIGGER posts_search_vector_update "
+        "BEFORE INSERT OR UPDATE OF content ON posts "
+        "FOR EACH ROW EXECUTE FUNCTION posts_search_vector_update()"
+    )
+
+    trgm = _trgm_available()
+    if trgm:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        _backfill_search_vector()
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_search_vector "
+            "ON posts USING gin (search_vector)"
+        )
+        # Без pg_trgm индексы не создаются: поиск по users остаётся
+        # корректным, но выполняется полным просмотром таблицы
+        if trgm:
+            for field in USER_TRGM_FIELDS:
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+                    f"ix_users_{field}_trgm "
+                    f"ON users USING gin ({field} gin_trgm_ops)"
+                )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for field in USER_TRGM_FIELDS:
+            op.execute(
+                f"DROP INDEX CONCURRENTLY IF EXISTS ix_users_{field}_trgm"
+            )
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_posts_search_vector"
+        )
+    op.execute("DROP TRIGGER IF EXISTS posts_search_vector_update ON posts")
+    op.execute("DROP FUNCTION IF EXISTS posts_search_vector_update()")
+    op.execute("ALTER TABLE posts DROP COLUMN IF EXISTS search_vector")
+    # Расширение pg_trgm не удаляется: его могут использовать другие объекты
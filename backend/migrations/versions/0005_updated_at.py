@@ -0,0 +1,40 @@
+"""updated_at for users and posts
+
+Revision ID: 0005_updated_at
+Revises: 0004_search_indexes
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_updated_at'
+down_revision: Union[str, None] = '0004_search_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOW_UTC = sa.text("(now() AT TIME ZONE 'utc')")
+
+
+def upgrade() -> None:
+    # Существующие строки получают время миграции: у клиентов ещё нет
+    # ETag, сравнивать не с чем. Значение по умолчанию не изменчиво в
+    # пределах транзакции (now()), поэтому колонка NOT NULL добавляется
+    # только в метаданных, без перезаписи таблиц под ACCESS EXCLUSIVE
+    for table in ('users', 'posts'):
+        op.add_column(
+            table,
+            sa.Column(
+                'updated_at', sa.DateTime(), nullable=False,
+                server_default=NOW_UTC,
+            ),
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('posts', 'updated_at')
+    op.drop_column('users', 'updated_at')
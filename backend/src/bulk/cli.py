@@ -0,0 +1,100 @@
+"""Массовый импорт и выгрузка пользователей и постов.
+
+Запуск из каталога backend:
+    python -m src.bulk.cli import users partners.csv --on-conflict update \\
+        --errors errors.ndjson
+    python -m src.bulk.cli import posts posts.ndjson --dry-run
+    python -m src.bulk.cli export users users.csv --with-password-hash
+    python -m src.bulk.cli export posts - --format ndjson > posts.ndjson
+
+Формат по умолчанию определяется по расширению файла. Итоги импорта
+печатаются в JSON; ошибки по строкам - первые --show-errors в итогах
+и все в файле --errors (NDJSON).
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from src.bulk.exporter import export_records
+from src.bulk.importer import IMPORTERS, detect_format, read_records
+from src.bulk.schemas import BulkFormat, BulkKind, ConflictMode
+from src.dao.database import db_router, engine
+
+
+async def import_file(args: argparse.Namespace) -> int:
+    fmt = args.format or detect_format(args.path)
+    with open(args.path, encoding="utf-8-sig", newline="") as source:
+        async with db_router.session() as session:
+            async with session.begin() as transaction:
+                result = await IMPORTERS[args.kind].run(
+                    session, read_records(source, fmt), args.on_conflict
+                )
+                if args.dry_run:
+                    await transaction.rollback()
+
+    if args.errors:
+        with open(args.errors, "w", encoding="utf-8") as errors:
+            for error in result.errors:
+                errors.write(error.model_dump_json() + "\n")
+    summary = result.model_dump(mode="json")
+    summary["errors"] = summary["errors"][:args.show_errors]
+    summary["dry_run"] = args.dry_run
+    print(json.dumps(summary, indent=2, ensure_ascii=False), file=sys.stderr)
+    return 1 if result.failed else 0
+
+
+async def export_file(args: argparse.Namespace) -> int:
+    fmt = args.format or detect_format(args.path)
+    output = (
+        sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+    )
+    try:
+        async for chunk in export_records(
+            args.kind, fmt, args.with_password_hash
+        ):
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    return 0
+
+
+async def main(args: argparse.Namespace) -> int:
+    try:
+        return await args.handler(args)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="загрузить файл")
+    import_parser.add_argument("kind", choices=[kind.value for kind in BulkKind])
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", type=BulkFormat)
+    import_parser.add_argument(
+        "--on-conflict", type=ConflictMode, default=ConflictMode.SKIP,
+        help="skip - конфликтующие записи в ошибки, update - обновить "
+             "существующие (пользователей по tg_id, посты по id)",
+    )
+    import_parser.add_argument(
+        "--dry-run", action="store_true", help="проверить без сохранения"
+    )
+    import_parser.add_argument("--errors", help="файл для всех ошибок (NDJSON)")
+    import_parser.add_argument("--show-errors", type=int, default=20)
+    import_parser.set_defaults(handler=import_file)
+
+    export_parser = commands.add_parser("export", help="выгрузить в файл")
+    export_parser.add_argument("kind", choices=[kind.value for kind in BulkKind])
+    export_parser.add_argument("path", help="файл или - для stdout")
+    export_parser.add_argument("--format", type=BulkFormat)
+    export_parser.add_argument("--with-password-hash", action="store_true")
+    export_parser.set_defaults(handler=export_file)
+
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,115 @@
+"""Потоковая выгрузка пользователей и постов через COPY ... TO STDOUT.
+
+Данные отдаются частями по мере получения от сервера, не накапливаясь
+в памяти: между COPY и потребителем - ограниченная очередь, поэтому
+медленный клиент приостанавливает чтение из соединения.
+
+Форматы совпадают с форматами импорта (src.bulk.importer): CSV с
+заголовком или NDJSON (одна JSON-запись на строку), так что выгрузку
+можно загрузить обратно.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Dict
+
+from src.bulk.schemas import BulkFormat
+from src.dao.database import db_router
+
+# Частей выгрузки в очереди между COPY и потребителем
+EXPORT_QUEUE_SIZE = 16
+
+EXPORT_QUERIES: Dict[str, str] = {
+    "users": (
+        "SELECT id, email, tg_id, name, birth_date, city, about{password} "
+        "FROM users ORDER BY id"
+    ),
+    "posts": (
+        "SELECT p.id, p.user_id, u.tg_id AS author_tg_id, p.content, "
+        "p.created_at "
+        "FROM posts AS p JOIN users AS u ON u.id = p.user_id "
+        "ORDER BY p.id"
+    ),
+}
+
+_DONE = object()
+
+
+def export_query(kind: str, with_password_hash: bool = False) -> str:
+    query = EXPORT_QUERIES[kind]
+    if kind == "users":
+        query = query.format(
+            password=", password AS password_hash" if with_password_hash else ""
+        )
+    return query
+
+
+def copy_options(fmt: BulkFormat) -> Dict[str, Any]:
+    """Параметры COPY для формата выгрузки"""
+    if fmt == BulkFormat.CSV:
+        return {"format": "csv", "header": True}
+    # NDJSON - одна колонка row_to_json в формате csv с разделителем
+    # и кавычкой, которых не бывает в JSON (управляющие символы в нём
+    # экранируются): значения выводятся без кавычек и экранирования
+    return {"format": "csv", "delimiter": "\x02", "quote": "\x01"}
+
+
+async def stream_copy(
+    driver: Any, query: str, **options: Any
+) -> AsyncIterator[bytes]:
+    """Результат COPY (query) TO STDOUT частями по мере получения"""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=EXPORT_QUEUE_SIZE)
+
+    async def output(chunk: bytearray) -> None:
+        # Буфер драйвера переиспользуется - часть копируется
+        await queue.put(bytes(chunk))
+
+    async def produce() -> None:
+        try:
+            await driver.copy_from_query(query, output=output, **options)
+        except Exception as exc:
+            await queue.put(exc)
+            return
+        await queue.put(_DONE)
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is _DONE:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        # Потребитель прекратил чтение (клиент отключился)
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+async def export_records(
+    kind: str,
+    fmt: BulkFormat = BulkFormat.CSV,
+    with_password_hash: bool = False,
+) -> AsyncIterator[bytes]:
+    """Выгрузка таблицы kind ("users" или "posts") в формате fmt.
+
+    Соединение открывается на время выгрузки (с реплики, если они
+    настроены), поэтому генератор можно отдавать в StreamingResponse.
+    with_password_hash добавляет к пользователям колонку password_hash
+    (для переноса пользователей с сохранением паролей).
+    """
+    query = export_query(kind, with_password_hash)
+    if fmt == BulkFormat.NDJSON:
+        query = f"SELECT row_to_json(t) FROM ({query}) AS t"
+
+    session = await db_router.connect(db_router.session(read_only=True))
+    async with session:
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        async for chunk in stream_copy(
+            raw.driver_connection, query, **copy_options(fmt)
+        ):
+            yield chunk
@@ -0,0 +1,614 @@
+"""Массовый импорт пользователей и постов.
+
+Записи читаются из CSV (первая строка - заголовок) или NDJSON и
+проверяются моделью строки (UserImportRow / PostImportRow). Корректные
+записи пачками загружаются через COPY во временную staging-таблицу,
+после чего несколькими запросами сливаются в основную таблицу:
+дубликаты внутри файла и конфликты с существующими записями
+(email/tg_id, id) удаляются из staging и попадают в отчёт по строкам,
+остальные вставляются одним INSERT ... SELECT.
+
+Записи (read_records) читаются из файла синхронно: чтение, разбор и
+проверка каждой пачки выполняются в пуле потоков, а не в цикле событий.
+
+Всё выполняется в транзакции вызывающего: при ошибке (или dry_run у
+вызывающего) ничего не сохраняется.
+"""
+import asyncio
+import csv
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from datetime import timezone
+from itertools import islice
+from typing import (
+    Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Type, Union
+)
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.bulk.schemas import (
+    BulkFormat, ConflictMode, ImportResult, ImportRowError, PostImportRow,
+    UserImportRow
+)
+from src.posts.dao import PostDAO
+from src.users.UserDao import UserDAO
+from src.users.hashing import (
+    BULK_HASH_PROCESSES, ProcessPasswordHasher, password_hasher
+)
+
+# Число записей, которые проверяются и загружаются в staging за раз
+IMPORT_BATCH_SIZE = 10_000
+
+Record = Union[Dict[str, Any], ImportRowError]
+
+
+def read_records(source: TextIO, fmt: BulkFormat) -> Iterator[Tuple[int, Record]]:
+    """Записи файла с номерами, начиная с 1 (строка заголовка CSV и пустые
+    строки NDJSON не считаются). Нераспознанная запись возвращается
+    как ImportRowError.
+
+    Пустые значения CSV считаются отсутствующими.
+    """
+    if fmt == BulkFormat.CSV:
+        reader = csv.DictReader(source)
+        for number, row in enumerate(reader, start=1):
+            if None in row:
+                yield number, ImportRowError(
+                    row=number, error="more values than header columns"
+                )
+                continue
+            yield number, {
+                key: value for key, value in row.items()
+                if value not in ("", None)
+            }
+        return
+
+    number = 0
+    for line in source:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield number, ImportRowError(
+                row=number, error=f"invalid JSON: {exc.msg}"
+            )
+            continue
+        if not isinstance(record, dict):
+            yield number, ImportRowError(
+                row=number, error="record must be a JSON object"
+            )
+            continue
+        yield number, record
+
+
+def _validation_errors(number: int, exc: ValidationError) -> List[ImportRowError]:
+    return [
+        ImportRowError(
+            row=number,
+            field=".".join(str(part) for part in error["loc"]) or None,
+            error=error["msg"],
+        )
+        for error in exc.errors()
+    ]
+
+
+class BulkImporter(ABC):
+    """Базовый импортёр: чтение и проверка записей, COPY в staging
+    и слияние (merge), которое реализуют наследники"""
+    row_model: Type[BaseModel]
+    staging_table: str
+    staging_ddl: str
+    staging_columns: List[str]
+
+    @classmethod
+    async def run(
+        cls,
+        session: AsyncSession,
+        records: Iterable[Tuple[int, Record]],
+        on_conflict: ConflictMode = ConflictMode.SKIP,
+    ) -> ImportResult:
+        """Импортирует записи в транзакции сессии.
+
+        Возвращает:
+            ImportResult: число вставленных/обновлённых записей и ошибки
+            по строкам (ошибки проверки, дубликаты, конфликты)
+        """
+        started = time.perf_counter()
+        result = ImportResult()
+        # Первый запрос начинает транзакцию - COPY через соединение
+        # драйвера выполняется уже внутри неё
+        await session.execute(text(cls.staging_ddl))
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        driver = raw.driver_connection
+
+        staged = 0
+        loop = asyncio.get_running_loop()
+        async with cls.prepare() as context:
+            records = iter(records)
+            # Чтение, разбор и проверка пачки - синхронная работа на CPU:
+            # она выполняется в пуле потоков, и цикл событий между
+            # пачками обслуживает остальные запросы
+            while (valid := await loop.run_in_executor(
+                None, cls.read_batch, records, result
+            )) is not None:
+                valid = await cls.reject_existing(
+                    session, valid, on_conflict, result
+                )
+                if not valid:
+                    continue
+                rows = await cls.to_records(context, valid)
+                await driver.copy_records_to_table(
+                    cls.staging_table, records=rows, columns=cls.staging_columns
+                )
+                staged += len(rows)
+
+        if staged:
+            await cls.merge(session, on_conflict, staged, result)
+            cls.after_commit(session, result)
+
+        result.errors.sort(key=lambda error: error.row)
+        result.failed = len({error.row for error in result.errors})
+        result.seconds = round(time.perf_counter() - started, 3)
+        return result
+
+    @classmethod
+    def read_batch(
+        cls, records: Iterator[Tuple[int, Record]], result: ImportResult
+    ) -> Optional[List[Tuple[int, BaseModel]]]:
+        """Читает и проверяет следующую пачку записей (до IMPORT_BATCH_SIZE).
+
+        Ошибки записей добавляются в result. Возвращает проверенные
+        записи пачки или None, если записей больше нет.
+        """
+        batch = list(islice(records, IMPORT_BATCH_SIZE))
+        if not batch:
+            return None
+        valid: List[Tuple[int, BaseModel]] = []
+        for number, record in batch:
+            result.total += 1
+            if isinstance(record, ImportRowError):
+                result.errors.append(record)
+                continue
+            try:
+                valid.append((number, cls.row_model.model_validate(record)))
+            except ValidationError as exc:
+                result.errors.extend(_validation_errors(number, exc))
+        return valid
+
+    @classmethod
+    def prepare(cls) -> Any:
+        """Асинхронный контекст импорта, передаётся в to_records"""
+        return nullcontext()
+
+    @classmethod
+    async def reject_existing(
+        cls,
+        session: AsyncSession,
+        rows: List[Tuple[int, BaseModel]],
+        on_conflict: ConflictMode,
+        result: ImportResult,
+    ) -> List[Tuple[int, BaseModel]]:
+        """Отсеивает записи пачки, которые заведомо будут отклонены,
+        до дорогой подготовки (to_records)"""
+        return rows
+
+    @classmethod
+    @abstractmethod
+    async def to_records(
+        cls, context: Any, rows: List[Tuple[int, BaseModel]]
+    ) -> List[tuple]:
+        """Кортежи staging-таблицы (в порядке staging_columns)"""
+
+    @classmethod
+    @abstractmethod
+    async def merge(
+        cls,
+        session: AsyncSession,
+        on_conflict: ConflictMode,
+        staged: int,
+        result: ImportResult,
+    ) -> None:
+        """Сливает staging-таблицу (staged записей) с основной таблицей и
+        учитывает вставленные, обновлённые и отклонённые записи в result"""
+
+    @classmethod
+    def after_commit(cls, session: AsyncSession, result: ImportResult) -> None:
+        """Сброс кэшей после коммита импорта"""
+
+    @staticmethod
+    async def _rows(
+        session: AsyncSession, statement: str, **params: Any
+    ) -> List[Any]:
+        """Строки результата запроса (DELETE ... RETURNING по staging-таблице)"""
+        return (await session.execute(text(statement), params)).all()
+
+
+class UserImporter(BulkImporter):
+    row_model = UserImportRow
+    staging_table = "users_import"
+    staging_ddl = """
+        CREATE TEMP TABLE users_import (
+            row_number integer PRIMARY KEY,
+            id uuid NOT NULL,
+            email varchar NOT NULL,
+            password varchar NOT NULL,
+            tg_id varchar NOT NULL,
+            name varchar NOT NULL,
+            birth_date date NOT NULL,
+            city varchar NOT NULL,
+            about varchar
+        ) ON COMMIT DROP
+    """
+    staging_columns = [
+        "row_number", "id", "email", "password", "tg_id", "name",
+        "birth_date", "city", "about",
+    ]
+
+    @classmethod
+    def prepare(cls) -> ProcessPasswordHasher:
+        return ProcessPasswordHasher(
+            password_hasher.context, processes=BULK_HASH_PROCESSES
+        )
+
+    @classmethod
+    async def reject_existing(
+        cls,
+        session: AsyncSession,
+        rows: List[Tuple[int, UserImportRow]],
+        on_conflict: ConflictMode,
+        result: ImportResult,
+    ) -> List[Tuple[int, UserImportRow]]:
+        # При on_conflict=skip существующие пользователи не обновляются -
+        # их пароли не хэшируются (повторная загрузка того же файла не
+        # тратит время на bcrypt)
+        if on_conflict != ConflictMode.SKIP:
+            return rows
+        existing = (await session.execute(
+            text(
+                "SELECT email, tg_id FROM users "
+                "WHERE email = ANY(:emails) OR tg_id = ANY(:tg_ids)"
+            ),
+            {
+                "emails": [row.email for _, row in rows],
+                "tg_ids": [row.tg_id for _, row in rows],
+            },
+        )).all()
+        if not existing:
+            return rows
+        emails = {email for email, _ in existing}
+        tg_ids = {tg_id for _, tg_id in existing}
+        remaining = []
+        for number, row in rows:
+            field = (
+                "email" if row.email in emails
+                else "tg_id" if row.tg_id in tg_ids
+                else None
+            )
+            if field is None:
+                remaining.append((number, row))
+            else:
+                result.errors.append(ImportRowError(
+                    row=number, field=field, error=f"{field} already exists"
+                ))
+        return remaining
+
+    @classmethod
+    async def to_records(
+        cls,
+        context: ProcessPasswordHasher,
+        rows: List[Tuple[int, UserImportRow]],
+    ) -> List[tuple]:
+        # bcrypt - основное время импорта, пароли пачки хэшируются
+        # параллельно в пуле процессов
+        hashed = iter(await context.hash_many(
+            [row.password for _, row in rows if row.password_hash is None]
+        ))
+        return [
+            (
+                number,
+                row.id or uuid.uuid4(),
+                row.email,
+                row.password_hash or next(hashed),
+                row.tg_id,
+                row.name,
+                row.birth_date,
+                row.city,
+                row.about,
+            )
+            for number, row in rows
+        ]
+
+    @classmethod
+    async def merge(
+        cls,
+        session: AsyncSession,
+        on_conflict: ConflictMode,
+        staged: int,
+        result: ImportResult,
+    ) -> None:
+        # 1. Дубликаты внутри файла: остаётся первая запись
+        duplicates = await cls._rows(session, """
+            WITH ranked AS (
+                SELECT row_number,
+                       min(row_number) OVER (PARTITION BY email) AS email_first,
+                       min(row_number) OVER (PARTITION BY tg_id) AS tg_id_first,
+                       min(row_number) OVER (PARTITION BY id) AS id_first
+                FROM users_import
+            )
+            DELETE FROM users_import AS i USING ranked AS r
+            WHERE i.row_number = r.row_number
+              AND r.row_number > LEAST(r.email_first, r.tg_id_first, r.id_first)
+            RETURNING i.row_number, r.email_first, r.tg_id_first, r.id_first
+        """)
+        for number, email_first, tg_id_first, id_first in duplicates:
+            field, first = next(
+                (field, first)
+                for field, first in (
+                    ("email", email_first),
+                    ("tg_id", tg_id_first),
+                    ("id", id_first),
+                )
+                if first < number
+            )
+            result.errors.append(ImportRowError(
+                row=number, field=field,
+                error=f"duplicate {field} in file (row {first})",
+            ))
+        staged -= len(duplicates)
+
+        # 2. on_conflict=update: существующий пользователь с тем же tg_id
+        # обновляется, если новый email не занят другим пользователем
+        if on_conflict == ConflictMode.UPDATE:
+            updated = await cls._rows(session, """
+                WITH updated AS (
+                    UPDATE users AS u
+                    SET email = i.email,
+                        password = i.password,
+                        name = i.name,
+                        birth_date = i.birth_date,
+                        city = i.city,
+                        about = i.about,
+                        updated_at = now() AT TIME ZONE 'utc'
+                    FROM users_import AS i
+                    WHERE u.tg_id = i.tg_id
+                      AND NOT EXISTS (
+                          SELECT 1 FROM users AS o
+                          WHERE o.email = i.email AND o.id <> u.id
+                      )
+                    RETURNING i.row_number
+                )
+                DELETE FROM users_import
+                WHERE row_number IN (SELECT row_number FROM updated)
+                RETURNING row_number
+            """)
+            result.updated += len(updated)
+            staged -= len(updated)
+
+        # 3. Конфликты с существующими пользователями
+        conflicts = await cls._rows(session, """
+            DELETE FROM users_import AS i
+            WHERE EXISTS (SELECT 1 FROM users AS u WHERE u.email = i.email)
+               OR EXISTS (SELECT 1 FROM users AS u WHERE u.tg_id = i.tg_id)
+               OR EXISTS (SELECT 1 FROM users AS u WHERE u.id = i.id)
+            RETURNING i.row_number,
+                CASE
+                    WHEN EXISTS (SELECT 1 FROM users AS u WHERE u.email = i.email)
+                        THEN 'email'
+                    WHEN EXISTS (SELECT 1 FROM users AS u WHERE u.tg_id = i.tg_id)
+                        THEN 'tg_id'
+                    ELSE 'id'
+                END AS field
+        """)
+        for number, field in conflicts:
+            result.errors.append(ImportRowError(
+                row=number, field=field, error=f"{field} already exists"
+            ))
+        staged -= len(conflicts)
+
+        # 4. Вставка оставшихся; конфликт здесь возможен только
+        # с параллельно зарегистрированным пользователем
+        inserted = (await session.execute(text("""
+            INSERT INTO users (
+                id, email, password, tg_id, name, birth_date, city, about
+            )
+            SELECT id, email, password, tg_id, name, birth_date, city, about
+            FROM users_import
+            ORDER BY row_number
+            ON CONFLICT DO NOTHING
+            RETURNING id
+        """))).all()
+        result.inserted += len(inserted)
+        if len(inserted) < staged:
+            skipped = await cls._rows(session, """
+                SELECT i.row_number FROM users_import AS i
+                WHERE NOT EXISTS (SELECT 1 FROM users AS u WHERE u.id = i.id)
+            """)
+            result.errors.extend(
+                ImportRowError(
+                    row=number,
+                    error="conflicts with a concurrently registered user",
+                )
+                for number, in skipped
+            )
+
+    @classmethod
+    def after_commit(cls, session: AsyncSession, result: ImportResult) -> None:
+        if result.updated:
+            event.listen(
+                session.sync_session,
+                "after_commit",
+                lambda _: UserDAO.principal_cache.clear(),
+                once=True,
+            )
+
+
+class PostImporter(BulkImporter):
+    row_model = PostImportRow
+    staging_table = "posts_import"
+    staging_ddl = """
+        CREATE TEMP TABLE posts_import (
+            row_number integer PRIMARY KEY,
+            id uuid NOT NULL,
+            user_id uuid,
+            author_tg_id varchar,
+            content text NOT NULL,
+            created_at timestamp without time zone
+        ) ON COMMIT DROP
+    """
+    staging_columns = [
+        "row_number", "id", "user_id", "author_tg_id", "content", "created_at",
+    ]
+
+    @classmethod
+    async def to_records(
+        cls, context: Any, rows: List[Tuple[int, PostImportRow]]
+    ) -> List[tuple]:
+        records = []
+        for number, row in rows:
+            created_at = row.created_at
+            # created_at хранится в UTC без часового пояса
+            if created_at is not None and created_at.tzinfo is not None:
+                created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+            records.append((
+                number,
+                row.id or uuid.uuid4(),
+                row.user_id,
+                row.author_tg_id,
+                row.content,
+                created_at,
+            ))
+        return records
+
+    @classmethod
+    async def merge(
+        cls,
+        session: AsyncSession,
+        on_conflict: ConflictMode,
+        staged: int,
+        result: ImportResult,
+    ) -> None:
+        # 1. Автор по tg_id, если user_id не указан
+        await session.execute(text("""
+            UPDATE posts_import AS i
+            SET user_id = u.id
+            FROM users AS u
+            WHERE i.user_id IS NULL AND u.tg_id = i.author_tg_id
+        """))
+        unknown = await cls._rows(session, """
+            DELETE FROM posts_import AS i
+            WHERE NOT EXISTS (SELECT 1 FROM users AS u WHERE u.id = i.user_id)
+            RETURNING i.row_number, i.user_id IS NULL AS by_tg_id
+        """)
+        for number, by_tg_id in unknown:
+            field = "author_tg_id" if by_tg_id else "user_id"
+            result.errors.append(ImportRowError(
+                row=number, field=field, error="author not found"
+            ))
+        staged -= len(unknown)
+
+        # 2. Дубликаты id внутри файла
+        duplicates = await cls._rows(session, """
+            WITH ranked AS (
+                SELECT row_number,
+                       min(row_number) OVER (PARTITION BY id) AS id_first
+                FROM posts_import
+            )
+            DELETE FROM posts_import AS i USING ranked AS r
+            WHERE i.row_number = r.row_number AND r.row_number > r.id_first
+            RETURNING i.row_number, r.id_first
+        """)
+        for number, first in duplicates:
+            result.errors.append(ImportRowError(
+                row=number, field="id",
+                error=f"duplicate id in file (row {first})",
+            ))
+        staged -= len(duplicates)
+
+        # 3. on_conflict=update: существующий пост того же автора
+        if on_conflict == ConflictMode.UPDATE:
+            updated = await cls._rows(session, """
+                WITH updated AS (
+                    UPDATE posts AS p
+                    SET content = i.content,
+                        created_at = coalesce(i.created_at, p.created_at),
+                        updated_at = now() AT TIME ZONE 'utc'
+                    FROM posts_import AS i
+                    WHERE p.id = i.id AND p.user_id = i.user_id
+                    RETURNING i.row_number
+                )
+                DELETE FROM posts_import
+                WHERE row_number IN (SELECT row_number FROM updated)
+                RETURNING row_number
+            """)
+            result.updated += len(updated)
+            staged -= len(updated)
+
+        # 4. Конфликты по id с существующими постами
+        conflicts = await cls._rows(session, """
+            DELETE FROM posts_import AS i
+            WHERE EXISTS (SELECT 1 FROM posts AS p WHERE p.id = i.id)
+            RETURNING i.row_number
+        """)
+        error = (
+            "id belongs to another user's post"
+            if on_conflict == ConflictMode.UPDATE
+            else "id already exists"
+        )
+        result.errors.extend(
+            ImportRowError(row=number, field="id", error=error)
+            for number, in conflicts
+        )
+        staged -= len(conflicts)
+
+        inserted = (await session.execute(text("""
+            INSERT INTO posts (id, user_id, content, created_at)
+            SELECT id, user_id, content,
+                   coalesce(created_at, now() AT TIME ZONE 'utc')
+            FROM posts_import
+            ORDER BY row_number
+            ON CONFLICT DO NOTHING
+            RETURNING id
+        """))).all()
+        result.inserted += len(inserted)
+        if len(inserted) < staged:
+            skipped = await cls._rows(session, """
+                SELECT i.row_number FROM posts_import AS i
+                WHERE NOT EXISTS (SELECT 1 FROM posts AS p WHERE p.id = i.id)
+            """)
+            result.errors.extend(
+                ImportRowError(
+                    row=number, field="id",
+                    error="conflicts with a concurrently created post",
+                )
+                for number, in skipped
+            )
+
+    @classmethod
+    def after_commit(cls, session: AsyncSession, result: ImportResult) -> None:
+        event.listen(
+            session.sync_session,
+            "after_commit",
+            lambda _: PostDAO.feed_cache.clear(),
+            once=True,
+        )
+
+
+IMPORTERS: Dict[str, Type[BulkImporter]] = {
+    "users": UserImporter,
+    "posts": PostImporter,
+}
+
+
+def detect_format(filename: Optional[str]) -> BulkFormat:
+    """Формат по расширению файла (.ndjson, .jsonl - NDJSON, иначе CSV)"""
+    if filename and filename.lower().endswith((".ndjson", ".jsonl", ".json")):
+        return BulkFormat.NDJSON
+    return BulkFormat.CSV
@@ -0,0 +1,76 @@
+import io
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, Query, UploadFile
+from fastapi.responses import StreamingResponse
+
+from src.bulk.exporter import export_records
+from src.bulk.importer import IMPORTERS, detect_format, read_records
+from src.bulk.schemas import BulkFormat, BulkKind, ConflictMode, ImportResult
+from src.dao.database import db_router
+from src.internal.router import verify_internal_token
+
+
+MEDIA_TYPES = {
+    BulkFormat.CSV: "text/csv; charset=utf-8",
+    BulkFormat.NDJSON: "application/x-ndjson",
+}
+
+# Подключается с префиксом /internal: доступ - как у остальных
+# внутренних эндпоинтов (X-Internal-Token)
+router_bulk = APIRouter(dependencies=[Depends(verify_internal_token)])
+
+
+@router_bulk.post("/import/{kind}", response_model=ImportResult)
+async def import_records(
+    kind: BulkKind,
+    file: UploadFile = File(...),
+    format: Optional[BulkFormat] = Query(
+        None, description="по умолчанию - по расширению файла"
+    ),
+    on_conflict: ConflictMode = Query(ConflictMode.SKIP),
+    dry_run: bool = Query(False, description="проверить без сохранения"),
+    max_errors: int = Query(1000, ge=0, description="ошибок в ответе"),
+) -> ImportResult:
+    """Массовый импорт пользователей или постов из CSV/NDJSON.
+
+    Файл загружается одной транзакцией: записи с ошибками пропускаются
+    и перечисляются в errors (номер записи, поле, причина), остальные
+    сохраняются. failed - число записей с ошибками, errors обрезается
+    до max_errors.
+    """
+    fmt = format or detect_format(file.filename)
+    # Файл читается и разбирается пачками в пуле потоков (BulkImporter.run)
+    source = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    async with db_router.session() as session:
+        async with session.begin() as transaction:
+            result = await IMPORTERS[kind].run(
+                session, read_records(source, fmt), on_conflict
+            )
+            if dry_run:
+                await transaction.rollback()
+    result.errors = result.errors[:max_errors]
+    return result
+
+
+@router_bulk.get("/export/{kind}")
+async def export(
+    kind: BulkKind,
+    format: BulkFormat = Query(BulkFormat.CSV),
+) -> StreamingResponse:
+    """Потоковая выгрузка пользователей или постов (COPY ... TO STDOUT)
+    в формате, который принимает /import.
+
+    Хэши паролей по HTTP не выгружаются - только через CLI
+    (python -m src.bulk.cli export users ... --with-password-hash),
+    которому нужен прямой доступ к базе.
+    """
+    extension = "csv" if format == BulkFormat.CSV else "ndjson"
+    return StreamingResponse(
+        export_records(kind.value, format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="{kind.value}.{extension}"'
+        },
+    )
@@ -0,0 +1,74 @@
+import uuid
+from datetime import date, datetime
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, EmailStr, Field, model_validator
+
+
+class BulkKind(str, Enum):
+    USERS = "users"
+    POSTS = "posts"
+
+
+class BulkFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class ConflictMode(str, Enum):
+    # Строки, конфликтующие с существующими записями, попадают в ошибки
+    SKIP = "skip"
+    # Существующие записи обновляются (пользователь - по tg_id,
+    # пост - по id того же автора)
+    UPDATE = "update"
+
+
+class UserImportRow(BaseModel):
+    """Строка импорта пользователей: пароль в открытом виде (password)
+    или уже готовый bcrypt-хэш (password_hash)"""
+    id: Optional[uuid.UUID] = None
+    email: EmailStr
+    tg_id: str = Field(min_length=1)
+    password: Optional[str] = Field(None, min_length=1)
+    password_hash: Optional[str] = Field(None, pattern=r"^\$2[abxy]?\$\d{2}\$")
+    name: str = Field(min_length=1)
+    birth_date: date
+    city: str = Field(min_length=1)
+    about: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_password(self) -> "UserImportRow":
+        if (self.password is None) == (self.password_hash is None):
+            raise ValueError("exactly one of password or password_hash is required")
+        return self
+
+
+class PostImportRow(BaseModel):
+    """Строка импорта постов: автор задаётся user_id или author_tg_id"""
+    id: Optional[uuid.UUID] = None
+    user_id: Optional[uuid.UUID] = None
+    author_tg_id: Optional[str] = None
+    content: str = Field(min_length=1)
+    created_at: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_author(self) -> "PostImportRow":
+        if self.user_id is None and not self.author_tg_id:
+            raise ValueError("user_id or author_tg_id is required")
+        return self
+
+
+class ImportRowError(BaseModel):
+    row: int  # номер записи в файле, начиная с 1 (без строки заголовка)
+    field: Optional[str] = None
+    error: str
+
+
+class ImportResult(BaseModel):
+    total: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    errors: List[ImportRowError] = []
@@ -1,56 +1,231 @@
+import json
+
 from sqlalchemy import (
     Select,
     and_,
+    any_,
+    bindparam,
     delete as sqlalchemy_delete,
     func,
     insert,
     or_,
+    text,
+    tuple_,
     update as sqlalchemy_update,
 )
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.exc import CompileError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import (
-    Any, Dict, Generic, List, Optional, Type, TypeVar, Union, Unpack
+    Any, Callable, Dict, Generic, Iterable, List, Optional, Type, TypeVar,
+    Union, Unpack
 )
+from fastapi import HTTPException, status
 from pydantic import BaseModel
+from src.dao.cache import TTLCache
+from src.dao.cursor import CursorCodec
+from src.dao.loader import DataLoader
+from src.dao.search import LikeSearch, SearchBackend
 from src.dao.session_manager import SessionManager
-from src.dao.shemas import PagePaginate
+from src.dao.shemas import CursorPagePaginate, PagePaginate, TotalMode
+from src.dao.unit_of_work import UnitOfWork
 
 ModelType = TypeVar("ModelType")
 SchemaType = TypeVar("SchemaType", bound=BaseModel)
 
+# Операторы фильтров paginate: <поле>__<оператор>=значение
+FILTER_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "ne": lambda field, value: field != value,
+    "in": lambda field, value: field.in_(value),
+    "not_in": lambda field, value: field.not_in(value),
+    "gt": lambda field, value: field > value,
+    "gte": lambda field, value: field >= value,
+    "lt": lambda field, value: field < value,
+    "lte": lambda field, value: field <= value,
+}
+
+# Кэш total для режима пагинации TotalMode.CACHED
+_total_cache = TTLCache(maxsize=1024, ttl=30.0)
+
 class BaseDAO(Generic[ModelType]):
     """Базовый класс для работы с БД"""
 
     model: Type[ModelType]
+    # Опции загрузки по умолчанию (когда профиль не указан)
     options: List[Any] = []
+    # Именованные профили загрузки: load_only для проекции колонок,
+    # selectinload/noload/raiseload для связей
+    load_profiles: Dict[str, List[Any]] = {}
+    # Способ поиска по search_fields (см. src.dao.search)
+    search_backend: SearchBackend = LikeSearch()
+
+    @classmethod
+    def _load_options(cls, load: Optional[str] = None) -> List[Any]:
+        """Опции загрузки для профиля load (или опции по умолчанию)"""
+        if load is None:
+            return cls.options
+        try:
+            return cls.load_profiles[load]
+        except KeyError:
+            raise ValueError(
+                f"Неизвестный профиль загрузки {load!r} "
+                f"для {cls.__name__}"
+            )
+
+    @classmethod
+    def _select(cls, columns: Optional[List[str]] = None) -> Select:
+        """Запрос объектов модели или, если указаны columns, только этих
+        колонок (строки-кортежи без создания ORM-объектов)"""
+        if columns is None:
+            return select(cls.model)
+        return select(*(getattr(cls.model, column) for column in columns))
 
     @classmethod
-    @SessionManager.with_session()
+    @SessionManager.with_session(read_only=True)
     async def get(
         cls,
         session: AsyncSession,
         id: int,  # noqa
+        load: Optional[str] = None,
     ) -> Optional[ModelType]:
         """Получает запись по её первичному ключу.
 
         Параметры:
             session - асинхронная сессия SQLAlchemy.
             id - идентификатор записи.
+            load - имя профиля загрузки (см. load_profiles).
         Возвращает:
             Запись, найденную по id. Если запись не найдена,
             выбрасывается исключение.
+
+        В сессии единицы работы запроса вызовы одного такта объединяются
+        в один запрос get_many, а результаты кэшируются до конца запроса
+        (см. src.dao.loader).
         """
-        query = select(cls.model).filter_by(id=id).options(*cls.options)
+        loader = cls._loader(session, load)
+        if loader is not None:
+            return await loader.load(cls._coerce_id(id))
+        query = select(cls.model).filter_by(id=id).options(*cls._load_options(load))
         result = await session.execute(query)
         return result.scalar_one_or_none()
+
+    @classmethod
+    @SessionManager.with_session(read_only=True)
+    async def get_many(
+        cls,
+        session: AsyncSession,
+        ids: Iterable[Any],
+        load: Optional[str] = None,
+    ) -> Dict[Any, ModelType]:
+        """Получает записи по списку первичных ключей одним запросом
+        WHERE id = ANY(:ids).
+
+        Параметры:
+            session - асинхронная сессия SQLAlchemy.
+            ids - идентификаторы записей (повторы допустимы).
+            load - имя профиля загрузки (см. load_profiles).
+        Возвращает:
+            Словарь {id: запись}; id, для которых записи нет, в нём
+            отсутствуют.
+        """
+        loader = cls._loader(session, load)
+        ids = list(dict.fromkeys(cls._coerce_id(id) for id in ids))  # noqa
+        if loader is not None:
+            values = await loader.load_many(ids)
+            return {
+                id: value  # noqa
+                for id, value in zip(ids, values)  # noqa
+                if value is not None
+            }
+        return await cls._fetch_many(session, ids, load)
+
+    @classmethod
+    async def _fetch_many(
+        cls, session: AsyncSession, ids: List[Any], load: Optional[str]
+    ) -> Dict[Any, ModelType]:
+        if not ids:
+            return {}
+        # Один параметр-массив: вид запроса не зависит от числа id
+        query = select(cls.model).where(
+            cls.model.id == any_(
+                bindparam("ids", ids, type_=ARRAY(cls.model.id.type))
+            )
+        ).options(*cls._load_options(load))
+        result = await session.execute(query)
+        return {obj.id: obj for obj in result.scalars().all()}
+
+    @classmethod
+    def _loader(
+        cls, session: AsyncSession, load: Optional[str]
+    ) -> Optional[DataLoader]:
+        """Загрузчик единицы работы запроса, если session - её сессия
+        (см. src.dao.loader), иначе None.
+
+        Единица работы определяется по сессии, а не по текущей задаче:
+        вызовы из asyncio.gather выполняются в дочерних задачах, но
+        сессией пользуется только тот, кто выполняет пачку.
+        """
+        unit_of_work = UnitOfWork.of_session(session)
+        if unit_of_work is None:
+            return None
+
+        async def fetch(ids: List[Any]) -> Dict[Any, ModelType]:
+            try:
+                return await cls._fetch_many(session, ids, load)
+            except Exception:
+                # Откат до того, как ошибку получат все ожидающие пачку:
+                # их собственные откаты уже ничего не делают и не
+                # пересекаются на одной сессии
+                if not session.in_nested_transaction():
+                    await session.rollback()
+                raise
+
+        return unit_of_work.loader((cls, load), fetch)
+
+    @classmethod
+    def _coerce_id(cls, id: Any) -> Any:  # noqa
+        """id в типе первичного ключа (строка -> UUID), чтобы ключи
+        кэша загрузчика совпадали с id загруженных объектов"""
+        try:
+            python_type = cls.model.id.type.python_type
+        except NotImplementedError:
+            return id
+        if isinstance(id, python_type):
+            return id
+        try:
+            return python_type(id)
+        except (TypeError, ValueError):
+            return id
     
+    @classmethod
+    @SessionManager.with_session(read_only=True)
+    async def get_version(
+        cls,
+        session: AsyncSession,
+        id: Any,  # noqa
+        column: str = "updated_at",
+    ) -> Optional[Any]:
+        """Версия записи (значение column) без загрузки объекта.
+
+        Параметры:
+            session - асинхронная сессия SQLAlchemy.
+            id - идентификатор записи.
+            column - колонка версии (время изменения или счётчик).
+        Возвращает:
+            Значение колонки или None, если записи нет.
+        """
+        return await session.scalar(
+            select(getattr(cls.model, column)).where(cls.model.id == id)
+        )
+
     @classmethod
     @SessionManager.with_session(auto_commit=True)
     async def create(
         cls,
         session: AsyncSession,
         returning: bool = True,
+        load: Optional[str] = None,
         **values: Unpack[Dict[str, Any]],
     ) -> Optional[ModelType]:
         """Создаёт новую запись в базе данных.
@@ -59,6 +234,7 @@ class BaseDAO(Generic[ModelType]):
             session - асинхронная сессия SQLAlchemy.
             returning - если True, метод возвращает созданный объект.
             values - значения для создания записи.
+            load - имя профиля загрузки (см. load_profiles).
         Возвращает:
             Созданный объект или количество затронутых строк.
             Если запись не была создана, выбрасывается исключение.
@@ -66,7 +242,7 @@ class BaseDAO(Generic[ModelType]):
         query = insert(cls.model).values(**values)
 
         if returning:
-            query = query.returning(cls.model).options(*cls.options)
+            query = query.returning(cls.model).options(*cls._load_options(load))
         result = await session.execute(query)
         if returning:
             return result.scalar_one()
@@ -78,6 +254,7 @@ class BaseDAO(Generic[ModelType]):
         session: AsyncSession,
         id: Union[int, str],  # noqa
         returning: bool = True,
+        load: Optional[str] = None,
         **values: Any,
     ) -> Optional[ModelType]:
         """Обновляет запись по её идентификатору.
@@ -87,6 +264,7 @@ class BaseDAO(Generic[ModelType]):
             id - идентификатор записи.
             returning - если True, возвращает обновлённый объект.
             values - поля и их новые значения для обновления.
+            load - имя профиля загрузки (см. load_profiles).
         Возвращает:
             Обновлённый объект или количество затронутых строк.
             Если запись не найдена, выбрасывается исключение.
@@ -98,16 +276,20 @@ class BaseDAO(Generic[ModelType]):
         )
 
         if returning:
-            query = query.returning(cls.model).options(*cls.options)
+            # Объект, уже загруженный в сессию, обновляется значениями
+            # из RETURNING - без повторного SELECT
+            query = (
+                query.returning(cls.model)
+                .options(*cls._load_options(load))
+                .execution_options(populate_existing=True)
+            )
         else:
             query = query.returning(cls.model.id)
 
         result = await session.execute(query)
 
         if returning:
-            updated_obj = result.scalar_one()
-            await session.refresh(updated_obj)
-            return updated_obj
+            return result.scalar_one()
 
         result.scalar_one()
 
@@ -118,6 +300,7 @@ class BaseDAO(Generic[ModelType]):
         session: AsyncSession,
         id: Union[int, str],  # noqa
         returning: bool = True,
+        load: Optional[str] = None,
     ) -> Optional[ModelType]:
         """Удаляет запись по её идентификатору.
 
@@ -125,13 +308,14 @@ class BaseDAO(Generic[ModelType]):
             session - асинхронная сессия SQLAlchemy.
             id - идентификатор записи для удаления.
             returning - если True, возвращает удалённый объект.
+            load - имя профиля загрузки (см. load_profiles).
         Возвращает:
             Удалённый объект или количество затронутых строк.
             Если запись не найдена, выбрасывается исключение.
         """
         query = sqlalchemy_delete(cls.model).where(cls.model.id == id)
         if returning:
-            query = query.returning(cls.model).options(*cls.options)
+            query = query.returning(cls.model).options(*cls._load_options(load))
         else:
             query = query.returning(cls.model.id)
         result = await session.execute(query)
@@ -142,7 +326,289 @@ class BaseDAO(Generic[ModelType]):
         result.scalar_one()
 
     @classmethod
-    @SessionManager.with_session(auto_commit=False)
+    def _write_conditions(cls, filters: Dict[str, Any]) -> List[Any]:
+        """Условия UPDATE/DELETE по фильтрам: неизвестные поля - ошибка,
+        условий должно быть не меньше одного (не изменять всю таблицу)"""
+        conditions = cls._filter_conditions(True, filters, strict=True)
+        if not conditions:
+            raise ValueError(
+                f"{cls.__name__}: изменение записей без условий запрещено"
+            )
+        return conditions
+
+    @classmethod
+    def _returning(
+        cls,
+        query: Any,
+        returning: Union[bool, List[str]],
+        load: Optional[str] = None,
+    ) -> Any:
+        """RETURNING для UPDATE/DELETE: объекты (True), колонки (список
+        имён) или только id (False)"""
+        if returning is True:
+            return (
+                query.returning(cls.model)
+                .options(*cls._load_options(load))
+                .execution_options(populate_existing=True)
+            )
+        if returning:
+            return query.returning(
+                *(getattr(cls.model, column) for column in returning)
+            )
+        return query.returning(cls.model.id)
+
+    @staticmethod
+    def _fetch_returning(
+        result: Any, returning: Union[bool, List[str]]
+    ) -> List[Any]:
+        if returning is True or not returning:
+            return list(result.scalars().all())
+        return list(result.all())
+
+    @classmethod
+    @SessionManager.with_session(auto_commit=True)
+    async def update_where(
+        cls,
+        session: AsyncSession,
+        values: Dict[str, Any],
+        returning: Union[bool, List[str]] = True,
+        load: Optional[str] = None,
+        **filters: Any,
+    ) -> List[Any]:
+        """Обновляет записи, удовлетворяющие условиям, одним запросом
+        UPDATE ... WHERE ... RETURNING.
+
+        Условия проверяются в том же запросе, что и изменение (например,
+        id=post_id, user_id=owner_id - запись принадлежит пользователю),
+        поэтому обычный путь - один запрос к БД без предварительного
+        SELECT.
+
+        Параметры:
+            session - асинхронная сессия SQLAlchemy.
+            values - поля и их новые значения.
+            returning - True: обновлённые объекты; список колонок:
+            строки с этими колонками (без создания объектов);
+            False: идентификаторы обновлённых записей.
+            load - имя профиля загрузки (см. load_profiles).
+            filters - условия в формате фильтров paginate (поле или
+            поле__оператор); нужно хотя бы одно, неизвестные поля -
+            ошибка.
+        Возвращает:
+            Список обновлённых записей; пустой, если ни одна запись
+            не удовлетворяет условиям.
+        """
+        query = (
+            sqlalchemy_update(cls.model)
+            .where(*cls._write_conditions(filters))
+            .values(**values)
+        )
+        result = await session.execute(cls._returning(query, returning, load))
+        return cls._fetch_returning(result, returning)
+
+    @classmethod
+    @SessionManager.with_session(auto_commit=True)
+    async def delete_where(
+        cls,
+        session: AsyncSession,
+        returning: Union[bool, List[str]] = False,
+        load: Optional[str] = None,
+        **filters: Any,
+    ) -> List[Any]:
+        """Удаляет записи, удовлетворяющие условиям, одним запросом
+        DELETE ... WHERE ... RETURNING.
+
+        Параметры:
+            session - асинхронная сессия SQLAlchemy.
+            returning - True: удалённые объекты; список колонок: строки
+            с этими колонками; False: идентификаторы удалённых записей.
+            load - имя профиля загрузки (см. load_profiles).
+            filters - условия, как в update_where.
+        Возвращает:
+            Список удалённых записей; пустой, если ни одна запись
+            не удовлетворяет условиям.
+        """
+        query = sqlalchemy_delete(cls.model).where(
+            *cls._write_conditions(filters)
+        )
+        result = await session.execute(cls._returning(query, returning, load))
+        return cls._fetch_returning(result, returning)
+
+    @classmethod
+    @SessionManager.with_session(auto_commit=True)
+    async def create_many(
+        cls,
+        session: AsyncSession,
+        values: List[Dict[str, Any]],
+        returning: bool = True,
+        load: Optional[str] = None,
+        conflict_fields: Optional[List[str]] = None,
+        update_fields: Optional[List[str]] = None,
+    ) -> Optional[List[ModelType]]:
+        """Создаёт несколько записей одним INSERT ... VALUES (...), (...).
+
+        Параметры:
+            session - асинхронная сессия SQLAlchemy.
+            values - список значений для создания записей.
+            returning - если True, метод возвращает созданные объекты.
+            conflict_fields - поля уникального ограничения для ON CONFLICT.
+            Если указаны без update_fields, конфликтующие строки пропускаются.
+            update_fields - поля, которые перезаписываются при конфликте.
+            Строка обновляется, только если хотя бы одно из них изменилось.
+            load - имя профиля загрузки (см. load_profiles).
+        Возвращает:
+            Список созданных (и обновлённых) объектов. Пропущенные при
+            конфликте и не изменившиеся строки в список не попадают.
+        """
+        if not values:
+            return [] if returning else None
+
+        query = pg_insert(cls.model).values(values)
+        if conflict_fields:
+            if update_fields:
+                query = query.on_conflict_do_update(
+                    index_elements=conflict_fields,
+                    set_={
+                        field: query.excluded[field]
+                        for field in update_fields
+                    },
+                    where=or_(*(
+                        getattr(cls.model, field).is_distinct_from(
+                            query.excluded[field]
+                        )
+                        for field in update_fields
+                    )),
+                )
+            else:
+                query = query.on_conflict_do_nothing(
+                    index_elements=conflict_fields
+                )
+
+        if returning:
+            query = query.returning(cls.model).options(*cls._load_options(load))
+            result = await session.execute(query)
+            return list(result.scalars().all())
+
+        await session.execute(query)
+
+    @classmethod
+    @SessionManager.with_session(auto_commit=True)
+    async def update_many(
+        cls,
+        session: AsyncSession,
+        values: List[Dict[str, Any]],
+    ) -> None:
+        """Обновляет несколько записей по первичному ключу (executemany).
+
+        Параметры:
+            session - асинхронная сессия SQLAlchemy.
+            values - список словарей с полем id и новыми значениями полей.
+            Для одинакового набора полей выполняется один пакетный UPDATE.
+        """
+        if not values:
+            return
+        await session.execute(sqlalchemy_update(cls.model), values)
+
+    @classmethod
+    @SessionManager.with_session(auto_commit=True)
+    async def delete_many(
+        cls,
+        session: AsyncSession,
+        ids: List[Union[int, str]],
+        returning: bool = False,
+        load: Optional[str] = None,
+    ) -> List[Any]:
+        """Удаляет записи по списку идентификаторов одним запросом.
+
+        Параметры:
+            session - асинхронная сессия SQLAlchemy.
+            ids - идентификаторы записей для удаления.
+            returning - если True, возвращает удалённые объекты,
+            иначе - идентификаторы удалённых записей.
+            load - имя профиля загрузки (см. load_profiles).
+        Возвращает:
+            Список удалённых объектов или их идентификаторов.
+        """
+        if not ids:
+            return []
+        query = sqlalchemy_delete(cls.model).where(cls.model.id.in_(ids))
+        if returning:
+            query = query.returning(cls.model).options(*cls._load_options(load))
+        else:
+            query = query.returning(cls.model.id)
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
+    @classmethod
+    def _apply_search(
+        cls,
+        query: Select,
+        search_query: Optional[str],
+        search_fields: Optional[List[str]],
+        rank: bool = False,
+    ) -> Select:
+        """Добавляет к запросу условия поиска по текстовым полям
+        (способ поиска задаётся search_backend модели)"""
+        if not (search_query and search_query.strip() and search_fields):
+            return query
+        return cls.search_backend.apply(
+            cls.model, query, search_query, search_fields, rank=rank
+        )
+
+    @classmethod
+    def _filter_conditions(
+        cls,
+        include_nullable: Optional[bool],
+        filters: Dict[str, Any],
+        strict: bool = False,
+    ) -> List[Any]:
+        """Условия фильтрации (см. _apply_filters); strict - поле,
+        которого нет в модели, считается ошибкой, а не пропускается"""
+        filter_conditions = []
+        for key, value in filters.items():
+            field_name, _, operator = key.partition("__")
+            if not hasattr(cls.model, field_name):
+                if strict:
+                    raise ValueError(
+                        f"Неизвестное поле фильтра {key!r} для {cls.__name__}"
+                    )
+                continue
+            field = getattr(cls.model, field_name)
+            if not operator or operator == "eq":
+                if value is None and include_nullable:
+                    filter_conditions.append(field.is_(None))
+                elif value is not None:
+                    filter_conditions.append(field == value)
+            elif operator == "ne" and value is None:
+                filter_conditions.append(field.is_not(None))
+            elif operator in FILTER_OPERATORS:
+                filter_conditions.append(
+                    FILTER_OPERATORS[operator](field, value)
+                )
+            else:
+                raise ValueError(f"Неизвестный оператор фильтра {key!r}")
+        return filter_conditions
+
+    @classmethod
+    def _apply_filters(
+        cls,
+        query: Select,
+        include_nullable: Optional[bool],
+        filters: Dict[str, Any],
+    ) -> Select:
+        """Добавляет к запросу дополнительные условия фильтрации.
+
+        Ключ фильтра - имя поля модели, к которому через "__" можно
+        добавить оператор: ne, in, not_in, gt, gte, lt, lte
+        (например, id__ne=..., birth_date__gte=...). Без оператора
+        используется равенство.
+        """
+        filter_conditions = cls._filter_conditions(include_nullable, filters)
+        if filter_conditions:
+            query = query.where(and_(*filter_conditions))
+        return query
+
+    @classmethod
+    @SessionManager.with_session(auto_commit=False, read_only=True)
     async def paginate(
         cls,
         session: AsyncSession,
@@ -152,6 +618,11 @@ class BaseDAO(Generic[ModelType]):
         base_query: Optional[Select] = None,
         search_fields: Optional[List[str]] = None,
         include_nullable: Optional[bool] = True,
+        load: Optional[str] = None,
+        total_mode: Union[TotalMode, str] = TotalMode.EXACT,
+        total_ttl: Optional[float] = None,
+        columns: Optional[List[str]] = None,
+        order_by: Optional[List[Any]] = None,
         **filters: Unpack[Dict[str, Any]]
     ) -> PagePaginate:
         """Пагинация (разбиение на страницы) выборки записей.
@@ -166,63 +637,288 @@ class BaseDAO(Generic[ModelType]):
             (если не указан, используется запрос по модели).
             search_fields - список полей модели,
             по которым будет применяться поиск.
-            filters - дополнительные условия фильтрации.
+            total_mode - способ подсчёта общего количества записей
+            (см. TotalMode); при "none" total и pages равны None.
+            total_ttl - время жизни кэша total для режима "cached", сек.
+            load - имя профиля загрузки (см. load_profiles).
+            columns - выбрать только эти колонки: values - строки
+            (кортежи в порядке columns) вместо объектов модели, load
+            не применяется (для быстрой сериализации, см.
+            src.dao.serialization).
+            order_by - порядок записей (после релевантности поиска).
+            При постраничной выборке в конец всегда добавляется первичный
+            ключ: без однозначного порядка страницы OFFSET могут
+            повторять и пропускать записи.
+            filters - дополнительные условия фильтрации
+            (поле=значение или поле__оператор=значение, см. _apply_filters).
         Возвращает:
             Объект PagePaginate, содержащий список записей,
             общее количество записей,
-            номер текущей страницы, общее количество страниц и размер страницы.
+            номер текущей страницы, общее количество страниц, размер страницы
+            и режим, которым был получен total.
         """
-        query = base_query if base_query is not None else select(cls.model)
+        query = base_query if base_query is not None else cls._select(columns)
 
         # Добавляем опции загрузки связанных данных
-        query = query.options(*cls.options)
-
-        # Добавляем условия поиска если есть поисковый запрос
-        if search_query and search_fields:
-            search_conditions = []
-            query_text = f"%{search_query.strip().lower()}%"
-
-            for field_name in search_fields:
-                if hasattr(cls.model, field_name):
-                    field = getattr(cls.model, field_name)
-                    search_conditions.append(
-                        func.lower(field).like(query_text)
-                    )
-            if search_conditions:
-                query = query.where(or_(*search_conditions))
+        if columns is None:
+            query = query.options(*cls._load_options(load))
 
-        # Добавляем дополнительные фильтры
-        filter_conditions = []
-        for field_name, value in filters.items():
-            if hasattr(cls.model, field_name):
-                field = getattr(cls.model, field_name)
-                if value is None and include_nullable:
-                    filter_conditions.append(field.is_(None))
-                elif value is not None:
-                    filter_conditions.append(field == value)
-        if filter_conditions:
-            query = query.where(and_(*filter_conditions))
+        query = cls._apply_search(
+            query, search_query, search_fields, rank=True
+        )
+        query = cls._apply_filters(query, include_nullable, filters)
+        if order_by:
+            query = query.order_by(*order_by)
+        if page_size != -1:
+            query = query.order_by(*cls.model.__table__.primary_key.columns)
 
-        # Получаем общее количество записей для пагинации
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await session.scalar(count_query)
+        total_mode = TotalMode(total_mode)
 
         if page_size == -1:
-            total_pages = 1
-            page = 1
-        else:
+            # Выбираются все записи - total известен без отдельного count(*)
+            result = await session.execute(query)
+            items = cls._fetch(result, columns)
+            return PagePaginate(
+                values=items,
+                total=len(items),
+                page=1,
+                pages=1,
+                page_size=page_size,
+                total_mode=TotalMode.EXACT,
+            )
+
+        total = None
+        if total_mode == TotalMode.EXACT:
+            total = await cls._count_exact(session, query)
+        elif total_mode == TotalMode.ESTIMATE:
+            total = await cls._count_estimate(
+                session,
+                query,
+                whole_table=(
+                    base_query is None
+                    and not filters
+                    and not (search_query and search_fields)
+                ),
+            )
+        elif total_mode == TotalMode.CACHED:
+            total = await cls._count_cached(session, query, total_ttl)
+
+        page = max(1, page)
+        if total_mode == TotalMode.EXACT:
+            # Номер страницы ограничивается только по точному total
             total_pages = (total + page_size - 1) // page_size
-            page = min(max(1, page), total_pages) if total_pages > 0 else 1
-            query = query.offset((page - 1) * page_size).limit(page_size)
+            page = min(page, total_pages) if total_pages > 0 else 1
+        query = query.offset((page - 1) * page_size).limit(page_size)
 
-        result = await session.execute(query)
-        items = result.scalars().all()
+        if total_mode == TotalMode.WINDOW:
+            result = await session.execute(
+                query.add_columns(func.count().over().label("total_count"))
+            )
+            rows = result.all()
+            items = [
+                row[0] if columns is None else row[:-1] for row in rows
+            ]
+            if rows:
+                total = rows[0][-1]
+            elif page == 1:
+                total = 0
+            else:
+                # Страница за пределами выборки: окно пустое,
+                # total считается отдельным запросом
+                total = await cls._count_exact(
+                    session, query.limit(None).offset(None)
+                )
+        else:
+            result = await session.execute(query)
+            items = cls._fetch(result, columns)
+
+        total_pages = (
+            (total + page_size - 1) // page_size if total is not None else None
+        )
 
         return PagePaginate(
             values=items,
             total=total,
             page=page,
             pages=total_pages,
-            page_size=page_size
+            page_size=page_size,
+            total_mode=total_mode,
+        )
+
+    @staticmethod
+    def _fetch(result: Any, columns: Optional[List[str]]) -> List[Any]:
+        """Объекты модели или строки выбранных колонок"""
+        if columns is None:
+            return list(result.scalars().all())
+        return list(result.all())
+
+    @staticmethod
+    async def _count_exact(session: AsyncSession, query: Select) -> int:
+        """Точное количество записей выборки"""
+        count_query = select(func.count()).select_from(
+            query.order_by(None).subquery()
+        )
+        return await session.scalar(count_query)
+
+    @classmethod
+    async def _count_estimate(
+        cls,
+        session: AsyncSession,
+        query: Select,
+        whole_table: bool,
+    ) -> int:
+        """Приблизительное количество записей выборки.
+
+        Для выборки без условий используется pg_class.reltuples,
+        иначе - оценка числа строк из плана запроса (EXPLAIN).
+        Если оценку получить не удалось, выполняется точный count(*).
+        """
+        if whole_table:
+            reltuples = await session.scalar(
+                text(
+                    "SELECT reltuples::bigint FROM pg_class "
+                    "WHERE oid = to_regclass(:table_name)"
+                ),
+                {"table_name": cls.model.__tablename__},
+            )
+            # reltuples = -1 для таблиц, по которым ещё не было ANALYZE
+            if reltuples is not None and reltuples >= 0:
+                return reltuples
+
+        try:
+            compiled = query.compile(
+                dialect=session.bind.dialect,
+                compile_kwargs={"literal_binds": True},
+            )
+        except (CompileError, NotImplementedError):
+            return await cls._count_exact(session, query)
+
+        connection = await session.connection()
+        result = await connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}"
+        )
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @classmethod
+    async def _count_cached(
+        cls,
+        session: AsyncSession,
+        query: Select,
+        ttl: Optional[float],
+    ) -> int:
+        """Точное количество записей, кэшируемое по сигнатуре фильтров"""
+        compiled = query.compile(dialect=session.bind.dialect)
+        key = (
+            cls.model.__tablename__,
+            str(compiled),
+            repr(sorted(compiled.params.items())),
+        )
+        total = _total_cache.get(key)
+        if total is None:
+            total = await cls._count_exact(session, query)
+            _total_cache.set(key, total, ttl=ttl)
+        return total
+
+    @classmethod
+    @SessionManager.with_session(auto_commit=False, read_only=True)
+    async def cursor_paginate(
+        cls,
+        session: AsyncSession,
+        page_size: int = 20,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        search_query: Optional[str] = None,
+        base_query: Optional[Select] = None,
+        search_fields: Optional[List[str]] = None,
+        include_nullable: Optional[bool] = True,
+        load: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        **filters: Unpack[Dict[str, Any]]
+    ) -> CursorPagePaginate:
+        """Keyset-пагинация (по курсору) выборки записей.
+
+        В отличие от paginate не использует OFFSET и count(*):
+        следующая страница выбирается условием
+        (ключ сортировки, id) > (значения из курсора), поэтому стоимость
+        любой страницы не зависит от её "глубины".
+
+        Параметры:
+            session - асинхронная сессия SQLAlchemy.
+            page_size - количество записей на страницу.
+            after - курсор, после которого нужно вернуть записи
+            (next_cursor предыдущей страницы).
+            before - курсор, до которого нужно вернуть записи
+            (prev_cursor предыдущей страницы).
+            order_by - поле модели для сортировки
+            (если не указано, сортировка только по первичному ключу).
+            descending - если True, сортировка по убыванию.
+            search_query, base_query, search_fields, include_nullable,
+            load, columns, filters - аналогично paginate (columns должны
+            включать id и order_by - из них строятся курсоры).
+        Возвращает:
+            Объект CursorPagePaginate со списком записей и курсорами
+            соседних страниц (None, если соседней страницы нет).
+        """
+        if after is not None and before is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Нельзя одновременно указывать after и before",
+            )
+        page_size = max(1, page_size)
+
+        key_columns = [cls.model.id]
+        if order_by is not None and order_by != "id":
+            key_columns.insert(0, getattr(cls.model, order_by))
+
+        query = base_query if base_query is not None else cls._select(columns)
+        if columns is None:
+            query = query.options(*cls._load_options(load))
+        query = cls._apply_search(query, search_query, search_fields)
+        query = cls._apply_filters(query, include_nullable, filters)
+
+        # При движении назад выбираем в обратном порядке
+        # и разворачиваем результат
+        backward = before is not None
+        reverse = descending != backward
+        token = before if backward else after
+        if token is not None:
+            key = tuple_(*key_columns)
+            cursor_key = tuple_(*CursorCodec.decode(token, key_columns))
+            query = query.where(
+                key < cursor_key if reverse else key > cursor_key
+            )
+        query = query.order_by(
+            *(column.desc() if reverse else column.asc()
+              for column in key_columns)
+        ).limit(page_size + 1)
+
+        result = await session.execute(query)
+        items = cls._fetch(result, columns)
+        has_more = len(items) > page_size
+        items = items[:page_size]
+        if backward:
+            items.reverse()
+
+        def make_cursor(item: Any) -> str:
+            return CursorCodec.encode(
+                [getattr(item, column.key) for column in key_columns]
+            )
+
+        next_cursor = prev_cursor = None
+        if items:
+            if has_more or backward:
+                next_cursor = make_cursor(items[-1])
+            if (has_more and backward) or after is not None:
+                prev_cursor = make_cursor(items[0])
+
+        return CursorPagePaginate(
+            values=items,
+            page_size=page_size,
+            next_cursor=next_cursor,
+            prev_cursor=prev_cursor,
         )
-    
\ No newline at end of file
@@ -0,0 +1,76 @@
+import base64
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Sequence
+
+from fastapi import HTTPException, status
+
+
+class CursorCodec:
+    """Кодирование и декодирование курсоров keyset-пагинации.
+
+    Курсор - непрозрачная для клиента строка (urlsafe base64 от JSON),
+    содержащая значения ключа сортировки и первичного ключа записи,
+    после (или до) которой нужно продолжить выборку.
+    """
+
+    @staticmethod
+    def _dump_value(value: Any) -> Any:
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, (uuid.UUID, Decimal)):
+            return str(value)
+        return value
+
+    @staticmethod
+    def _load_value(value: Any, column: Any) -> Any:
+        if value is None:
+            return None
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return value
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        return python_type(value)
+
+    @classmethod
+    def encode(cls, values: Sequence[Any]) -> str:
+        """Собирает курсор из значений колонок ключа сортировки"""
+        payload = json.dumps(
+            [cls._dump_value(value) for value in values],
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str, columns: Sequence[Any]) -> List[Any]:
+        """Разбирает курсор и приводит значения к типам колонок.
+
+        Параметры:
+            token - курсор, полученный клиентом из предыдущей страницы.
+            columns - колонки ключа сортировки (в том же порядке,
+            в котором они кодировались).
+        Возвращает:
+            Список значений колонок. При некорректном курсоре
+            выбрасывается HTTPException 400.
+        """
+        try:
+            padding = "=" * (-len(token) % 4)
+            raw = base64.urlsafe_b64decode(token + padding)
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(columns):
+                raise ValueError("cursor shape mismatch")
+            return [
+                cls._load_value(value, column)
+                for value, column in zip(values, columns)
+            ]
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Некорректный курсор пагинации",
+            )
@@ -1,9 +1,18 @@
 from sqlalchemy.orm import declarative_base
 import os
+import inspect
+from contextlib import asynccontextmanager
+from functools import wraps
+from typing import Any, AsyncIterator, Callable
 from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import (
-    async_sessionmaker, create_async_engine
-)
+from fastapi import Request
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.dao.engine import EngineSettings, build_engine
+from src.dao.metrics import db_metrics
+from src.dao.replicas import ReplicaRouter, ReplicaSelection
+from src.dao.unit_of_work import UnitOfWork
 
 # Загружаем переменные окружения
 load_dotenv()
@@ -13,21 +22,150 @@ POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
 POSTGRES_DB = os.getenv("POSTGRES_DB", "postgres")
 POSTGRES_HOST = os.getenv("POSTGRES_HOST", "db")
+POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
 
 # Формируем строку подключения
-DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:5432/{POSTGRES_DB}"
+DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
-# Создаем асинхронный движок
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Создаем асинхронный движок; пул и логирование настраиваются
+# переменными окружения DB_* (см. EngineSettings), метрики - db_metrics
+engine_settings = EngineSettings.from_env()
+engine = build_engine(DATABASE_URL, engine_settings, metrics=db_metrics)
 
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+# Реплики для чтения: POSTGRES_REPLICA_HOSTS="host1[:port],host2[:port]"
+# (пользователь, пароль и база - как у primary)
+POSTGRES_REPLICA_HOSTS = [
+    host.strip()
+    for host in os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")
+    if host.strip()
+]
+
+
+def replica_url(host: str) -> str:
+    if ":" not in host:
+        host = f"{host}:{POSTGRES_PORT}"
+    return f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{host}/{POSTGRES_DB}"
+
+
+replica_engines = [
+    build_engine(replica_url(host), engine_settings)
+    for host in POSTGRES_REPLICA_HOSTS
+]
+
+# Транзакции сессий чтения: DB_READ_TRANSACTIONS - read_only
+# (BEGIN READ ONLY, без дополнительного запроса), autocommit (без
+# BEGIN/COMMIT, каждый запрос видит свой снимок данных) или read_write
+READ_TRANSACTION_OPTIONS = {
+    "read_only": {"postgresql_readonly": True},
+    "autocommit": {"isolation_level": "AUTOCOMMIT"},
+    "read_write": {},
+}
+DB_READ_TRANSACTIONS = os.getenv("DB_READ_TRANSACTIONS", "read_only")
+if DB_READ_TRANSACTIONS not in READ_TRANSACTION_OPTIONS:
+    raise ValueError(
+        f"Неизвестный режим DB_READ_TRANSACTIONS {DB_READ_TRANSACTIONS!r}"
+    )
+
+# Маршрутизация чтений: DB_REPLICA_SELECTION - round_robin или
+# least_connections, DB_REPLICA_STICKINESS - сколько секунд после записи
+# клиент читает с primary
+db_router = ReplicaRouter(
+    engine,
+    async_session_maker,
+    replicas=replica_engines,
+    selection=os.getenv("DB_REPLICA_SELECTION", ReplicaSelection.ROUND_ROBIN),
+    stickiness=float(os.getenv("DB_REPLICA_STICKINESS", "5")),
+    read_options=READ_TRANSACTION_OPTIONS[DB_READ_TRANSACTIONS],
+)
+
 
 # Базовый класс для моделей
 Base = declarative_base()
 
-# Функция для получения сессии
-async def get_db():
-    async with async_session_maker() as session:
-        async with session.begin():
-            yield session
+@asynccontextmanager
+async def unit_of_work(
+    read_only: bool = False, allow_replica: bool = True
+) -> AsyncIterator[UnitOfWork]:
+    """Единица работы: сессия, которую DAO-методы получают автоматически
+    (SessionManager.with_session без session=...). Изменения фиксируются
+    при выходе из блока, при исключении - откатываются.
+
+    Если в текущей задаче уже открыта единица работы, используется она
+    (для записи - переведённая в режим записи): вложенные блоки и
+    зависимости не берут из пула второе соединение, а транзакцию
+    завершает внешний блок.
+    """
+    current = UnitOfWork.current()
+    if current is not None:
+        if not read_only:
+            await current.for_write()
+        yield current
+        return
+
+    session = db_router.session(read_only=read_only, allow_replica=allow_replica)
+    if read_only:
+        session = await db_router.connect(session)
+    uow = UnitOfWork(session, db_router, read_only=read_only)
+    async with session:
+        with uow.activate():
+            try:
+                yield uow
+            except Exception as error:
+                # Реплика, к которой не удалось подключиться, исключается
+                # из выбора и для следующих запросов
+                if not await db_router.fail_over(session, error):
+                    await session.rollback()
+                raise
+            await session.commit()
+
+
+def release_after(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Обработчик, после которого единица работы чтения завершает
+    транзакцию и возвращает соединение в пул (см. UnitOfWork.release)"""
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        result = await endpoint(*args, **kwargs)
+        unit_of_work = UnitOfWork.current()
+        if unit_of_work is not None:
+            await unit_of_work.release()
+        return result
+
+    return wrapper
+
+
+class UnitOfWorkRoute(APIRoute):
+    """Маршрут, отдающий соединение единицы работы чтения в пул сразу
+    после обработчика: проверка ответа по response_model и его
+    сериализация выполняются уже без соединения. Изменения единицы
+    работы записи фиксируются только после проверки ответа.
+
+    Подключение: APIRouter(route_class=UnitOfWorkRoute)
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, release_after(endpoint), **kwargs)
+
+
+# Функции для получения сессии: одна на запрос (см. unit_of_work).
+# В обработчиках объявляются со scope="function" - транзакция
+# завершается и соединение возвращается в пул до отправки ответа
+
+# Сессия для обработчиков, изменяющих данные
+async def get_db(request: Request):
+    db_router.begin_request(request)
+    async with unit_of_work() as uow:
+        yield uow.session
+
+
+# Сессия для обработчиков, которые только читают: открывается на реплике
+# (если они настроены), кроме запросов клиента, только что изменявшего
+# данные; если запрос уже открыл сессию, используется она
+async def get_read_db(request: Request):
+    db_router.begin_request(request)
+    async with unit_of_work(read_only=True) as uow:
+        yield uow.session
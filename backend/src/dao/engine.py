@@ -0,0 +1,114 @@
+import os
+from typing import Any, Dict, Optional, Union
+
+from pydantic import BaseModel
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from src.dao.metrics import DatabaseMetrics, InstrumentedQueuePool
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_echo(name: str) -> Union[bool, str]:
+    """Уровень логирования SQL: false, true (INFO) или debug
+    (INFO и строки результатов)"""
+    value = os.getenv(name, "").strip().lower()
+    if value == "debug":
+        return "debug"
+    return value in ("1", "true", "yes", "on", "info")
+
+
+class EngineSettings(BaseModel):
+    """Параметры движка и пула соединений"""
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_pre_ping: bool = True
+    pool_recycle: int = 1800
+    statement_cache_size: int = 100
+    echo: Union[bool, str] = False
+    echo_pool: Union[bool, str] = False
+
+    @classmethod
+    def from_env(cls) -> "EngineSettings":
+        """Настройки из переменных окружения:
+            DB_POOL_SIZE - постоянное число соединений в пуле;
+            DB_MAX_OVERFLOW - сколько соединений можно открыть сверх пула;
+            DB_POOL_TIMEOUT - сколько секунд ждать свободного соединения;
+            DB_POOL_PRE_PING - проверять соединение перед выдачей из пула;
+            DB_POOL_RECYCLE - пересоздавать соединения старше N секунд
+            (-1 - не пересоздавать);
+            DB_STATEMENT_CACHE_SIZE - размер кэша подготовленных запросов
+            asyncpg на соединение (0 - для pgbouncer в режиме transaction);
+            DB_ECHO / DB_ECHO_POOL - логирование SQL и событий пула:
+            false, true или debug.
+        """
+        defaults = cls()
+        return cls(
+            pool_size=int(os.getenv("DB_POOL_SIZE", defaults.pool_size)),
+            max_overflow=int(
+                os.getenv("DB_MAX_OVERFLOW", defaults.max_overflow)
+            ),
+            pool_timeout=float(
+                os.getenv("DB_POOL_TIMEOUT", defaults.pool_timeout)
+            ),
+            pool_pre_ping=_env_bool(
+                "DB_POOL_PRE_PING", defaults.pool_pre_ping
+            ),
+            pool_recycle=int(
+                os.getenv("DB_POOL_RECYCLE", defaults.pool_recycle)
+            ),
+            statement_cache_size=int(
+                os.getenv(
+                    "DB_STATEMENT_CACHE_SIZE", defaults.statement_cache_size
+                )
+            ),
+            echo=_env_echo("DB_ECHO"),
+            echo_pool=_env_echo("DB_ECHO_POOL"),
+        )
+
+    def engine_kwargs(self) -> Dict[str, Any]:
+        """Аргументы create_async_engine"""
+        return {
+            "echo": self.echo,
+            "echo_pool": self.echo_pool,
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_pre_ping": self.pool_pre_ping,
+            "pool_recycle": self.pool_recycle,
+            # Собственный кэш asyncpg; кэш prepared statements на стороне
+            # SQLAlchemy задаётся параметром URL (см. engine_url)
+            "connect_args": {
+                "statement_cache_size": self.statement_cache_size,
+            },
+        }
+
+    def engine_url(self, url: Union[str, URL]) -> URL:
+        """URL подключения с размером кэша prepared statements диалекта"""
+        return make_url(url).update_query_dict({
+            "prepared_statement_cache_size": str(self.statement_cache_size),
+        })
+
+
+def build_engine(
+    url: Union[str, URL],
+    settings: Optional[EngineSettings] = None,
+    metrics: Optional[DatabaseMetrics] = None,
+) -> AsyncEngine:
+    """Создаёт асинхронный движок по настройкам и подключает к нему метрики"""
+    settings = settings or EngineSettings.from_env()
+    engine = create_async_engine(
+        settings.engine_url(url), **settings.engine_kwargs()
+    )
+    if metrics is not None:
+        metrics.instrument(engine.sync_engine)
+    return engine
@@ -2,9 +2,18 @@ from typing import Any, Optional
 
 from fastapi import HTTPException, status
 
+from sqlalchemy import PrimaryKeyConstraint, UniqueConstraint
 from sqlalchemy.exc import IntegrityError, NoResultFound
 
 
+class UniqueConflict(HTTPException):
+    """Значение уникального поля field уже занято"""
+
+    def __init__(self, field: str, detail: str):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+        self.field = field
+
+
 class DatabaseErrorHandler:
     """Обработчик ошибок базы данных"""
 
@@ -23,11 +32,61 @@ class DatabaseErrorHandler:
         except Exception:
             return None
 
+    @staticmethod
+    def parse_constraint_name(error: IntegrityError) -> Optional[str]:
+        """Имя нарушенного ограничения: из ошибки драйвера (asyncpg) или,
+        если его там нет, из текста сообщения"""
+        cause = getattr(error.orig, "__cause__", None)
+        name = getattr(cause, "constraint_name", None)
+        if name:
+            return name
+        error_detail = str(error.orig)
+        start = error_detail.find('unique constraint "')
+        if start == -1:
+            return None
+        start += 19
+        end = error_detail.find('"', start)
+        return error_detail[start:end] if end != -1 else None
+
+    @staticmethod
+    def unique_field(model: Any, constraint_name: str) -> Optional[str]:
+        """Поле модели, которое защищает уникальный индекс или ограничение
+        с данным именем (для составных - первое поле)"""
+        table = model.__table__
+        for index in table.indexes:
+            if index.unique and index.name == constraint_name:
+                return next(iter(index.columns)).name
+        for constraint in table.constraints:
+            if (
+                isinstance(constraint, (UniqueConstraint, PrimaryKeyConstraint))
+                and constraint.name == constraint_name
+            ):
+                return next(iter(constraint.columns)).name
+        return None
+
+    @staticmethod
+    def conflict(cls: Any, field: str) -> UniqueConflict:
+        """Ошибка о занятом значении поля (текст - из conflict_messages DAO)"""
+        messages = getattr(cls, "conflict_messages", {})
+        return UniqueConflict(
+            field,
+            messages.get(
+                field,
+                f"{cls.model.__tablename__} с таким {field} уже существует",
+            ),
+        )
+
     @staticmethod
     def handle_integrity_error(error: IntegrityError, cls: Any) -> None:
         """Обработка ошибок целостности базы данных"""
         error_detail = str(error.orig)
 
+        # Нарушение уникальности: поле определяется по имени индекса
+        constraint_name = DatabaseErrorHandler.parse_constraint_name(error)
+        if constraint_name:
+            field = DatabaseErrorHandler.unique_field(cls.model, constraint_name)
+            if field is not None:
+                raise DatabaseErrorHandler.conflict(cls, field)
 
         # Проверяем ошибки внешнего ключа
         error_detail_lower = error_detail.lower()
@@ -39,7 +98,7 @@ class DatabaseErrorHandler:
                             table.__tablename__ == table_name):
                         raise HTTPException(
                             status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"{table._tablename} не существует",
+                            detail=f"{table.__tablename__} не существует",
                         )
 
     @staticmethod
@@ -50,7 +109,7 @@ class DatabaseErrorHandler:
         elif isinstance(error, NoResultFound):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"{cls.model._tablename} не существует",
+                detail=f"{cls.model.__tablename__} не существует",
             )
         elif isinstance(error, IntegrityError):
             DatabaseErrorHandler.handle_integrity_error(error, cls)
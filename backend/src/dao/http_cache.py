@@ -0,0 +1,131 @@
+"""Условные HTTP-запросы: ETag, Last-Modified и Cache-Control.
+
+Версия ресурса - колонка updated_at (и id) строки или набор (id,
+updated_at) строк страницы. Если клиент прислал If-None-Match или
+If-Modified-Since, обработчик сначала выбирает только версию (без
+загрузки объектов) и при совпадении отвечает 304 Not Modified.
+
+Cache-Control:
+    PUBLIC_CACHE_CONTROL - ответы без авторизации (пост, посты
+    пользователя): общий кэш (nginx proxy_cache) может хранить их
+    HTTP_CACHE_S_MAXAGE секунд и затем перепроверять по ETag
+    (proxy_cache_revalidate on), браузер перепроверяет каждый раз.
+    PRIVATE_CACHE_CONTROL - ответы текущему пользователю: только кэш
+    браузера, с перепроверкой при каждом запросе.
+"""
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Request, Response, status
+
+HTTP_CACHE_S_MAXAGE = int(os.getenv("HTTP_CACHE_S_MAXAGE", "5"))
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(
+    os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", "30")
+)
+
+PUBLIC_CACHE_CONTROL = (
+    f"public, max-age=0, s-maxage={HTTP_CACHE_S_MAXAGE}, "
+    f"stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+)
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Слабый ETag из частей версии ресурса (ответ совпадает по смыслу,
+    а не побайтно: nginx может сжать его)"""
+    digest = hashlib.sha1(
+        "\x1f".join(map(str, parts)).encode()
+    ).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+class Validators:
+    """Валидаторы ресурса: ETag и, если известно, время изменения"""
+
+    def __init__(self, etag: str, last_modified: Optional[datetime] = None):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @classmethod
+    def of_row(cls, id: Any, updated_at: datetime) -> "Validators":  # noqa
+        """Одна строка: версия - (id, updated_at)"""
+        return cls(make_etag(id, updated_at.isoformat()), updated_at)
+
+    @classmethod
+    def of_rows(cls, rows: Iterable[Any], *extra: Any) -> "Validators":
+        """Список строк (с атрибутами id и updated_at) и дополнительные
+        части (например, курсоры соседних страниц).
+
+        Last-Modified для списка не указывается: удаление строки не
+        увеличивает максимальный updated_at.
+        """
+        return cls(make_etag(
+            *(f"{row.id}@{row.updated_at.isoformat()}" for row in rows),
+            *extra,
+        ))
+
+    def headers(self, cache_control: str) -> Dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": cache_control}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = http_date(self.last_modified)
+        return headers
+
+
+def http_date(value: datetime) -> str:
+    """Дата в формате HTTP; наивные datetime считаются UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _weak(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_conditional(request: Request) -> bool:
+    """Прислал ли клиент валидаторы (есть смысл проверять версию)"""
+    return (
+        "if-none-match" in request.headers
+        or "if-modified-since" in request.headers
+    )
+
+
+def not_modified(request: Request, validators: Validators) -> bool:
+    """Не изменился ли ресурс с версии клиента.
+
+    If-None-Match сравнивается слабым сравнением и, если указан,
+    имеет приоритет над If-Modified-Since (RFC 9110, 13.2.2).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or _weak(validators.etag) in map(_weak, tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or validators.last_modified is None:
+        return False
+    since = _parse_http_date(if_modified_since)
+    if since is None:
+        return False
+    last_modified = validators.last_modified
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # Точность HTTP-даты - секунда
+    return last_modified.replace(microsecond=0) <= since
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,121 @@
+"""Пакетная загрузка записей по первичному ключу (в духе DataLoader).
+
+BaseDAO.get в единице работы запроса не выполняет запрос сразу, а ставит
+id в очередь загрузчика своего DAO и профиля загрузки. Все вызовы get,
+сделанные в одном такте цикла событий (например, через asyncio.gather),
+выполняются одним запросом BaseDAO.get_many (WHERE id = ANY(:ids)), а
+результаты - в том числе отсутствие записи - кэшируются до конца
+запроса: повторный get того же id не обращается к базе.
+
+Кэш сбрасывается, когда сессия выполняет изменяющий запрос или
+откатывает транзакцию (см. UnitOfWork.loader): после этого закэшированные
+объекты могли устареть.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List
+
+
+class DataLoader:
+    """Очередь и кэш загрузки по ключам.
+
+    fetch - корутина, загружающая пачку ключей одним запросом и
+    возвращающая словарь {ключ: значение}; отсутствующие ключи
+    считаются равными None.
+
+    Пакет выполняет первый вызов такта (в своей задаче), остальные ждут
+    его результата. Пакеты выполняются строго по одному: ключи,
+    запрошенные, пока пакет ещё загружается, ставятся в очередь и
+    загружаются следующим пакетом в той же задаче, поэтому сессией
+    запроса одновременно пользуется не больше одного fetch.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+    ):
+        self.fetch = fetch
+        self.cache: Dict[Hashable, Any] = {}
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        # Выполняется ли сейчас пакет (новые ключи ждут его окончания)
+        self._dispatching = False
+        # Число выполненных пакетов (запросов к базе)
+        self.batches = 0
+
+    async def load(self, key: Hashable) -> Any:
+        """Значение по ключу (None, если записи нет)"""
+        return (await self.load_many([key]))[0]
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        """Значения по ключам в порядке ключей"""
+        keys = list(keys)
+        cached = {key: self.cache[key] for key in keys if key in self.cache}
+        futures = {
+            key: self._pending[key]
+            for key in keys
+            if key not in cached and key in self._pending
+        }
+        missing = [
+            key for key in dict.fromkeys(keys)
+            if key not in cached and key not in futures
+        ]
+        if missing:
+            leader = not self._pending and not self._dispatching
+            loop = asyncio.get_running_loop()
+            for key in missing:
+                futures[key] = self._pending[key] = loop.create_future()
+            if leader:
+                try:
+                    # Остальные вызовы этого такта успевают встать в очередь
+                    await asyncio.sleep(0)
+                except asyncio.CancelledError:
+                    self._cancel(self._pending)
+                    self._pending = {}
+                    raise
+                await self._dispatch()
+
+        values = []
+        for key in keys:
+            if key in futures:
+                values.append(await futures[key])
+            else:
+                values.append(cached[key])
+        return values
+
+    async def _dispatch(self) -> None:
+        self._dispatching = True
+        try:
+            while self._pending:
+                batch, self._pending = self._pending, {}
+                await self._run(batch)
+        except asyncio.CancelledError:
+            self._cancel(self._pending)
+            self._pending = {}
+            raise
+        finally:
+            self._dispatching = False
+
+    async def _run(self, batch: Dict[Hashable, asyncio.Future]) -> None:
+        self.batches += 1
+        try:
+            found = await self.fetch(list(batch))
+        except asyncio.CancelledError:
+            self._cancel(batch)
+            raise
+        except Exception as error:
+            # Ошибку получит каждый ожидающий, включая первый вызов
+            for future in batch.values():
+                future.set_exception(error)
+            return
+        for key, future in batch.items():
+            value = found.get(key)
+            self.cache[key] = value
+            future.set_result(value)
+
+    @staticmethod
+    def _cancel(batch: Dict[Hashable, asyncio.Future]) -> None:
+        for future in batch.values():
+            future.cancel()
+
+    def clear(self) -> None:
+        """Сбрасывает кэш (ожидающие загрузки завершатся как обычно)"""
+        self.cache.clear()
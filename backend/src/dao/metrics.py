@@ -0,0 +1,364 @@
+import re
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Границы корзин гистограмм латентности, в секундах
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (как в Prometheus).
+
+    Хранит число наблюдений в каждой корзине, их количество и сумму;
+    квантили оцениваются линейной интерполяцией внутри корзины.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Оценка квантиля q (0..1) по корзинам"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    # Значение выше последней границы
+                    return lower
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def cumulative(self) -> List[int]:
+        """Накопленные счётчики по корзинам (le=bucket), последняя - +Inf"""
+        result, total = [], 0
+        for bucket_count in self.counts:
+            total += bucket_count
+            result.append(total)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip(
+                [*map(str, self.buckets), "+Inf"], self.cumulative()
+            )),
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, замеряющий время ожидания соединения (checkout)
+    и число отказов по pool_timeout"""
+
+    checkout_wait: Optional[Histogram] = None
+    checkout_timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            if self.checkout_wait is not None:
+                self.checkout_wait.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        # engine.dispose() заменяет пул новым - гистограмма и счётчик
+        # отказов переносятся (иначе Prometheus увидит сброс счётчика)
+        pool = super().recreate()
+        pool.checkout_wait = self.checkout_wait
+        pool.checkout_timeouts = self.checkout_timeouts
+        return pool
+
+
+_PARAM = (
+    r"\$\d+(?:\s*::\s*\w+(?:\(\d+\))?"
+    r"(?:\s+WITH(?:OUT)?\s+TIME\s+ZONE)?(?:\[\])*)?"
+)
+_PLACEHOLDERS = re.compile(rf"{_PARAM}(?:\s*,\s*{_PARAM})*")
+_ROWS = re.compile(r"\(\$n\)(?:\s*,\s*\(\$n\))+")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement: str, max_length: int = 300) -> str:
+    """Нормализованный вид SQL для группировки метрик: пробелы схлопнуты,
+    списки параметров ($1, $2, ...) и строк VALUES сведены к одному $n"""
+    shape = _SPACES.sub(" ", statement).strip()
+    shape = _PLACEHOLDERS.sub("$n", shape)
+    shape = _ROWS.sub("($n), ...", shape)
+    return shape[:max_length]
+
+
+class QueryStats:
+    """Счётчики SQL-запросов, выполненных в рамках блока кода
+    (например, одного HTTP-запроса), см. track_queries.
+
+    Кроме запросов учитываются соединения, полученные блоком из пулов
+    движков: сколько раз (checkouts), сколько удерживается сейчас
+    (connections), наибольшее число одновременно удерживаемых
+    (max_connections) - у запроса с единицей работы оно не больше 1 -
+    и суммарное время удержания (connection_time).
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.duration = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.checkouts = 0
+        self.connections = 0
+        self.max_connections = 0
+        self.connection_time = 0.0
+
+    def record(
+        self,
+        statement: str,
+        parameters: Any,
+        elapsed: float,
+        rows: int,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        self.statements += 1
+        self.duration += elapsed
+        self.rows += rows
+        if error is not None:
+            self.errors += 1
+
+    def checked_out(self) -> None:
+        self.checkouts += 1
+        self.connections += 1
+        self.max_connections = max(self.max_connections, self.connections)
+
+    def checked_in(self, held: float) -> None:
+        self.connections -= 1
+        self.connection_time += held
+
+
+_active_query_stats: ContextVar[Tuple[QueryStats, ...]] = ContextVar(
+    "active_query_stats", default=()
+)
+# Счётчики, получающие все запросы процесса независимо от контекста
+_global_query_stats: List[QueryStats] = []
+
+
+@contextmanager
+def track_queries(
+    stats: Optional[QueryStats] = None,
+    global_scope: bool = False,
+) -> Iterator[QueryStats]:
+    """Учитывает в stats все запросы, выполненные внутри блока
+    (в том числе во вложенных задачах, созданных внутри блока).
+
+    global_scope=True - учитываются все запросы процесса на время блока;
+    нужно, когда код выполняется в другом потоке без копирования
+    контекста (например, приложение под тестовым клиентом).
+    """
+    stats = stats if stats is not None else QueryStats()
+    if global_scope:
+        _global_query_stats.append(stats)
+        try:
+            yield stats
+        finally:
+            _global_query_stats.remove(stats)
+        return
+
+    token = _active_query_stats.set(_active_query_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_query_stats.reset(token)
+
+
+def _query_stats() -> Tuple[QueryStats, ...]:
+    active = _active_query_stats.get()
+    if _global_query_stats:
+        active = (
+            *active,
+            *(stats for stats in _global_query_stats if stats not in active),
+        )
+    return active
+
+
+class DatabaseMetrics:
+    """Метрики пула соединений и SQL-запросов движка.
+
+    Собираются через события SQLAlchemy: время выполнения запросов
+    (before/after_cursor_execute) в общей гистограмме и отдельно
+    по каждому виду запроса, ошибки, время ожидания соединения из пула.
+    Текущее число выданных и простаивающих соединений читается из пула
+    в момент снятия метрик.
+    """
+
+    def __init__(self, max_statements: int = 500):
+        self.max_statements = max_statements
+        self.statement_latency = Histogram()
+        self.statements: Dict[str, Histogram] = {}
+        self.checkout_wait = Histogram()
+        self.errors = 0
+        self.connects = 0
+        self.invalidations = 0
+        self._engine: Optional[Engine] = None
+
+    def instrument(self, engine: Engine) -> None:
+        """Подключает сбор метрик к синхронному движку (engine.sync_engine)"""
+        self._engine = engine
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.checkout_wait = self.checkout_wait
+
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._on_error)
+        event.listen(engine.pool, "connect", self._on_connect)
+        event.listen(engine.pool, "invalidate", self._on_invalidate)
+        event.listen(engine.pool, "checkout", self._on_checkout)
+        event.listen(engine.pool, "checkin", self._on_checkin)
+
+    def _before_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        context._metrics_started = time.perf_counter()
+
+    def _after_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed = time.perf_counter() - context._metrics_started
+        self.statement_latency.observe(elapsed)
+        self._statement_histogram(statement).observe(elapsed)
+
+        active = _query_stats()
+        if active:
+            # rowcount у SELECT/RETURNING - число полученных строк
+            rows = max(cursor.rowcount, 0) if cursor.description else 0
+            for stats in active:
+                stats.record(statement, parameters, elapsed, rows)
+
+    def _on_error(self, exception_context):
+        self.errors += 1
+        context = exception_context.execution_context
+        started = getattr(context, "_metrics_started", None)
+        active = _query_stats()
+        if started is not None and active:
+            elapsed = time.perf_counter() - started
+            for stats in active:
+                stats.record(
+                    exception_context.statement,
+                    exception_context.parameters,
+                    elapsed,
+                    0,
+                    error=exception_context.original_exception,
+                )
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, proxy):
+        active = _query_stats()
+        # Соединение может вернуться в пул из другого контекста -
+        # счётчики, получившие его, запоминаются в самом соединении
+        connection_record.info["query_stats"] = active
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        for stats in active:
+            stats.checked_out()
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        active = connection_record.info.pop("query_stats", ())
+        started = connection_record.info.pop("checked_out_at", None)
+        if not active or started is None:
+            return
+        held = time.perf_counter() - started
+        for stats in active:
+            stats.checked_in(held)
+
+    def _statement_histogram(self, statement: str) -> Histogram:
+        shape = statement_shape(statement)
+        histogram = self.statements.get(shape)
+        if histogram is None:
+            # Число отслеживаемых видов запросов ограничено
+            if len(self.statements) >= self.max_statements:
+                shape = "<other>"
+                histogram = self.statements.get(shape)
+            if histogram is None:
+                histogram = self.statements[shape] = Histogram()
+        return histogram
+
+    def pool_status(self) -> Dict[str, Any]:
+        """Текущее состояние пула соединений"""
+        pool = self._engine.pool if self._engine is not None else None
+        if pool is None or not hasattr(pool, "checkedout"):
+            return {}
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "checkout_timeouts": getattr(pool, "checkout_timeouts", 0),
+        }
+
+    def snapshot(self, top: int = 20) -> Dict[str, Any]:
+        """Метрики для внутреннего эндпоинта; top - число самых
+        затратных по суммарному времени видов запросов"""
+        statements = sorted(
+            self.statements.items(),
+            key=lambda item: item[1].sum,
+            reverse=True,
+        )[:top]
+        return {
+            "pool": self.pool_status(),
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "checkout_wait": self.checkout_wait.snapshot(),
+            "statements": {
+                "errors": self.errors,
+                "latency": self.statement_latency.snapshot(),
+                "top": [
+                    {"statement": shape, **histogram.snapshot()}
+                    for shape, histogram in statements
+                ],
+            },
+        }
+
+    def reset(self) -> None:
+        """Сбрасывает накопленные гистограммы и счётчики"""
+        self.statement_latency = Histogram()
+        self.statements = {}
+        self.checkout_wait = Histogram()
+        self.errors = self.connects = self.invalidations = 0
+        if self._engine is not None and isinstance(
+            self._engine.pool, InstrumentedQueuePool
+        ):
+            self._engine.pool.checkout_wait = self.checkout_wait
+            self._engine.pool.checkout_timeouts = 0
+
+
+db_metrics = DatabaseMetrics()
@@ -0,0 +1,176 @@
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.dao.metrics import QueryStats, statement_shape, track_queries
+
+
+class CapturedStatement:
+    """SQL-запрос, выполненный внутри capture_queries"""
+
+    def __init__(
+        self,
+        statement: str,
+        parameters: Any,
+        duration: float,
+        rows: int,
+        error: Optional[BaseException] = None,
+    ):
+        self.statement = statement
+        self.parameters = parameters
+        self.duration = duration
+        self.rows = rows
+        self.error = error
+
+    @property
+    def shape(self) -> str:
+        return statement_shape(self.statement)
+
+    def __repr__(self) -> str:
+        return f"<{self.duration * 1000:.2f} ms, {self.rows} rows> {self.shape}"
+
+
+class QueryCapture(QueryStats):
+    """Все SQL-запросы блока: число, время, повторяющиеся виды запросов"""
+
+    def __init__(self):
+        super().__init__()
+        self.captured: List[CapturedStatement] = []
+
+    def record(self, statement, parameters, elapsed, rows, error=None):
+        super().record(statement, parameters, elapsed, rows, error)
+        self.captured.append(
+            CapturedStatement(statement, parameters, elapsed, rows, error)
+        )
+
+    def shapes(self) -> Counter:
+        """Число выполнений каждого вида запроса"""
+        return Counter(statement.shape for statement in self.captured)
+
+    def duplicates(self) -> Dict[str, int]:
+        """Виды запросов, выполненные больше одного раза (признак N+1)"""
+        return {
+            shape: count
+            for shape, count in self.shapes().most_common()
+            if count > 1
+        }
+
+    def report(self) -> str:
+        """Текстовый отчёт: итоги и список запросов по порядку"""
+        lines = [
+            f"{self.statements} statements, "
+            f"{self.duration * 1000:.2f} ms, {self.rows} rows, "
+            f"{self.checkouts} connection checkouts "
+            f"(max {self.max_connections} at once)"
+        ]
+        for shape, count in self.duplicates().items():
+            lines.append(f"  repeated x{count}: {shape}")
+        lines.extend(
+            f"  {index}. {statement!r}"
+            for index, statement in enumerate(self.captured, start=1)
+        )
+        return "\n".join(lines)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Блок выполнил больше запросов (или дольше, или удерживал больше
+    соединений), чем разрешено"""
+
+
+@contextmanager
+def capture_queries(global_scope: bool = False) -> Iterator[QueryCapture]:
+    """Записывает все SQL-запросы, выполненные через движки приложения
+    внутри блока.
+
+    global_scope=True - записываются все запросы процесса (для клиентов,
+    выполняющих приложение в другом потоке без копирования контекста).
+    """
+    with track_queries(QueryCapture(), global_scope=global_scope) as capture:
+        yield capture
+
+
+def check_budget(
+    capture: QueryCapture,
+    max_statements: Optional[int] = None,
+    max_repeats: Optional[int] = None,
+    max_duration: Optional[float] = None,
+    label: str = "block",
+    max_connections: Optional[int] = None,
+) -> None:
+    """Проверяет запросы блока на соответствие бюджету.
+
+    Параметры:
+        max_statements - максимальное число запросов.
+        max_repeats - сколько раз может выполняться запрос одного вида
+        (1 - повторы запрещены).
+        max_duration - максимальное суммарное время в БД, в секундах.
+        label - название блока для сообщения об ошибке.
+        max_connections - сколько соединений из пула блок может
+        удерживать одновременно (1 - одно соединение на запрос).
+
+    Исключения:
+        QueryBudgetExceeded с отчётом о выполненных запросах.
+    """
+    problems = []
+    if max_statements is not None and capture.statements > max_statements:
+        problems.append(
+            f"{capture.statements} statements > {max_statements}"
+        )
+    if max_repeats is not None:
+        repeated = {
+            shape: count
+            for shape, count in capture.duplicates().items()
+            if count > max_repeats
+        }
+        if repeated:
+            problems.append(
+                f"{len(repeated)} statement shapes repeated "
+                f"more than {max_repeats} times"
+            )
+    if max_duration is not None and capture.duration > max_duration:
+        problems.append(
+            f"{capture.duration * 1000:.2f} ms in DB > "
+            f"{max_duration * 1000:.2f} ms"
+        )
+    if (
+        max_connections is not None
+        and capture.max_connections > max_connections
+    ):
+        problems.append(
+            f"{capture.max_connections} connections held at once > "
+            f"{max_connections}"
+        )
+    if problems:
+        raise QueryBudgetExceeded(
+            f"Query budget exceeded for {label}: "
+            + "; ".join(problems) + "\n" + capture.report()
+        )
+
+
+@contextmanager
+def query_budget(
+    max_statements: Optional[int] = None,
+    max_repeats: Optional[int] = None,
+    max_duration: Optional[float] = None,
+    label: str = "block",
+    global_scope: bool = False,
+    max_connections: Optional[int] = None,
+) -> Iterator[QueryCapture]:
+    """Записывает запросы блока и проверяет бюджет при выходе из него.
+
+    Пример:
+        with query_budget(
+            max_statements=3, max_connections=1, label="handle_swipe"
+        ):
+            client.post("/api/swipes", json=..., headers=...)
+    """
+    with capture_queries(global_scope=global_scope) as capture:
+        yield capture
+    check_budget(
+        capture,
+        max_statements=max_statements,
+        max_repeats=max_repeats,
+        max_duration=max_duration,
+        label=label,
+        max_connections=max_connections,
+    )
@@ -0,0 +1,320 @@
+import asyncio
+import hashlib
+import itertools
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from src.dao.cache import TTLCache
+from src.dao.metrics import DatabaseMetrics
+
+
+# Ошибки, при которых реплика считается недоступной
+CONNECT_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    exc.TimeoutError,
+    exc.InterfaceError,
+    exc.OperationalError,
+)
+
+
+class ReplicaSelection:
+    """Стратегии выбора реплики"""
+
+    ROUND_ROBIN = "round_robin"
+    LEAST_CONNECTIONS = "least_connections"
+
+
+class RequestRouting:
+    """Состояние маршрутизации в рамках одного запроса"""
+
+    def __init__(self, client_key: Optional[str] = None):
+        self.client_key = client_key
+        # Запрос изменил данные на primary: дальнейшие чтения - с primary
+        self.wrote = False
+
+
+_request_routing: ContextVar[Optional[RequestRouting]] = ContextVar(
+    "request_routing", default=None
+)
+
+
+class _Replica:
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        metrics: DatabaseMetrics,
+        read_options: Optional[Dict[str, Any]] = None,
+    ):
+        self.engine = engine
+        self.metrics = metrics
+        self.read_engine = (
+            engine.execution_options(**read_options) if read_options else engine
+        )
+        self.session_maker = async_sessionmaker(
+            self.read_engine, expire_on_commit=False
+        )
+        self.down_until = 0.0
+        self.failures = 0
+        self.sessions = 0
+        # Подключение к реплике проверено; до этого (и после ошибки)
+        # первая сессия проверяет его отдельным соединением (см. connect)
+        self.verified = False
+
+    @property
+    def healthy(self) -> bool:
+        return self.down_until <= time.monotonic()
+
+    def checked_out(self) -> int:
+        pool = self.engine.sync_engine.pool
+        return pool.checkedout() if hasattr(pool, "checkedout") else 0
+
+
+class ReplicaRouter:
+    """Маршрутизация сессий между primary и репликами для чтения.
+
+    Сессии с намерением "только чтение" открываются на одной из реплик
+    (по кругу или с наименьшим числом выданных соединений), остальные -
+    на primary. Чтения идут на primary, если:
+        - реплик нет или все они недоступны (после ошибки подключения
+          реплика исключается на down_cooldown секунд, затем первая
+          сессия заново проверяет подключение);
+        - текущий запрос уже изменял данные;
+        - клиент (по заголовку Authorization) изменял данные не позднее
+          чем stickiness секунд назад - read-your-writes с учётом
+          задержки репликации.
+
+    read_options - параметры выполнения (execution_options) соединений
+    сессий чтения на primary и репликах, например
+    {"postgresql_readonly": True} - транзакции READ ONLY, или
+    {"isolation_level": "AUTOCOMMIT"} - без транзакций. Пул при этом
+    общий: параметры сбрасываются при возврате соединения в пул.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        primary_session_maker: async_sessionmaker,
+        replicas: Optional[List[AsyncEngine]] = None,
+        selection: str = ReplicaSelection.ROUND_ROBIN,
+        stickiness: float = 5.0,
+        down_cooldown: float = 10.0,
+        read_options: Optional[Dict[str, Any]] = None,
+    ):
+        if selection not in (
+            ReplicaSelection.ROUND_ROBIN, ReplicaSelection.LEAST_CONNECTIONS
+        ):
+            raise ValueError(f"Неизвестная стратегия выбора реплики {selection!r}")
+        self.primary = primary
+        self.primary_session_maker = primary_session_maker
+        self.read_options = dict(read_options or {})
+        self.primary_read = (
+            primary.execution_options(**self.read_options)
+            if self.read_options else primary
+        )
+        self.replicas: List[_Replica] = []
+        for replica_engine in replicas or []:
+            metrics = DatabaseMetrics()
+            metrics.instrument(replica_engine.sync_engine)
+            self.replicas.append(
+                _Replica(replica_engine, metrics, self.read_options)
+            )
+        self.selection = selection
+        self.stickiness = stickiness
+        self.down_cooldown = down_cooldown
+        self._round_robin = itertools.count()
+        # Клиенты, недавно изменявшие данные
+        self._sticky_clients = TTLCache(maxsize=100_000, ttl=stickiness)
+        self.primary_reads = 0
+
+        # Любая запись через сессию primary отмечается в состоянии запроса
+        event.listen(Session, "after_flush", self._on_flush)
+        event.listen(Session, "do_orm_execute", self._on_orm_execute)
+
+    # --- состояние запроса ---------------------------------------------
+
+    @staticmethod
+    def client_key(authorization: Optional[str]) -> Optional[str]:
+        """Ключ клиента для read-your-writes: хэш токена авторизации"""
+        if not authorization:
+            return None
+        return hashlib.sha256(authorization.encode()).hexdigest()
+
+    @staticmethod
+    def current() -> Optional[RequestRouting]:
+        return _request_routing.get()
+
+    def begin_request(self, request: Any = None) -> RequestRouting:
+        """Состояние маршрутизации запроса (request - starlette Request);
+        хранится в request.state и становится текущим для сессий,
+        открываемых SessionManager.with_session"""
+        routing = getattr(request.state, "db_routing", None) if request else None
+        if routing is None:
+            authorization = (
+                request.headers.get("authorization") if request else None
+            )
+            routing = RequestRouting(self.client_key(authorization))
+            if request is not None:
+                request.state.db_routing = routing
+        _request_routing.set(routing)
+        return routing
+
+    def mark_write(self, routing: Optional[RequestRouting] = None) -> None:
+        """Отмечает, что запрос (и его клиент) изменили данные на primary"""
+        routing = routing or _request_routing.get()
+        if routing is None:
+            return
+        routing.wrote = True
+        if routing.client_key is not None and self.stickiness > 0:
+            self._sticky_clients.set(routing.client_key, True)
+
+    def _on_flush(self, session: Session, flush_context: Any) -> None:
+        if not session.info.get("read_only"):
+            self.mark_write(session.info.get("routing"))
+
+    def _on_orm_execute(self, orm_execute_state: Any) -> None:
+        session = orm_execute_state.session
+        if session.info.get("read_only"):
+            return
+        if (
+            orm_execute_state.is_insert
+            or orm_execute_state.is_update
+            or orm_execute_state.is_delete
+        ):
+            self.mark_write(session.info.get("routing"))
+
+    # --- выбор движка ----------------------------------------------------
+
+    def _must_read_primary(self, routing: Optional[RequestRouting]) -> bool:
+        if routing is None:
+            return False
+        if routing.wrote:
+            return True
+        return (
+            routing.client_key is not None
+            and self._sticky_clients.get(routing.client_key) is not None
+        )
+
+    def choose_replica(self) -> Optional[_Replica]:
+        """Реплика для следующей сессии чтения или None"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.selection == ReplicaSelection.LEAST_CONNECTIONS:
+            return min(healthy, key=lambda replica: replica.checked_out())
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    def mark_down(self, replica: _Replica) -> None:
+        """Исключает реплику из выбора на down_cooldown секунд"""
+        replica.failures += 1
+        replica.verified = False
+        replica.down_until = time.monotonic() + self.down_cooldown
+
+    def session(
+        self, read_only: bool = False, allow_replica: bool = True
+    ) -> AsyncSession:
+        """Новая сессия: на реплике для чтения (если allow_replica),
+        иначе на primary. Соединение берётся из пула при первом запросе
+        сессии, а не при её создании"""
+        routing = _request_routing.get()
+        replica = None
+        if (
+            read_only
+            and allow_replica
+            and not self._must_read_primary(routing)
+        ):
+            replica = self.choose_replica()
+
+        if replica is None:
+            if read_only:
+                self.primary_reads += 1
+                session = self.primary_session_maker(bind=self.primary_read)
+            else:
+                session = self.primary_session_maker()
+        else:
+            replica.sessions += 1
+            session = replica.session_maker()
+            session.info["replica"] = replica
+        session.info["read_only"] = read_only and replica is not None
+        session.info["routing"] = routing
+        return session
+
+    async def connect(self, session: AsyncSession) -> AsyncSession:
+        """Проверяет подключение к реплике сессии, если оно ещё не
+        проверено (первая сессия после запуска или после ошибки); при
+        ошибке реплика исключается, а сессия переводится на primary.
+
+        Для проверенной реплики отдельного соединения не берётся: сбой
+        обнаруживается при первом запросе сессии (см. fail_over).
+        """
+        replica = session.info.get("replica")
+        if replica is None or replica.verified:
+            return session
+        try:
+            async with replica.engine.connect():
+                pass
+            replica.verified = True
+        except CONNECT_ERRORS:
+            self.mark_down(replica)
+            self.read_on_primary(session)
+        return session
+
+    async def fail_over(self, session: AsyncSession, error: BaseException) -> bool:
+        """Обрабатывает ошибку запроса сессии чтения на реплике.
+
+        Если это ошибка подключения, реплика исключается, транзакция
+        сессии откатывается, а сессия переводится на primary. Возвращает
+        True, если запрос можно повторить (в сессии только чтения).
+        """
+        replica = session.info.get("replica")
+        if replica is None or not isinstance(error, CONNECT_ERRORS):
+            return False
+        self.mark_down(replica)
+        await session.rollback()
+        self.read_on_primary(session)
+        return True
+
+    def read_on_primary(self, session: AsyncSession) -> None:
+        """Переводит сессию чтения с реплики на primary (с параметрами
+        чтения). У сессии не должно быть открытой транзакции"""
+        session.bind = self.primary_read
+        session.sync_session.bind = self.primary_read.sync_engine
+        session.info["read_only"] = False
+        session.info.pop("replica", None)
+        self.primary_reads += 1
+
+    def for_write(self, session: AsyncSession) -> None:
+        """Переводит сессию чтения на primary с обычными транзакциями.
+        У сессии не должно быть открытой транзакции"""
+        session.bind = self.primary
+        session.sync_session.bind = self.primary.sync_engine
+        session.info["read_only"] = False
+        session.info.pop("replica", None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики маршрутизации и метрики пулов реплик"""
+        return {
+            "selection": self.selection,
+            "read_options": self.read_options,
+            "stickiness": self.stickiness,
+            "primary_reads": self.primary_reads,
+            "sticky_clients": len(self._sticky_clients),
+            "replicas": [
+                {
+                    "url": replica.engine.url.render_as_string(
+                        hide_password=True
+                    ),
+                    "healthy": replica.healthy,
+                    "verified": replica.verified,
+                    "failures": replica.failures,
+                    "sessions": replica.sessions,
+                    **replica.metrics.snapshot(top=5),
+                }
+                for replica in self.replicas
+            ],
+        }
@@ -0,0 +1,127 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import Select, func, or_
+
+
+def escape_like(value: str, escape: str = "\\") -> str:
+    """Экранирует спецсимволы LIKE (%, _) в пользовательском запросе"""
+    return (
+        value.replace(escape, escape * 2)
+        .replace("%", escape + "%")
+        .replace("_", escape + "_")
+    )
+
+
+class SearchBackend(ABC):
+    """Способ поиска по текстовым полям для BaseDAO.paginate"""
+
+    @abstractmethod
+    def apply(
+        self,
+        model: Any,
+        query: Select,
+        search_query: str,
+        search_fields: Sequence[str],
+        rank: bool = False,
+    ) -> Select:
+        """Добавляет к запросу условия поиска.
+
+        Параметры:
+            model - модель, по которой выполняется поиск.
+            query - исходный запрос.
+            search_query - поисковая строка пользователя.
+            search_fields - поля модели, по которым ищется строка.
+            rank - если True, результаты сортируются по релевантности
+            (только для бэкендов, которые её вычисляют).
+        """
+
+    @staticmethod
+    def _fields(model: Any, search_fields: Sequence[str]) -> List[Any]:
+        return [
+            getattr(model, field_name)
+            for field_name in search_fields
+            if hasattr(model, field_name)
+        ]
+
+
+class LikeSearch(SearchBackend):
+    """Поиск подстроки через lower(field) LIKE '%q%'.
+
+    Работает на любой БД, но не использует индексы: каждый поиск -
+    полный просмотр таблицы. Используется как запасной вариант.
+    """
+
+    def apply(self, model, query, search_query, search_fields, rank=False):
+        query_text = f"%{escape_like(search_query.strip().lower())}%"
+        conditions = [
+            func.lower(field).like(query_text, escape="\\")
+            for field in self._fields(model, search_fields)
+        ]
+        if conditions:
+            query = query.where(or_(*conditions))
+        return query
+
+
+class TrigramSearch(SearchBackend):
+    """Поиск подстроки через field ILIKE '%q%'.
+
+    При наличии GIN-индексов pg_trgm (gin_trgm_ops, см. миграции) такой
+    поиск выполняется по индексу. Без расширения запрос остаётся
+    корректным, но просматривает всю таблицу.
+    """
+
+    def apply(self, model, query, search_query, search_fields, rank=False):
+        query_text = f"%{escape_like(search_query.strip())}%"
+        conditions = [
+            field.ilike(query_text, escape="\\")
+            for field in self._fields(model, search_fields)
+        ]
+        if conditions:
+            query = query.where(or_(*conditions))
+        return query
+
+
+class FullTextSearch(SearchBackend):
+    """Полнотекстовый поиск по колонке tsvector с GIN-индексом.
+
+    Ищутся слова (с учётом словоформ), а не подстроки; search_fields
+    должны входить в fields - поля, из которых строится vector_column,
+    иначе используется fallback.
+    """
+
+    def __init__(
+        self,
+        vector_column: str,
+        fields: Sequence[str],
+        config: str = "russian",
+        fallback: Optional[SearchBackend] = None,
+    ):
+        self.vector_column = vector_column
+        self.fields = set(fields)
+        self.config = config
+        self.fallback = fallback or LikeSearch()
+
+    def apply(self, model, query, search_query, search_fields, rank=False):
+        if not set(search_fields) <= self.fields:
+            return self.fallback.apply(
+                model, query, search_query, search_fields, rank
+            )
+
+        vector = getattr(model, self.vector_column)
+        ts_query = func.websearch_to_tsquery(self.config, search_query.strip())
+        query = query.where(vector.op("@@")(ts_query))
+        if rank:
+            query = query.order_by(func.ts_rank(vector, ts_query).desc())
+        return query
+
+
+# SEARCH_BACKEND=fallback отключает индексные бэкенды (например, для БД
+# без pg_trgm и без миграции с колонкой tsvector)
+SEARCH_FALLBACK = os.getenv("SEARCH_BACKEND", "").lower() == "fallback"
+
+
+def search_backend(preferred: SearchBackend) -> SearchBackend:
+    """Возвращает preferred или LikeSearch в режиме SEARCH_BACKEND=fallback"""
+    return LikeSearch() if SEARCH_FALLBACK else preferred
@@ -0,0 +1,86 @@
+"""Быстрая сериализация списков в JSON.
+
+Обычный путь списочного эндпоинта: ORM-объекты -> проверка каждого по
+response_model -> JSON. RowSerializer строит JSON сразу из строк-кортежей
+(BaseDAO.paginate/cursor_paginate с columns=...): TypeAdapter списка
+TypedDict с полями схемы компилируется один раз, строки не проверяются
+(типы колонок и так соответствуют схеме) и сериализуются pydantic-core
+в bytes, которые возвращаются готовым Response.
+
+Формат ответа совпадает с обычным путём (те же поля в том же порядке
+и то же представление UUID, дат и None), поэтому путь включается
+переменной окружения FAST_SERIALIZATION без изменений для клиентов.
+"""
+import os
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "false").lower() in (
+    "1", "true", "yes"
+)
+
+
+class RowSerializer:
+    """Сериализатор строк в JSON-список по схеме ответа.
+
+    Пример:
+        post_rows = RowSerializer(PostResponse)
+
+        page = await PostDAO.get_user_posts(..., columns=post_rows.columns)
+        return post_rows.respond(page.values, page.headers())
+
+    Если сериализатор выключен (enabled=False), columns равно None
+    (DAO возвращает ORM-объекты), а respond возвращает значения как есть -
+    их проверяет и сериализует FastAPI по response_model.
+    """
+
+    def __init__(
+        self, schema: Type[BaseModel], enabled: Optional[bool] = None
+    ):
+        self.schema = schema
+        self.enabled = FAST_SERIALIZATION if enabled is None else enabled
+        self.fields = list(schema.model_fields)
+        row_type = TypedDict(
+            f"{schema.__name__}Row",
+            {
+                name: field.annotation
+                for name, field in schema.model_fields.items()
+            },
+        )
+        self.adapter = TypeAdapter(List[row_type])
+
+    @property
+    def columns(self) -> Optional[List[str]]:
+        """Колонки для выборки строк (None - выбирать ORM-объекты)"""
+        return self.fields if self.enabled else None
+
+    def select_columns(self, *extra: str) -> Optional[List[str]]:
+        """columns и дополнительные колонки (например, версия строки для
+        ETag) - они идут в конце строки и в JSON не попадают"""
+        if not self.enabled:
+            return None
+        return [*self.fields, *extra]
+
+    def dump_json(self, rows: Iterable[Any]) -> bytes:
+        """JSON-список из строк, значения в которых идут в порядке полей
+        схемы (лишние значения в конце строки не выводятся)"""
+        fields = self.fields
+        return self.adapter.dump_json(
+            [dict(zip(fields, row)) for row in rows]
+        )
+
+    def respond(
+        self, values: List[Any], headers: Optional[Dict[str, str]] = None
+    ) -> Any:
+        """Готовый Response с JSON (быстрый путь) или values для обычной
+        сериализации по response_model"""
+        if not self.enabled:
+            return values
+        return Response(
+            content=self.dump_json(values),
+            media_type="application/json",
+            headers=headers,
+        )
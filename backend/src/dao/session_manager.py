@@ -3,15 +3,25 @@ from typing import Any
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.dao.database import async_session_maker
+from src.dao.database import db_router
 from src.dao.error_handler import DatabaseErrorHandler
+from src.dao.unit_of_work import UnitOfWork
 
 
 class SessionManager:
     """Менеджер сессий для работы с БД"""
 
     @staticmethod
-    def with_session(auto_commit: bool = False): # noqa
+    def with_session(auto_commit: bool = False, read_only: bool = False): # noqa
+        """Передаёт в метод сессию: переданную вызывающим, сессию текущей
+        единицы работы (см. src.dao.unit_of_work) или новую.
+
+        read_only - метод только читает данные, новая сессия может быть
+        открыта на реплике (см. ReplicaRouter).
+        auto_commit - новая сессия фиксирует изменения метода сразу;
+        в сессии вызывающего или единицы работы они фиксируются вместе
+        с её транзакцией.
+        """
         def decorator(func): # noqa
             @wraps(func) # noqa
             async def wrapper(
@@ -20,27 +30,45 @@ class SessionManager:
                     session: AsyncSession = None,
                     **kwargs: Any
             ): # noqa
+                async def call(session: AsyncSession) -> Any:
+                    # Сбой подключения к реплике: запрос повторяется на
+                    # primary (сессия реплики только читает)
+                    try:
+                        return await func(cls, *args, session=session, **kwargs)
+                    except Exception as error:
+                        if not await db_router.fail_over(session, error):
+                            raise
+                    return await func(cls, *args, session=session, **kwargs)
+
+                if session is None:
+                    unit_of_work = UnitOfWork.current()
+                    if unit_of_work is not None:
+                        if not read_only:
+                            await unit_of_work.for_write()
+                        session = unit_of_work.session
+
                 try:
                     if session is not None:
-                        result = await func(
-                            cls, *args, session=session, **kwargs
-                        )
-                        return result
+                        return await call(session)
 
-                    async with async_session_maker() as session:
+                    session = db_router.session(read_only=read_only)
+                    if read_only:
+                        session = await db_router.connect(session)
+                    async with session:
                         if auto_commit:
                             async with session.begin():
-                                result = await func(
+                                return await func(
                                     cls, *args, session=session, **kwargs
                                 )
-                                return result
                         else:
-                            result = await func(
-                                cls, *args, session=session, **kwargs
-                            )
-                            return result
+                            return await call(session)
                 except Exception as e:
-                    await session.rollback()
+                    # Внутри SAVEPOINT откатывает только он сам
+                    if (
+                        session is not None
+                        and not session.in_nested_transaction()
+                    ):
+                        await session.rollback()
                     DatabaseErrorHandler.handle_error(e, cls)
 
             return wrapper
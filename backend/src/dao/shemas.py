@@ -1,11 +1,45 @@
+from enum import Enum
 from pydantic import BaseModel
-from typing import Generic, List, TypeVar
+from typing import Dict, Generic, List, Optional, TypeVar
 
 T = TypeVar("T")
 
+class TotalMode(str, Enum):
+    """Способ получения общего количества записей при пагинации"""
+    EXACT = "exact"        # отдельный запрос count(*)
+    WINDOW = "window"      # count(*) OVER () в запросе страницы
+    ESTIMATE = "estimate"  # оценка планировщика / pg_class.reltuples
+    CACHED = "cached"      # точный count(*), кэшируемый по фильтрам на TTL
+    NONE = "none"          # total не вычисляется
+
 class PagePaginate(BaseModel, Generic[T]):
     values: List[T]
-    total: int
+    total: Optional[int]
     page: int
-    pages: int
-    page_size: int
\ No newline at end of file
+    pages: Optional[int]
+    page_size: int
+    total_mode: TotalMode = TotalMode.EXACT
+
+    def headers(self) -> Dict[str, str]:
+        """Заголовки ответа с данными о странице"""
+        headers = {"X-Page": str(self.page), "X-Page-Size": str(self.page_size)}
+        if self.total is not None:
+            headers["X-Total-Count"] = str(self.total)
+        if self.pages is not None:
+            headers["X-Pages"] = str(self.pages)
+        return headers
+
+class CursorPagePaginate(BaseModel, Generic[T]):
+    values: List[T]
+    page_size: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+    def headers(self) -> Dict[str, str]:
+        """Заголовки ответа с курсорами соседних страниц"""
+        headers = {}
+        if self.next_cursor is not None:
+            headers["X-Next-Cursor"] = self.next_cursor
+        if self.prev_cursor is not None:
+            headers["X-Prev-Cursor"] = self.prev_cursor
+        return headers
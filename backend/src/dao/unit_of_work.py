@@ -0,0 +1,182 @@
+"""Единица работы (unit of work) запроса.
+
+Зависимости get_db/get_read_db открывают одну сессию с транзакцией на
+HTTP-запрос и делают её текущей (ContextVar). DAO-методы, вызванные
+без session=..., получают её автоматически (SessionManager.with_session),
+поэтому запрос не берёт из пула второе соединение, даже если сессию
+забыли передать явно.
+
+Соединение берётся из пула при первом запросе сессии и возвращается,
+когда завершается её транзакция: при выходе из зависимости
+(scope="function" - после проверки ответа, до его отправки), а у единиц
+работы чтения - сразу после обработчика, до сериализации ответа
+(UnitOfWorkRoute). Единицы работы чтения выполняются в транзакциях
+READ ONLY (или без транзакции, см. DB_READ_TRANSACTIONS).
+
+Записи, полученные BaseDAO.get по первичному ключу, загружаются пачками
+и кэшируются до конца запроса (см. src.dao.loader).
+
+Единица работы видна только задаче, которая её открыла: фоновые задачи,
+созданные во время запроса (asyncio.create_task копирует контекст),
+открывают собственные сессии и не используют сессию запроса
+параллельно с ним.
+"""
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterator, List,
+    Optional,
+)
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncSessionTransaction
+from sqlalchemy.orm import ORMExecuteState
+
+from src.dao.loader import DataLoader
+from src.dao.replicas import ReplicaRouter
+
+
+def _current_task() -> Optional[asyncio.Task]:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:  # вне цикла событий
+        return None
+
+
+class UnitOfWork:
+    """Сессия запроса и её транзакция.
+
+    read_only - единица работы открыта для чтения (на реплике или в
+    транзакциях только для чтения); первый изменяющий данные метод
+    переводит её в режим записи (см. for_write).
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        router: ReplicaRouter,
+        read_only: bool = False,
+    ):
+        self.session = session
+        self.router = router
+        self.read_only = read_only
+        self.owner = _current_task()
+        # Глубина вложенных транзакций (SAVEPOINT)
+        self.savepoints = 0
+        # Загрузчики по первичному ключу: {(DAO, профиль загрузки): DataLoader}
+        self.loaders: Dict[Hashable, DataLoader] = {}
+        session.info["unit_of_work"] = self
+
+    @staticmethod
+    def of_session(session: AsyncSession) -> Optional["UnitOfWork"]:
+        """Единица работы, которой принадлежит сессия (в том числе для
+        задач, которым сессию запроса передали явно)"""
+        return session.info.get("unit_of_work")
+
+    @staticmethod
+    def current() -> Optional["UnitOfWork"]:
+        """Единица работы текущей задачи или None"""
+        unit_of_work = _current_unit_of_work.get()
+        if unit_of_work is None or unit_of_work.owner is not _current_task():
+            return None
+        return unit_of_work
+
+    async def for_write(self) -> None:
+        """Переводит единицу работы чтения в режим записи на primary.
+
+        Возможно только до первого запроса сессии. Если транзакция
+        чтения уже начата, запись в новой транзакции не была бы защищена
+        ею от параллельных изменений прочитанного (и могла бы опираться
+        на отстающую реплику), поэтому выбрасывается RuntimeError:
+        обработчик, который изменяет данные, открывает единицу работы
+        для записи (get_db).
+        """
+        if not self.read_only:
+            return
+        if self.session.in_transaction():
+            raise RuntimeError(
+                "Cannot write in a read-only unit of work after it has "
+                "read data: use get_db / unit_of_work() for this request"
+            )
+        self.router.for_write(self.session)
+        self.read_only = False
+
+    async def release(self) -> None:
+        """Завершает транзакцию чтения и возвращает соединение в пул, не
+        закрывая сессию: следующий запрос сессии начнёт новую
+        транзакцию. Вызывается после обработчика (UnitOfWorkRoute),
+        чтобы не держать соединение во время сериализации ответа.
+
+        Единица работы записи не завершается: её изменения фиксируются
+        при выходе из зависимости, после проверки ответа - ошибка
+        сериализации откатывает их.
+        """
+        if self.read_only and self.session.in_transaction():
+            await self.session.commit()
+
+    def loader(
+        self,
+        key: Hashable,
+        fetch: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+    ) -> DataLoader:
+        """Загрузчик запроса с данным ключом (создаётся при первом обращении).
+
+        Кэши загрузчиков сбрасываются, когда сессия выполняет не-SELECT
+        запрос (INSERT/UPDATE/DELETE, в том числе через DAO) или
+        откатывает транзакцию.
+        """
+        if not self.loaders:
+            self._watch_session()
+        loader = self.loaders.get(key)
+        if loader is None:
+            loader = self.loaders[key] = DataLoader(fetch)
+        return loader
+
+    def clear_loaders(self) -> None:
+        for loader in self.loaders.values():
+            loader.clear()
+
+    def _watch_session(self) -> None:
+        sync_session = self.session.sync_session
+        event.listen(sync_session, "do_orm_execute", self._on_execute)
+        event.listen(
+            sync_session,
+            "after_soft_rollback",
+            lambda *_: self.clear_loaders(),
+        )
+
+    def _on_execute(self, orm_execute_state: ORMExecuteState) -> None:
+        if not orm_execute_state.is_select:
+            self.clear_loaders()
+
+    @contextmanager
+    def activate(self) -> Iterator["UnitOfWork"]:
+        """Делает единицу работы текущей на время блока"""
+        token = _current_unit_of_work.set(self)
+        try:
+            yield self
+        finally:
+            _current_unit_of_work.reset(token)
+
+    @asynccontextmanager
+    async def savepoint(self) -> AsyncIterator[AsyncSessionTransaction]:
+        """Вложенная транзакция (SAVEPOINT): при исключении в блоке
+        откатываются только его изменения, а транзакция запроса
+        продолжается. Блоки могут быть вложены друг в друга.
+
+        Пример:
+            async with unit_of_work.savepoint():
+                await SwipeDAO.add_swipe(...)
+        """
+        self.savepoints += 1
+        try:
+            async with self.session.begin_nested() as transaction:
+                yield transaction
+        finally:
+            self.savepoints -= 1
+
+
+_current_unit_of_work: ContextVar[Optional[UnitOfWork]] = ContextVar(
+    "unit_of_work", default=None
+)
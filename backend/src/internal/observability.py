@@ -0,0 +1,279 @@
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+from src.dao.metrics import (
+    DatabaseMetrics, Histogram, LATENCY_BUCKETS, QueryStats, track_queries
+)
+
+# Корзины гистограммы числа SQL-запросов на HTTP-запрос
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+# Корзины гистограммы числа одновременно удерживаемых запросом соединений
+CONNECTION_COUNT_BUCKETS = (0, 1, 2, 3, 5)
+
+# Метка маршрута для запросов, не попавших ни в один маршрут
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RouteStats:
+    """Метрики одного маршрута (метод + шаблон пути)"""
+
+    def __init__(self):
+        self.duration = Histogram(LATENCY_BUCKETS)
+        self.db_statements = Histogram(STATEMENT_COUNT_BUCKETS)
+        self.db_duration = Histogram(LATENCY_BUCKETS)
+        self.db_connections = Histogram(CONNECTION_COUNT_BUCKETS)
+        self.db_connection_time = Histogram(LATENCY_BUCKETS)
+        self.db_rows = 0
+        self.responses: Dict[int, int] = {}
+
+
+class HttpMetrics:
+    """Метрики HTTP-запросов по маршрутам: латентность, статусы ответов,
+    число SQL-запросов, время в БД, число полученных строк, число
+    соединений из пула, удерживаемых одновременно, и время их удержания"""
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        elapsed: float,
+        queries: QueryStats,
+    ) -> None:
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        stats.duration.observe(elapsed)
+        stats.db_statements.observe(queries.statements)
+        stats.db_duration.observe(queries.duration)
+        stats.db_connections.observe(queries.max_connections)
+        stats.db_connection_time.observe(queries.connection_time)
+        stats.db_rows += queries.rows
+        stats.responses[status_code] = stats.responses.get(status_code, 0) + 1
+
+    def reset(self) -> None:
+        self.routes = {}
+
+
+http_metrics = HttpMetrics()
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Шаблон пути маршрута (/api_post/user/{user_id}) для меток метрик.
+
+    Берётся из самого маршрута, а не восстанавливается по пути запроса:
+    число меток ограничено числом маршрутов, какие бы значения
+    параметров ни пришли в запросе.
+    """
+    route = scope.get("route")
+    if getattr(route, "path", None) is None:
+        return UNMATCHED_ROUTE
+    # Маршрут вложенного роутера хранит путь без префикса include_router,
+    # полный шаблон FastAPI кладёт в контекст маршрута
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    if getattr(context, "original_route", None) is route:
+        return context.path
+    return route.path
+
+
+def server_timing(elapsed: float, queries: QueryStats) -> str:
+    """Значение заголовка Server-Timing: время в БД, время удержания
+    соединений (до начала ответа) и общее время"""
+    return (
+        f'db;dur={queries.duration * 1000:.2f};'
+        f'desc="{queries.statements} queries, {queries.rows} rows, '
+        f'{queries.max_connections} connections", '
+        f'conn;dur={queries.connection_time * 1000:.2f}, '
+        f'app;dur={elapsed * 1000:.2f}'
+    )
+
+
+class ObservabilityMiddleware:
+    """ASGI middleware: измеряет время обработки каждого запроса и учитывает
+    SQL-запросы, выполненные за это время (track_queries).
+
+    Метрики сохраняются в HttpMetrics по шаблону маршрута
+    (/api_post/user/{user_id}), в ответ добавляется заголовок Server-Timing.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        metrics: HttpMetrics = http_metrics,
+        emit_server_timing: bool = True,
+    ):
+        self.app = app
+        self.metrics = metrics
+        self.emit_server_timing = emit_server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        with track_queries() as queries:
+            async def send_with_timing(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    if self.emit_server_timing:
+                        value = server_timing(
+                            time.perf_counter() - started, queries
+                        )
+                        message["headers"] = [
+                            *message.get("headers", []),
+                            (b"server-timing", value.encode("latin-1")),
+                        ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                self.metrics.observe(
+                    scope["method"],
+                    route_template(scope),
+                    status_code,
+                    time.perf_counter() - started,
+                    queries,
+                )
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in labels.items()
+    ) + "}"
+
+
+class PrometheusWriter:
+    """Формирует текстовый формат экспозиции Prometheus (version 0.0.4)"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def header(self, name: str, metric_type: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {metric_type}")
+
+    def sample(self, name: str, labels: Dict[str, Any], value: float) -> None:
+        self.lines.append(f"{name}{_labels(labels)} {value}")
+
+    def histogram(
+        self, name: str, labels: Dict[str, Any], histogram: Histogram
+    ) -> None:
+        bounds = [*map(str, histogram.buckets), "+Inf"]
+        for bound, count in zip(bounds, histogram.cumulative()):
+            self.sample(f"{name}_bucket", {**labels, "le": bound}, count)
+        self.sample(f"{name}_sum", labels, histogram.sum)
+        self.sample(f"{name}_count", labels, histogram.count)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _write_http(writer: PrometheusWriter, metrics: HttpMetrics) -> None:
+    routes = sorted(metrics.routes.items())
+
+    writer.header(
+        "http_requests_total", "counter", "HTTP requests by route and status"
+    )
+    for (method, route), stats in routes:
+        for status_code, count in sorted(stats.responses.items()):
+            writer.sample(
+                "http_requests_total",
+                {"method": method, "route": route, "status": status_code},
+                count,
+            )
+
+    series: Iterable[Tuple[str, str, str]] = (
+        ("http_request_duration_seconds", "duration",
+         "HTTP request latency"),
+        ("http_request_db_statements", "db_statements",
+         "SQL statements executed per HTTP request"),
+        ("http_request_db_duration_seconds", "db_duration",
+         "Time spent in SQL statements per HTTP request"),
+        ("http_request_db_connections", "db_connections",
+         "Pooled connections held at once per HTTP request"),
+        ("http_request_db_connection_seconds", "db_connection_time",
+         "Time pooled connections were held per HTTP request"),
+    )
+    for name, attribute, help_text in series:
+        writer.header(name, "histogram", help_text)
+        for (method, route), stats in routes:
+            writer.histogram(
+                name,
+                {"method": method, "route": route},
+                getattr(stats, attribute),
+            )
+
+    writer.header(
+        "http_request_db_rows_total", "counter",
+        "Rows fetched from the database by HTTP requests"
+    )
+    for (method, route), stats in routes:
+        writer.sample(
+            "http_request_db_rows_total",
+            {"method": method, "route": route},
+            stats.db_rows,
+        )
+
+
+def _write_db(writer: PrometheusWriter, metrics: DatabaseMetrics) -> None:
+    pool = metrics.pool_status()
+    gauges = (
+        ("db_pool_size", "size", "Configured pool size"),
+        ("db_pool_checked_out", "checked_out", "Connections in use"),
+        ("db_pool_idle", "idle", "Idle connections in the pool"),
+        ("db_pool_overflow", "overflow", "Overflow connections"),
+    )
+    for name, key, help_text in gauges:
+        if key in pool:
+            writer.header(name, "gauge", help_text)
+            writer.sample(name, {}, pool[key])
+
+    counters = (
+        ("db_pool_checkout_timeouts_total",
+         pool.get("checkout_timeouts", 0), "Pool checkout timeouts"),
+        ("db_connections_opened_total", metrics.connects,
+         "New database connections"),
+        ("db_statement_errors_total", metrics.errors,
+         "Failed SQL statements"),
+    )
+    for name, value, help_text in counters:
+        writer.header(name, "counter", help_text)
+        writer.sample(name, {}, value)
+
+    writer.header(
+        "db_pool_checkout_wait_seconds", "histogram",
+        "Time waiting for a pooled connection"
+    )
+    writer.histogram("db_pool_checkout_wait_seconds", {}, metrics.checkout_wait)
+    writer.header(
+        "db_statement_duration_seconds", "histogram", "SQL statement latency"
+    )
+    writer.histogram(
+        "db_statement_duration_seconds", {}, metrics.statement_latency
+    )
+
+
+def render_prometheus(
+    metrics: HttpMetrics, db_metrics: DatabaseMetrics
+) -> str:
+    """Все метрики приложения в формате Prometheus"""
+    writer = PrometheusWriter()
+    _write_http(writer, metrics)
+    _write_db(writer, db_metrics)
+    return writer.render()
@@ -0,0 +1,63 @@
+import os
+import secrets
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from src.dao.database import db_router, engine_settings
+from src.dao.metrics import db_metrics
+from src.internal.observability import http_metrics, render_prometheus
+
+# Токен внутренних эндпоинтов (заголовок X-Internal-Token). Пока он не
+# задан, внутренние эндпоинты закрыты: доступ без токена на прокси не
+# ограничивается
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
+
+
+async def verify_internal_token(
+    x_internal_token: Optional[str] = Header(None)
+) -> None:
+    if not (
+        INTERNAL_API_TOKEN
+        and x_internal_token
+        and secrets.compare_digest(x_internal_token, INTERNAL_API_TOKEN)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Forbidden"
+        )
+
+
+router_internal = APIRouter(dependencies=[Depends(verify_internal_token)])
+
+# Эндпоинт для Prometheus (подключается без префикса: /metrics)
+router_metrics = APIRouter(dependencies=[Depends(verify_internal_token)])
+
+
+@router_metrics.get("/metrics", response_class=PlainTextResponse)
+async def get_prometheus_metrics() -> PlainTextResponse:
+    """Метрики HTTP-запросов и БД в текстовом формате Prometheus"""
+    return PlainTextResponse(
+        render_prometheus(http_metrics, db_metrics),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router_internal.get("/db/metrics", response_model=Dict[str, Any])
+async def get_db_metrics(
+    top: int = Query(20, ge=0, le=500)
+) -> Dict[str, Any]:
+    """Состояние пула, время ожидания соединения и латентность запросов"""
+    return {
+        "settings": engine_settings.model_dump(),
+        **db_metrics.snapshot(top=top),
+        "routing": db_router.stats(),
+    }
+
+
+@router_internal.post("/db/metrics/reset", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_db_metrics() -> None:
+    """Сбрасывает накопленные метрики (например, перед нагрузочным тестом)"""
+    db_metrics.reset()
+    http_metrics.reset()
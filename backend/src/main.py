@@ -1,8 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from src.dao.database import Base, engine
 from src.users.router import router as user_router
 from src.posts.router import router_post as post_router
+from src.internal.router import router_internal as internal_router
+from src.internal.router import router_metrics as metrics_router
+from src.bulk.router import router_bulk as bulk_router
+from src.internal.observability import ObservabilityMiddleware
 
 app = FastAPI()
 
@@ -24,18 +27,19 @@ app.add_middleware(
     allow_headers=["*"],         # Разрешаем все заголовки
 )
 
+# Латентность, SQL-запросы по маршрутам и заголовок Server-Timing;
+# добавляется последним, чтобы охватывать остальные middleware
+app.add_middleware(ObservabilityMiddleware)
+
 # Подключение маршрутов
 app.include_router(user_router, prefix="/api", tags=["user"])
 app.include_router(post_router, prefix="/api_post", tags=["post"])
+app.include_router(internal_router, prefix="/internal", tags=["internal"])
+app.include_router(metrics_router, tags=["internal"])
+app.include_router(bulk_router, prefix="/internal", tags=["internal"])
 
-# Функция для создания таблиц в базе (используется при старте приложения)
-async def create_tables():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-@app.on_event("startup")
-async def on_startup():
-    await create_tables()
+# Схема базы создаётся и изменяется только миграциями Alembic
+# (alembic upgrade head выполняется перед запуском, см. Dockerfile)
 
 @app.get("/")
 async def read_root():
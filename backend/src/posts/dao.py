@@ -1,11 +1,16 @@
 import uuid
-from typing import Optional
+from typing import Any, List, Optional
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update, delete
+from sqlalchemy import event, true, tuple_
 
 from ..dao.base import BaseDAO
+from ..dao.cache import TTLCache
+from ..dao.cursor import CursorCodec
+from ..dao.search import FullTextSearch, search_backend
+from ..dao.shemas import CursorPagePaginate, PagePaginate, TotalMode
+from ..users.SwipeDao import SwipeDAO
 from .models import Post
 from .schemas import PostUpdate, PostBase
 
@@ -13,6 +18,15 @@ from .schemas import PostUpdate, PostBase
 class PostDAO(BaseDAO[Post]):
     model = Post
 
+    search_backend = search_backend(
+        FullTextSearch("search_vector", fields=["content"])
+    )
+
+    # Кэш первой страницы ленты мэтчей по id пользователя
+    feed_cache = TTLCache(maxsize=10_000, ttl=15.0)
+    # Колонки постов ленты мэтчей (без поискового вектора)
+    feed_columns = ["id", "user_id", "content", "created_at", "updated_at"]
+
     @classmethod
     async def create_post(
         cls,
@@ -28,6 +42,7 @@ class PostDAO(BaseDAO[Post]):
             session=session,
             **post_dict
         )
+        await cls.invalidate_feeds(session, user_id)
         return new_post
 
     @classmethod
@@ -36,23 +51,54 @@ class PostDAO(BaseDAO[Post]):
         session: AsyncSession,
         post_id: uuid.UUID
     ) -> Optional[Post]:
-        result = await session.execute(
-            select(cls.model).where(cls.model.id == post_id)
+        return await cls.get(session=session, id=post_id)
+
+    @classmethod
+    async def search_posts(
+        cls,
+        session: AsyncSession,
+        query: str,
+        page: int = 1,
+        page_size: int = 20,
+        columns: Optional[List[str]] = None,
+    ) -> PagePaginate:
+        """Полнотекстовый поиск постов, отсортированных по релевантности"""
+        return await cls.paginate(
+            session=session,
+            page=page,
+            page_size=page_size,
+            search_query=query,
+            search_fields=["content"],
+            total_mode=TotalMode.NONE,
+            columns=columns,
         )
-        return result.scalar_one_or_none()
 
     @classmethod
     async def get_user_posts(
         cls,
         session: AsyncSession,
-        user_id: uuid.UUID
-    ) -> list[Post]:
-        result = await session.execute(
-            select(cls.model)
-            .where(cls.model.user_id == user_id)
-            .order_by(cls.model.created_at.desc())
+        user_id: uuid.UUID,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: int = 20,
+        columns: Optional[List[str]] = None,
+    ) -> CursorPagePaginate:
+        """Страница ленты постов пользователя, новые сверху.
+
+        Пагинация по курсору (created_at, id) обслуживается индексом
+        ix_posts_user_id_created_at_id без сортировки и OFFSET.
+        columns - выбрать строки вместо объектов (см. BaseDAO.paginate).
+        """
+        return await cls.cursor_paginate(
+            session=session,
+            page_size=limit,
+            after=after,
+            before=before,
+            order_by="created_at",
+            descending=True,
+            columns=columns,
+            user_id=user_id,
         )
-        return result.scalars().all()
 
     @classmethod
     async def update_post(
@@ -62,27 +108,20 @@ class PostDAO(BaseDAO[Post]):
         user_id: uuid.UUID,
         update_data: PostUpdate
     ) -> Optional[Post]:
-        # Проверяем существование поста и принадлежность пользователю
-        existing_post = await cls.get_post(session, post_id)
-        if not existing_post:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Post not found"
-            )
-        if existing_post.user_id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only update your own posts"
-            )
-
+        # Принадлежность пользователю проверяется в самом UPDATE
         update_values = update_data.dict(exclude_unset=True)
-        await session.execute(
-            update(cls.model)
-            .where(cls.model.id == post_id)
-            .values(**update_values)
+        updated = await cls.update_where(
+            session=session,
+            values=update_values,
+            id=post_id,
+            user_id=user_id,
         )
-        # Получаем обновленный пост
-        return await cls.get_post(session, post_id)
+        if not updated:
+            await cls.raise_for_miss(
+                session, post_id, "You can only update your own posts"
+            )
+        await cls.invalidate_feeds(session, user_id)
+        return updated[0]
 
     @classmethod
     async def delete_post(
@@ -91,22 +130,142 @@ class PostDAO(BaseDAO[Post]):
         post_id: uuid.UUID,
         user_id: uuid.UUID
     ) -> bool:
-        # Проверяем существование поста и принадлежность пользователю
-        existing_post = await cls.get_post(session, post_id)
-        if not existing_post:
+        # Принадлежность пользователю проверяется в самом DELETE
+        deleted = await cls.delete_where(
+            session=session,
+            id=post_id,
+            user_id=user_id,
+        )
+        if not deleted:
+            await cls.raise_for_miss(
+                session, post_id, "You can only delete your own posts"
+            )
+        await cls.invalidate_feeds(session, user_id)
+        return True
+
+    @classmethod
+    async def raise_for_miss(
+        cls,
+        session: AsyncSession,
+        post_id: uuid.UUID,
+        forbidden_detail: str
+    ) -> None:
+        """Причина, по которой изменение с проверкой автора не затронуло
+        ни одной строки: поста нет (404) или он чужой (403). Выполняется
+        только в этом редком случае"""
+        found_id = await session.scalar(
+            select(cls.model.id).where(cls.model.id == post_id)
+        )
+        if found_id is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Post not found"
             )
-        if existing_post.user_id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only delete your own posts"
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=forbidden_detail
+        )
+
+    @classmethod
+    async def get_matches_feed(
+        cls,
+        session: AsyncSession,
+        user_id: uuid.UUID,
+        after: Optional[str] = None,
+        limit: int = 20
+    ) -> CursorPagePaginate:
+        """Лента постов всех пользователей, с которыми у user_id мэтч.
+
+        Одним запросом: для каждого автора LATERAL-подзапрос берёт не
+        больше limit + 1 его постов по индексу ленты, после чего потоки
+        сливаются сортировкой по (created_at, id). Объём работы ограничен
+        числом мэтчей * размером страницы и не зависит от числа постов.
+
+        Посты возвращаются словарями колонок, а не ORM-объектами: первая
+        страница кэшируется в feed_cache и не должна быть привязана к
+        сессии запроса.
+        """
+        if after is None:
+            cached = cls.feed_cache.get(user_id)
+            if cached is not None and cached[0] == limit:
+                _, rows, next_cursor = cached
+                return CursorPagePaginate(
+                    values=[dict(row) for row in rows],
+                    page_size=limit,
+                    next_cursor=next_cursor,
+                )
+
+        matches = SwipeDAO.matched_ids_query(user_id).subquery("matches")
+        key_columns = [cls.model.created_at, cls.model.id]
+
+        author_posts = (
+            select(*(getattr(cls.model, name) for name in cls.feed_columns))
+            .where(cls.model.user_id == matches.c.user_id)
+            .order_by(cls.model.created_at.desc(), cls.model.id.desc())
+            .limit(limit + 1)
+        )
+        if after is not None:
+            author_posts = author_posts.where(
+                tuple_(*key_columns)
+                < tuple_(*CursorCodec.decode(after, key_columns))
+            )
+        author_posts = author_posts.lateral("author_posts")
+
+        result = await session.execute(
+            select(author_posts)
+            .select_from(matches)
+            .join(author_posts, true())
+            .order_by(
+                author_posts.c.created_at.desc(), author_posts.c.id.desc()
+            )
+            .limit(limit + 1)
+        )
+        items = [dict(row) for row in result.mappings()]
+        has_more = len(items) > limit
+        items = items[:limit]
+        next_cursor = (
+            CursorCodec.encode([items[-1]["created_at"], items[-1]["id"]])
+            if has_more else None
+        )
+
+        if after is None:
+            cls.feed_cache.set(
+                user_id,
+                (limit, tuple(dict(item) for item in items), next_cursor),
             )
+        return CursorPagePaginate(
+            values=items, page_size=limit, next_cursor=next_cursor
+        )
 
-        await session.execute(
-            delete(cls.model)
-            .where(cls.model.id == post_id)
+    @classmethod
+    def invalidate_feed(
+        cls,
+        session: Optional[AsyncSession],
+        *user_ids: uuid.UUID,
+    ) -> None:
+        """Сбрасывает кэш ленты мэтчей пользователей.
+
+        Если изменение сделано во внешней транзакции, записи удаляются
+        повторно после её коммита: до коммита параллельный запрос мог
+        закэшировать ленту по старым данным.
+        """
+        def invalidate(*_: Any) -> None:
+            for user_id in user_ids:
+                cls.feed_cache.invalidate(user_id)
+
+        invalidate()
+        if session is not None:
+            event.listen(
+                session.sync_session, "after_commit", invalidate, once=True
+            )
+
+    @classmethod
+    async def invalidate_feeds(
+        cls,
+        session: AsyncSession,
+        author_id: uuid.UUID
+    ) -> None:
+        """Сбрасывает кэш лент всех, у кого мэтч с автором постов"""
+        cls.invalidate_feed(
+            session, *await SwipeDAO.get_matched_ids(session, author_id)
         )
-        await session.commit()
-        return True
\ No newline at end of file
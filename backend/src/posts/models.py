@@ -1,8 +1,10 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, String, Text, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    Column, DateTime, FetchedValue, String, Text, ForeignKey, Index, text
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from src.dao.database import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -12,6 +14,43 @@ class Post(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     content = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
-    author = relationship("User", back_populates="posts")
\ No newline at end of file
+    created_at = Column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        server_default=text("(now() AT TIME ZONE 'utc')")
+    )
+    # Время последнего изменения поста: версия для ETag и Last-Modified
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        server_default=text("(now() AT TIME ZONE 'utc')")
+    )
+    # Поисковый вектор по content (полнотекстовый поиск, FullTextSearch);
+    # вычисляется триггером posts_search_vector_update (миграция
+    # 0004_search_indexes) и не загружается вместе с постом
+    search_vector = deferred(Column(
+        TSVECTOR,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    ))
+
+    author = relationship("User", back_populates="posts")
+
+    __table_args__ = (
+        # Лента постов пользователя: WHERE user_id = ...
+        # ORDER BY created_at DESC, id DESC с курсором (created_at, id)
+        Index(
+            "ix_posts_user_id_created_at_id",
+            user_id,
+            created_at.desc(),
+            id.desc()
+        ),
+        Index(
+            "ix_posts_search_vector",
+            "search_vector",
+            postgresql_using="gin"
+        ),
+    )
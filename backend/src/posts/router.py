@@ -1,23 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter, Depends, HTTPException, Query, Request, Response, status
+)
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 
 from src.posts.schemas import PostResponse, PostUpdate, PostBase
 from src.posts.dao import PostDAO
-from src.dao.database import get_db
-from src.users.router import get_current_user
-from src.users.models import User
+from src.dao.database import UnitOfWorkRoute, get_db, get_read_db
+from src.dao.http_cache import (
+    PRIVATE_CACHE_CONTROL, PUBLIC_CACHE_CONTROL, Validators, is_conditional,
+    not_modified, not_modified_response
+)
+from src.dao.serialization import RowSerializer
+from src.users.router import (
+    DEFAULT_CURSOR_PAGE_SIZE,
+    MAX_CURSOR_PAGE_SIZE,
+    get_current_user,
+)
+from src.users.schemas import UserPrincipal
 
-router_post = APIRouter()
+router_post = APIRouter(route_class=UnitOfWorkRoute)
+
+# Списки постов сериализуются из строк (при FAST_SERIALIZATION)
+post_rows = RowSerializer(PostResponse)
+
+# Колонки страницы постов, по которым строятся её версия и курсоры
+POST_VERSION_COLUMNS = ["id", "created_at", "updated_at"]
 
 @router_post.post("/create_post", response_model=PostResponse)
 async def create_new_post(
-    user: User = Depends(get_current_user),
+    user: UserPrincipal = Depends(get_current_user),
     post_data: PostBase = Depends(),
-    session: AsyncSession = Depends(get_db)
+    session: AsyncSession = Depends(get_db, scope="function")
 ) -> PostResponse:
     new_post = await PostDAO.create_post(
         session=session,
@@ -28,7 +45,6 @@ async def create_new_post(
     return PostResponse(
         id=new_post.id,
         user_id=new_post.user_id,
-        title=new_post.title,
         content=new_post.content,
         created_at=new_post.created_at
     )
@@ -36,39 +52,148 @@ async def create_new_post(
 @router_post.get("/get_post/{post_id}", response_model=PostResponse)
 async def get_post(
     post_id: UUID,
-    session: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_db, scope="function")
 ):
-    """Получение конкретного поста по ID"""
+    """Получение конкретного поста по ID.
+
+    Если клиент прислал If-None-Match/If-Modified-Since, сначала
+    выбирается только версия поста: при совпадении - 304 без загрузки.
+    """
+    if is_conditional(request):
+        updated_at = await PostDAO.get_version(session=session, id=post_id)
+        if updated_at is not None:
+            validators = Validators.of_row(post_id, updated_at)
+            if not_modified(request, validators):
+                return not_modified_response(
+                    validators.headers(PUBLIC_CACHE_CONTROL)
+                )
+
     post = await PostDAO.get_post(session, post_id)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
+    response.headers.update(
+        Validators.of_row(post.id, post.updated_at).headers(
+            PUBLIC_CACHE_CONTROL
+        )
+    )
     return post
 
+@router_post.get("/search", response_model=List[PostResponse])
+async def search_posts(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(DEFAULT_CURSOR_PAGE_SIZE, ge=1, le=MAX_CURSOR_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_db, scope="function")
+):
+    """Поиск постов по тексту, наиболее релевантные - первыми"""
+    result = await PostDAO.search_posts(
+        session, q, page=page, page_size=page_size,
+        columns=post_rows.columns,
+    )
+    response.headers.update(result.headers())
+    return post_rows.respond(result.values, result.headers())
+
+async def user_posts_page(
+    request: Request,
+    response: Response,
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    after: Optional[str],
+    before: Optional[str],
+    limit: int,
+    cache_control: str,
+):
+    """Страница ленты постов пользователя с ETag.
+
+    Версия страницы - id и updated_at её постов и курсоры соседних
+    страниц. Для условного запроса сначала выбираются только эти
+    колонки: если версия совпала, посты не загружаются (304).
+    """
+    if is_conditional(request):
+        probe = await PostDAO.get_user_posts(
+            session, user_id, after=after, before=before, limit=limit,
+            columns=POST_VERSION_COLUMNS,
+        )
+        validators = Validators.of_rows(
+            probe.values, probe.next_cursor, probe.prev_cursor
+        )
+        if not_modified(request, validators):
+            return not_modified_response(
+                {**probe.headers(), **validators.headers(cache_control)}
+            )
+
+    page = await PostDAO.get_user_posts(
+        session, user_id, after=after, before=before, limit=limit,
+        columns=post_rows.select_columns("updated_at"),
+    )
+    headers = {
+        **page.headers(),
+        **Validators.of_rows(
+            page.values, page.next_cursor, page.prev_cursor
+        ).headers(cache_control),
+    }
+    response.headers.update(headers)
+    return post_rows.respond(page.values, headers)
+
 @router_post.get("/user/me", response_model=List[PostResponse])
 async def get_my_posts(
-    user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = Query(DEFAULT_CURSOR_PAGE_SIZE, ge=1, le=MAX_CURSOR_PAGE_SIZE),
+    user: UserPrincipal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_db, scope="function")
 ):
-    """Получение всех постов текущего пользователя"""
-    return await PostDAO.get_user_posts(session=session, user_id=user.id)
+    """Лента постов текущего пользователя (курсоры - в заголовках ответа)"""
+    return await user_posts_page(
+        request, response, session, user.id, after, before, limit,
+        PRIVATE_CACHE_CONTROL,
+    )
 
 @router_post.get("/user/{user_id}", response_model=List[PostResponse])
 async def get_user_posts(
     user_id: uuid.UUID,
-    session: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = Query(DEFAULT_CURSOR_PAGE_SIZE, ge=1, le=MAX_CURSOR_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_db, scope="function")
 ):
-    """Получение всех постов указанного пользователя"""
-    return await PostDAO.get_user_posts(session, user_id)
+    """Лента постов указанного пользователя (курсоры - в заголовках ответа)"""
+    return await user_posts_page(
+        request, response, session, user_id, after, before, limit,
+        PUBLIC_CACHE_CONTROL,
+    )
+
+@router_post.get("/feed/matches", response_model=List[PostResponse])
+async def get_matches_feed(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_CURSOR_PAGE_SIZE, ge=1, le=MAX_CURSOR_PAGE_SIZE),
+    user: UserPrincipal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_db, scope="function")
+):
+    """Лента постов пользователей, с которыми у текущего пользователя мэтч"""
+    page = await PostDAO.get_matches_feed(
+        session, user.id, after=after, limit=limit
+    )
+    response.headers.update(page.headers())
+    return page.values
 
 @router_post.put("/post_update/{post_id}", response_model=PostResponse)
 async def update_post(
     post_id: UUID,
     post_data: PostUpdate,
-    user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
+    user: UserPrincipal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db, scope="function")
 ):
     """Обновление поста"""
     updated_post = await PostDAO.update_post(
@@ -87,8 +212,8 @@ async def update_post(
 @router_post.delete("/post_delete/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_post(
     post_id: UUID,
-    user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
+    user: UserPrincipal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db, scope="function")
 ):
     """Удаление поста"""
     if not await PostDAO.delete_post(session=session, post_id=post_id, user_id=user.id):
@@ -0,0 +1,142 @@
+from typing import Dict, List
+from uuid import UUID
+
+from sqlalchemy import Select, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from ..dao.base import BaseDAO
+from ..users.models import Swipe
+from ..users.schemas import SwipeAction
+
+
+class SwipeDAO(BaseDAO[Swipe]):
+    model = Swipe
+
+    @classmethod
+    async def add_swipe(
+        cls,
+        session: AsyncSession,
+        user_id: UUID,
+        target_user_id: UUID,
+        action: str
+    ) -> tuple[bool, bool]:
+        """
+        Сохраняет свайп и проверяет на мэтч.
+
+        Параметры:
+            session - асинхронная сессия SQLAlchemy
+            user_id - ID пользователя, который совершает свайп
+            target_user_id - ID пользователя, которого свайпают
+            action - тип действия ('like' или 'dislike')
+
+        Возвращает:
+            Кортеж (is_updated: bool, is_match: bool)
+        """
+        results = await cls.add_swipes(
+            session=session,
+            user_id=user_id,
+            actions={target_user_id: action},
+        )
+        return results[target_user_id]
+
+    @classmethod
+    async def add_swipes(
+        cls,
+        session: AsyncSession,
+        user_id: UUID,
+        actions: Dict[UUID, str]
+    ) -> Dict[UUID, tuple[bool, bool]]:
+        """
+        Сохраняет пачку свайпов одного пользователя и проверяет мэтчи.
+
+        Свайпы записываются одним многострочным INSERT ... ON CONFLICT:
+        повторный свайп с тем же действием ничего не меняет, смена
+        действия перезаписывает строку. Мэтчи для новых лайков
+        определяются одним запросом встречных лайков.
+
+        Параметры:
+            session - асинхронная сессия SQLAlchemy
+            user_id - ID пользователя, который совершает свайпы
+            actions - словарь {ID целевого пользователя: действие}
+
+        Возвращает:
+            Словарь {ID целевого пользователя: (is_updated, is_match)}
+        """
+        if not actions:
+            return {}
+
+        changed = await cls.create_many(
+            session=session,
+            values=[
+                {
+                    "swiper_id": user_id,
+                    "target_id": target_user_id,
+                    "action": action.lower(),
+                }
+                for target_user_id, action in actions.items()
+            ],
+            conflict_fields=["swiper_id", "target_id"],
+            update_fields=["action"],
+        )
+        updated_ids = {swipe.target_id for swipe in changed}
+        new_like_ids = [
+            swipe.target_id
+            for swipe in changed
+            if swipe.action == SwipeAction.LIKE.value
+        ]
+
+        matched_ids = set()
+        if new_like_ids:
+            result = await session.execute(
+                select(cls.model.swiper_id).where(
+                    and_(
+                        cls.model.swiper_id.in_(new_like_ids),
+                        cls.model.target_id == user_id,
+                        cls.model.action == SwipeAction.LIKE.value,
+                    )
+                )
+            )
+            matched_ids = set(result.scalars().all())
+
+        return {
+            target_user_id: (
+                target_user_id in updated_ids,
+                target_user_id in matched_ids,
+            )
+            for target_user_id in actions
+        }
+
+    @classmethod
+    def matched_ids_query(cls, user_id: UUID) -> Select:
+        """Запрос id пользователей, с которыми у user_id есть мэтч.
+
+        Мэтч - взаимный лайк; встречный свайп ищется по первичному ключу.
+        """
+        liked = aliased(cls.model)
+        liked_back = aliased(cls.model)
+        return (
+            select(liked.target_id.label("user_id"))
+            .join(
+                liked_back,
+                and_(
+                    liked_back.swiper_id == liked.target_id,
+                    liked_back.target_id == liked.swiper_id,
+                    liked_back.action == SwipeAction.LIKE.value,
+                ),
+            )
+            .where(
+                liked.swiper_id == user_id,
+                liked.action == SwipeAction.LIKE.value,
+            )
+        )
+
+    @classmethod
+    async def get_matched_ids(
+        cls,
+        session: AsyncSession,
+        user_id: UUID
+    ) -> List[UUID]:
+        """Возвращает id пользователей, с которыми у user_id есть мэтч"""
+        result = await session.execute(cls.matched_ids_query(user_id))
+        return list(result.scalars().all())
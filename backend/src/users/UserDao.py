@@ -1,52 +1,146 @@
-from typing import Dict, List, Unpack, Any
+from typing import Dict, List, Optional, Union, Unpack, Any
 import uuid
-from fastapi import HTTPException
+from sqlalchemy import event, inspect, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, raiseload, selectinload
 from ..dao.base import BaseDAO
+from ..dao.cache import TTLCache
+from ..dao.database import db_router
+from ..dao.error_handler import DatabaseErrorHandler, UniqueConflict
+from ..dao.search import TrigramSearch, search_backend
 from ..users.models import User
-from ..users.schemas import UserCreate
-from passlib.context import CryptContext # импортируется pwd_context
-from uuid import UUID
+from ..users.schemas import UserCreate, UserPrincipal
+from ..users.hashing import password_hasher
 
 class UserDAO(BaseDAO[User]):
     model = User
 
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    load_profiles = {
+        # Профиль без постов
+        "slim": [raiseload(User.posts)],
+        # Поля публичного профиля (UserProfileResponse), без пароля и постов
+        "public": [
+            load_only(
+                User.id, User.name, User.email, User.tg_id,
+                User.birth_date, User.city, User.about,
+            ),
+            raiseload(User.posts),
+        ],
+        "with_posts": [selectinload(User.posts)],
+        # Только то, что нужно для проверки пароля
+        "auth": [
+            load_only(User.id, User.tg_id, User.password),
+            raiseload(User.posts),
+        ],
+    }
+
+    # ILIKE по name/city/about обслуживается GIN-индексами pg_trgm
+    search_backend = search_backend(TrigramSearch())
+
+    password_hasher = password_hasher
+
+    # Кэш аутентифицированных пользователей по id (sub из JWT)
+    principal_cache = TTLCache(maxsize=10_000, ttl=60.0)
+
+    # Тексты ошибок о занятых значениях уникальных полей
+    conflict_messages = {
+        "email": "Пользователь с таким email уже существует",
+        "tg_id": "Пользователь с таким tg_id уже существует",
+    }
+
+    # Недавно занятые email и tg_id: повторная регистрация с ними
+    # (двойная отправка формы, перебор) отклоняется без запроса к базе и
+    # без bcrypt. Кэш свой у каждого процесса и приблизителен: промах
+    # просто ведёт к вставке, где уникальность проверяет сама база;
+    # освобождённое значение (смена email) может отклоняться до ttl секунд
+    taken_keys = TTLCache(maxsize=100_000, ttl=30.0)
+
+    @classmethod
+    def remember_taken(
+        cls,
+        session: Optional[AsyncSession],
+        field: str,
+        value: Any,
+        conflict: bool = False,
+    ) -> None:
+        """Запоминает занятое значение, когда завершится транзакция сессии.
+
+        Значение, вставленное в транзакции, запоминается только после её
+        коммита: при откате оно не сохранено. Конфликт (conflict=True)
+        запоминается и после отката, которым завершается ошибочный
+        запрос: уникальный индекс сообщает о конфликте, только дождавшись
+        коммита конкурирующей вставки, поэтому занявшая значение строка
+        уже сохранена.
+        """
+        def remember(*_: Any) -> None:
+            cls.taken_keys.set((field, value), True)
+
+        if session is None:
+            remember()
+            return
+        events = ["after_commit"]
+        if conflict:
+            events.append("after_soft_rollback")
+        for name in events:
+            event.listen(session.sync_session, name, remember, once=True)
+
+    @classmethod
+    def forget_taken(cls, user: User) -> None:
+        """Освобождает значения удалённого пользователя (только
+        загруженные атрибуты - без ленивой загрузки)"""
+        loaded = inspect(user).dict
+        for field in cls.conflict_messages:
+            if field in loaded:
+                cls.taken_keys.invalidate((field, loaded[field]))
 
     @classmethod
     async def registration(cls, session: AsyncSession, user: UserCreate) -> User:
-        # Проверка уникальности пользователя через пагинацию
-        page_result = await cls.paginate(
-            session=session,
-            page=1,
-            page_size=1,
-            email=user.email,
-            tg_id=user.tg_id
-        )
-        if page_result.total > 0:
-            raise HTTPException(
-                status_code=400,
-                detail="Пользователь с такими данными уже существует"
-            )
-        password = cls.pwd_context.hash(user.password)
+        """Регистрация одним запросом INSERT ... ON CONFLICT (tg_id)
+        DO NOTHING RETURNING.
 
+        Уникальность проверяет сама вставка, без предварительного SELECT
+        (и без гонки между ним и INSERT): занятый tg_id даёт пустой
+        RETURNING, занятый email - ошибку уникального индекса, которую
+        DatabaseErrorHandler сопоставляет с полем по имени индекса.
+        """
         user_data = user.dict(
             exclude_unset=True
         )
+        for field in cls.conflict_messages:
+            if cls.taken_keys.get((field, user_data.get(field))):
+                raise DatabaseErrorHandler.conflict(cls, field)
+
         user_data["id"] = uuid.uuid4()
-        user_data["password"] = password
+        user_data["password"] = await cls.password_hasher.hash(user.password)
 
-        new_user = await cls.create(
-            session=session,
-            **user_data
-        )
+        try:
+            created = await cls.create_many(
+                session=session,
+                values=[user_data],
+                conflict_fields=["tg_id"],
+            )
+        except UniqueConflict as conflict:
+            cls.remember_taken(
+                session, conflict.field, user_data[conflict.field],
+                conflict=True,
+            )
+            raise
+        if not created:
+            cls.remember_taken(
+                session, "tg_id", user_data["tg_id"], conflict=True
+            )
+            raise DatabaseErrorHandler.conflict(cls, "tg_id")
 
+        new_user = created[0]
+        for field in cls.conflict_messages:
+            cls.remember_taken(session, field, user_data[field])
         return new_user
-    
+
     @classmethod
     async def get_all_users(
         cls,
         session: AsyncSession,
+        load: Optional[str] = None,
         **filters: Unpack[Dict[str, Any]]
     ) -> List[User]:
         """Получить всех пользователей (без пагинации)"""
@@ -54,79 +148,129 @@ class UserDAO(BaseDAO[User]):
             session=session,
             page=1,
             page_size=-1,  # -1 означает "все записи"
+            load=load,
             **filters
         )
         return page_result.values
-    
+
     @classmethod
-    async def add_swipe(
+    async def get_principal(
         cls,
-        session: AsyncSession,
-        user_id: UUID,
-        target_user_id: UUID,
-        action: str
-    ) -> tuple[bool, bool]:
+        session: Optional[AsyncSession],
+        id: uuid.UUID,  # noqa
+    ) -> Optional[UserPrincipal]:
+        """Получает снимок пользователя для аутентификации.
+
+        Снимок берётся из principal_cache, при промахе загружаются
+        только колонки профиля (без постов). Без session при промахе
+        открывается короткая сессия чтения на primary (только что
+        зарегистрированный пользователь может ещё не дойти до реплики):
+        её соединение возвращается в пул до того, как обработчик
+        запроса обратится к базе, а чтения обработчика по-прежнему
+        могут идти на реплику.
         """
-        Добавляет информацию о свайпе и проверяет на мэтч.
-    
-        Параметры:
-            session - асинхронная сессия SQLAlchemy
-            user_id - ID пользователя, который совершает свайп
-            target_user_id - ID пользователя, которого свайпают
-            action - тип действия ('like' или 'dislike')
-    
-        Возвращает:
-            Кортеж (is_updated: bool, is_match: bool)
+        principal = cls.principal_cache.get(id)
+        if principal is not None:
+            return principal
+        if session is None:
+            async with db_router.session(
+                read_only=True, allow_replica=False
+            ) as session:
+                return await cls._load_principal(session, id)
+        return await cls._load_principal(session, id)
+
+    @classmethod
+    async def _load_principal(
+        cls,
+        session: AsyncSession,
+        id: uuid.UUID,  # noqa
+    ) -> Optional[UserPrincipal]:
+        result = await session.execute(
+            select(
+                *(getattr(cls.model, field)
+                  for field in UserPrincipal.model_fields)
+            ).where(cls.model.id == id)
+        )
+        row = result.mappings().one_or_none()
+        if row is None:
+            return None
+        principal = UserPrincipal(**row)
+        cls.principal_cache.set(id, principal)
+        return principal
+
+    @classmethod
+    def invalidate_principal(
+        cls,
+        session: Optional[AsyncSession],
+        id: Union[uuid.UUID, str],  # noqa
+    ) -> None:
+        """Удаляет пользователя из principal_cache.
+
+        Если изменение сделано во внешней транзакции, запись удаляется
+        повторно после её коммита: до коммита параллельный запрос мог
+        закэшировать старую версию.
         """
-        # Получаем текущего пользователя и целевого пользователя
-        current_user = await cls.get(
-            session=session, 
-            id=user_id
+        user_id = id if isinstance(id, uuid.UUID) else uuid.UUID(str(id))
+        cls.principal_cache.invalidate(user_id)
+        if session is not None:
+            event.listen(
+                session.sync_session,
+                "after_commit",
+                lambda _: cls.principal_cache.invalidate(user_id),
+                once=True,
+            )
+
+    @classmethod
+    async def update(
+        cls,
+        *args: Any,
+        id: Union[uuid.UUID, str],  # noqa
+        session: Optional[AsyncSession] = None,
+        **kwargs: Any,
+    ) -> Optional[User]:
+        result = await super().update(*args, id=id, session=session, **kwargs)
+        cls.invalidate_principal(session, id)
+        return result
+
+    @classmethod
+    async def delete(
+        cls,
+        *args: Any,
+        id: Union[uuid.UUID, str],  # noqa
+        session: Optional[AsyncSession] = None,
+        **kwargs: Any,
+    ) -> Optional[User]:
+        result = await super().delete(*args, id=id, session=session, **kwargs)
+        cls.invalidate_principal(session, id)
+        if result is not None:
+            cls.forget_taken(result)
+        return result
+
+    @classmethod
+    async def update_many(
+        cls,
+        *args: Any,
+        values: List[Dict[str, Any]],
+        session: Optional[AsyncSession] = None,
+        **kwargs: Any,
+    ) -> None:
+        await super().update_many(
+            *args, values=values, session=session, **kwargs
         )
-        target_user = await cls.get(
-            session=session, 
-            id=target_user_id
+        for item in values:
+            cls.invalidate_principal(session, item["id"])
+
+    @classmethod
+    async def delete_many(
+        cls,
+        *args: Any,
+        ids: List[Union[uuid.UUID, str]],
+        session: Optional[AsyncSession] = None,
+        **kwargs: Any,
+    ) -> List[Any]:
+        result = await super().delete_many(
+            *args, ids=ids, session=session, **kwargs
         )
-        
-        if not current_user or not target_user:
-            raise ValueError("User not found")
-
-        is_updated = False
-        is_match = False
-        target_id_str = str(target_user_id).lower()
-        user_id_str = str(user_id).lower()
-
-        if action.lower() == "like":
-            liked_users = list(current_user.liked_users) if current_user.liked_users else []
-            
-            if target_id_str not in liked_users:
-                liked_users.append(target_id_str)
-                await cls.update(
-                    session=session,
-                    id=user_id,
-                    liked_users=liked_users
-                )
-                is_updated = True
-
-                target_liked = list(target_user.liked_users) if target_user.liked_users else []
-                if user_id_str in target_liked:
-                    current_matched = list(current_user.matched_users) if current_user.matched_users else []
-                    target_matched = list(target_user.matched_users) if target_user.matched_users else []
-                    
-                    current_matched.append(target_id_str)
-                    target_matched.append(user_id_str)
-                    
-                    await cls.update(
-                        session=session,
-                        id=user_id,
-                        matched_users=current_matched
-                    )
-                    await cls.update(
-                        session=session,
-                        id=target_user_id,
-                        matched_users=target_matched
-                    )
-                    is_match = True
-    
-        return (is_updated, is_match)
-    
\ No newline at end of file
+        for user_id in ids:
+            cls.invalidate_principal(session, user_id)
+        return result
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Deque, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import and_, event, exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.dao.database import db_router
+from src.users.models import Swipe, User
+
+logger = logging.getLogger(__name__)
+
+
+class _UserDeck:
+    """Состояние колоды кандидатов одного пользователя"""
+
+    def __init__(self):
+        self.queue: Deque[UUID] = deque()
+        self.members: Set[UUID] = set()
+        # Обход таблицы users начинается со случайной точки и идёт по
+        # первичному ключу до конца, а затем с начала до этой точки
+        self.pivot: UUID = uuid.uuid4()
+        self.scan_after: Optional[UUID] = self.pivot
+        self.wrapped: bool = False
+        self.found_in_cycle: int = 0
+        self.exhausted_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+        # Кандидаты, просвайпанные во время пополнения: его запрос мог
+        # выполниться до коммита свайпа, и они не должны вернуться в колоду
+        self.swiped_during_refill: Set[UUID] = set()
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+
+class CandidateDeck:
+    """Предвычисленные колоды кандидатов для ленты профилей.
+
+    Для каждого пользователя хранится ограниченная очередь id ещё не
+    просвайпанных им пользователей. Очередь пополняется пачками по
+    первичному ключу (range scan + anti-join по swipes) начиная со
+    случайной точки, без ORDER BY random() и без подсчёта строк, поэтому
+    выдача следующих N кандидатов стоит O(N) независимо от размера таблицы.
+    Когда в очереди остаётся меньше low_watermark кандидатов, пополнение
+    запускается в фоне.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 200,
+        low_watermark: int = 50,
+        batch_size: int = 200,
+        max_users: int = 10_000,
+        exhausted_cooldown: float = 60.0,
+    ):
+        self.capacity = capacity
+        self.low_watermark = low_watermark
+        self.batch_size = batch_size
+        self.max_users = max_users
+        self.exhausted_cooldown = exhausted_cooldown
+        self._decks: "OrderedDict[UUID, _UserDeck]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _get_deck(self, user_id: UUID) -> _UserDeck:
+        deck = self._decks.get(user_id)
+        if deck is None:
+            deck = self._decks[user_id] = _UserDeck()
+            while len(self._decks) > self.max_users:
+                self._decks.popitem(last=False)
+        self._decks.move_to_end(user_id)
+        return deck
+
+    async def take(
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        count: int
+    ) -> List[UUID]:
+        """Возвращает id следующих count кандидатов для пользователя.
+
+        Если кандидатов в колоде меньше count (например, первый запрос),
+        она заполняется синхронно в переданной сессии.
+        """
+        deck = self._get_deck(user_id)
+        if len(deck) < count:
+            await self._refill(session, user_id, deck)
+
+        candidates = []
+        while deck.queue and len(candidates) < count:
+            candidate_id = deck.queue.popleft()
+            # Просвайпанные кандидаты удаляются из members лениво
+            if candidate_id in deck.members:
+                deck.members.discard(candidate_id)
+                candidates.append(candidate_id)
+
+        if len(deck) < self.low_watermark:
+            self._schedule_refill(user_id, deck)
+        return candidates
+
+    def discard(
+        self,
+        session: Optional[AsyncSession],
+        user_id: UUID,
+        target_user_id: UUID,
+    ) -> None:
+        """Убирает просвайпанного кандидата из колоды пользователя.
+
+        Если свайп сделан во внешней транзакции, кандидат убирается после
+        её коммита: пополнение, начатое раньше, не видит свайп и вернуло
+        бы кандидата в колоду.
+        """
+        def discard(*_: Any) -> None:
+            deck = self._decks.get(user_id)
+            if deck is None:
+                return
+            deck.members.discard(target_user_id)
+            if deck.lock.locked():
+                deck.swiped_during_refill.add(target_user_id)
+
+        if session is None:
+            discard()
+        else:
+            event.listen(
+                session.sync_session, "after_commit", discard, once=True
+            )
+
+    def _schedule_refill(self, user_id: UUID, deck: _UserDeck) -> None:
+        if deck.lock.locked():
+            return
+        task = asyncio.create_task(self._background_refill(user_id, deck))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _background_refill(self, user_id: UUID, deck: _UserDeck) -> None:
+        # Отдельная сессия чтения: на реплике (кроме клиента, только что
+        # изменявшего данные) и в транзакции только для чтения
+        session = db_router.session(read_only=True)
+        try:
+            session = await db_router.connect(session)
+            async with session:
+                await self._refill(session, user_id, deck)
+        except Exception as error:
+            # Недоступная реплика исключается из выбора
+            await db_router.fail_over(session, error)
+            logger.exception("Не удалось пополнить колоду %s", user_id)
+
+    async def _refill(
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        deck: _UserDeck
+    ) -> None:
+        async with deck.lock:
+            try:
+                await self._refill_locked(session, user_id, deck)
+            finally:
+                deck.swiped_during_refill.clear()
+
+    async def _refill_locked(
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        deck: _UserDeck
+    ) -> None:
+        if (
+            deck.exhausted_at is not None
+            and time.monotonic() - deck.exhausted_at
+            < self.exhausted_cooldown
+        ):
+            return
+
+        # Не больше двух пачек: хвост обхода и переход через начало
+        for _ in range(2):
+            if len(deck) >= self.capacity:
+                return
+            limit = min(self.batch_size, self.capacity - len(deck))
+            candidate_ids = await self._fetch_batch(
+                session, user_id, deck, limit
+            )
+            for candidate_id in candidate_ids:
+                if (
+                    candidate_id not in deck.members
+                    and candidate_id not in deck.swiped_during_refill
+                ):
+                    deck.members.add(candidate_id)
+                    deck.queue.append(candidate_id)
+            deck.found_in_cycle += len(candidate_ids)
+            if candidate_ids:
+                deck.exhausted_at = None
+
+            if len(candidate_ids) == limit:
+                deck.scan_after = candidate_ids[-1]
+                return
+            self._advance_scan(deck)
+            if deck.exhausted_at is not None:
+                return
+
+    def _advance_scan(self, deck: _UserDeck) -> None:
+        """Переход к следующему участку обхода после неполной пачки"""
+        if not deck.wrapped:
+            deck.wrapped = True
+            deck.scan_after = None
+            return
+
+        # Круг пройден: начинаем новый со случайной точки. Если за круг
+        # не нашлось ни одного кандидата, пополнение откладывается
+        if deck.found_in_cycle == 0:
+            deck.exhausted_at = time.monotonic()
+        else:
+            deck.exhausted_at = None
+        deck.pivot = uuid.uuid4()
+        deck.scan_after = deck.pivot
+        deck.wrapped = False
+        deck.found_in_cycle = 0
+
+    async def _fetch_batch(
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        deck: _UserDeck,
+        limit: int
+    ) -> List[UUID]:
+        conditions = [
+            User.id != user_id,
+            ~exists().where(
+                and_(
+                    Swipe.swiper_id == user_id,
+                    Swipe.target_id == User.id,
+                )
+            ),
+        ]
+        if deck.scan_after is not None:
+            conditions.append(User.id > deck.scan_after)
+        if deck.wrapped:
+            conditions.append(User.id <= deck.pivot)
+
+        result = await session.execute(
+            select(User.id)
+            .where(and_(*conditions))
+            .order_by(User.id)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+
+candidate_deck = CandidateDeck()
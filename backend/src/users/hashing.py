@@ -0,0 +1,199 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from passlib.context import CryptContext
+
+
+class PasswordHasher:
+    """Хэширование и проверка паролей вне event loop.
+
+    bcrypt выполняется в отдельном пуле потоков (bcrypt освобождает GIL
+    на время вычисления), поэтому вызовы не блокируют обработку остальных
+    запросов. Число одновременных вычислений ограничено семафором,
+    остальные вызовы ждут в очереди; её глубина доступна через stats().
+    """
+
+    def __init__(
+        self,
+        context: CryptContext,
+        max_workers: int,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="password-hasher",
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.max_waiting = 0
+        self.wait_time_total = 0.0
+        self.run_time_total = 0.0
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        started = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        acquired = time.perf_counter()
+        self.wait_time_total += acquired - started
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, partial(func, *args)
+            )
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.run_time_total += time.perf_counter() - acquired
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """Хэширует пароль текущей схемой контекста"""
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Проверяет пароль по хэшу"""
+        return await self._run(self.context.verify, password, hashed)
+
+    async def verify_and_update(
+        self,
+        password: str,
+        hashed: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Проверяет пароль и, если параметры хэша устарели
+        (deprecated="auto"), возвращает новый хэш для сохранения.
+
+        Возвращает:
+            Кортеж (верен ли пароль, новый хэш или None)
+        """
+        return await self._run(
+            self.context.verify_and_update, password, hashed
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики пула: глубина очереди, занятые слоты, время ожидания"""
+        return {
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "wait_time_total": self.wait_time_total,
+            "run_time_total": self.run_time_total,
+        }
+
+
+@lru_cache(maxsize=4)
+def _worker_context(config: str) -> CryptContext:
+    return CryptContext.from_string(config)
+
+
+def _hash_many(config: str, passwords: Sequence[str]) -> List[str]:
+    """Хэширует пачку паролей (выполняется в процессе пула)"""
+    context = _worker_context(config)
+    return [context.hash(password) for password in passwords]
+
+
+class ProcessPasswordHasher:
+    """Хэширование большого числа паролей в пуле процессов
+    (массовый импорт пользователей).
+
+    Пароли делятся на пачки по chunk_size, пачки хэшируются параллельно
+    в processes процессах. Процессы запускаются методом spawn (без fork
+    процесса с работающим event loop и открытыми соединениями) и
+    завершаются при выходе из async with.
+
+    Пример:
+        async with ProcessPasswordHasher(password_hasher.context) as hasher:
+            hashed = await hasher.hash_many(passwords)
+    """
+
+    def __init__(
+        self,
+        context: CryptContext,
+        processes: Optional[int] = None,
+        chunk_size: int = 64,
+    ):
+        self.config = context.to_string()
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.hashed = 0
+        self.run_time_total = 0.0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def __aenter__(self) -> "ProcessPasswordHasher":
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, partial(executor.shutdown, cancel_futures=True)
+            )
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """Хэширует пароли, сохраняя их порядок"""
+        if self._executor is None:
+            raise RuntimeError("ProcessPasswordHasher is not started")
+        if not passwords:
+            return []
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(
+                self._executor,
+                _hash_many,
+                self.config,
+                passwords[offset:offset + self.chunk_size],
+            )
+            for offset in range(0, len(passwords), self.chunk_size)
+        ))
+        self.hashed += len(passwords)
+        self.run_time_total += time.perf_counter() - started
+        return [hashed for chunk in chunks for hashed in chunk]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "processes": self.processes,
+            "hashed": self.hashed,
+            "run_time_total": self.run_time_total,
+        }
+
+
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+PASSWORD_HASH_CONCURRENCY = int(
+    os.getenv("PASSWORD_HASH_CONCURRENCY", str(PASSWORD_HASH_WORKERS))
+)
+
+password_hasher = PasswordHasher(
+    CryptContext(schemes=["bcrypt"], deprecated="auto"),
+    max_workers=PASSWORD_HASH_WORKERS,
+    max_concurrency=PASSWORD_HASH_CONCURRENCY,
+)
+
+# Число процессов для массового хэширования (импорт пользователей)
+BULK_HASH_PROCESSES = int(
+    os.getenv("BULK_HASH_PROCESSES", str(os.cpu_count() or 1))
+)
@@ -1,7 +1,11 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
+from datetime import datetime
+from sqlalchemy import (
+    CheckConstraint, Column, Integer, String, Date, DateTime, ForeignKey, Index,
+    text
+)
 from sqlalchemy.orm import relationship
 import uuid
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID
 from ..dao.database import Base
 
 class User(Base):
@@ -22,11 +26,54 @@ class User(Base):
     birth_date = Column(Date, nullable=False)
     city = Column(String, nullable=False)
     about = Column(String, nullable=True)
-    liked_users = Column(JSONB, nullable=False, default=list)
-    matched_users = Column(JSONB, nullable=False, default=list)
+    # Время последнего изменения строки: версия профиля для ETag и
+    # Last-Modified (src.dao.http_cache)
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        server_default=text("(now() AT TIME ZONE 'utc')")
+    )
     posts = relationship(
         "Post", 
         back_populates="author",
         cascade="all, delete-orphan",  # автоматическое удаление постов при удалении пользователя
-        lazy="selectin"
+        lazy="raise"  # посты загружаются только явно, профилем "with_posts"
+    )
+
+
+class Swipe(Base):
+    """Свайп пользователя swiper_id по пользователю target_id.
+
+    Мэтч - это пара взаимных свайпов с action = 'like', отдельно
+    мэтчи не хранятся.
+    """
+    __tablename__ = "swipes"
+
+    swiper_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    target_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True
     )
+    action = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        CheckConstraint(
+            "action IN ('like', 'dislike')",
+            name="ck_swipes_action"
+        ),
+        # Поиск входящих лайков ("кто лайкнул пользователя")
+        Index("ix_swipes_target_id_action", "target_id", "action"),
+    )
+
+
+# Post должен быть зарегистрирован до настройки мапперов: профили загрузки
+# UserDAO обращаются к User.posts уже при импорте
+from ..posts.models import Post  # noqa: E402,F401
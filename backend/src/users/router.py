@@ -1,18 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter, Depends, HTTPException, Query, Request, Response, status
+)
 from sqlalchemy.ext.asyncio import AsyncSession  # Используем асинхронную сессию
-from src.users.schemas import UserCreate, UserLogin, UserProfileResponse, SwipeCreate
-from src.dao.database import get_db
+from src.users.schemas import (
+    UserCreate, UserLogin, UserProfileResponse, UserPrincipal, SwipeCreate,
+    SwipeBatchCreate, SwipeAction
+)
+from src.dao.database import (
+    UnitOfWorkRoute, get_db, get_read_db
+)
 
 from src.users.models import User
 from sqlalchemy.future import select
-from typing import Dict, Any
-from passlib.context import CryptContext
+from typing import Dict, Any, Optional
 
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 import os
+import uuid
 import jwt
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from src.users.UserDao import UserDAO
+from src.users.SwipeDao import SwipeDAO
+from src.users.deck import candidate_deck
+from src.users.hashing import password_hasher
+from src.posts.dao import PostDAO
+from src.dao.http_cache import (
+    PRIVATE_CACHE_CONTROL, Validators, not_modified, not_modified_response
+)
+from src.dao.serialization import RowSerializer
+from src.dao.shemas import TotalMode
 from jwt import PyJWTError
 
 #JWT токен
@@ -21,11 +37,27 @@ SECRET_KEY = os.environ.get("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Размеры страниц для курсорной пагинации списков
+DEFAULT_CURSOR_PAGE_SIZE = 20
+MAX_CURSOR_PAGE_SIZE = 100
+DEFAULT_USERS_PAGE_SIZE = 50
+# Поля, по которым ищет параметр q в /users (индексы pg_trgm)
+USER_SEARCH_FIELDS = ["name", "city", "about"]
+
+# Списки профилей сериализуются из строк (при FAST_SERIALIZATION)
+profile_rows = RowSerializer(UserProfileResponse)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth")
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
+
+# Дата рождения человека, которому сегодня исполняется years лет
+def years_ago(years: int) -> date:
+    today = date.today()
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:  # 29 февраля
+        return today.replace(year=today.year - years, day=28)
 
 # Функция для создания JWT токена
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
@@ -37,10 +69,24 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+# Проверка пароля с прозрачным перехэшированием устаревших хэшей
+async def verify_password(db: AsyncSession, user: User, password: str) -> bool:
+    is_valid, new_hash = await password_hasher.verify_and_update(
+        password, user.password
+    )
+    if is_valid and new_hash is not None:
+        await UserDAO.update(
+            session=db,
+            id=user.id,
+            returning=False,
+            password=new_hash
+        )
+    return is_valid
+
 @router.post("/register")
 async def register_user(
     user: UserCreate, 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db, scope="function")
 ):  # Используем AsyncSession
     # Создание нового пользователя
     new_user = await UserDAO.registration(
@@ -53,45 +99,11 @@ async def register_user(
     }
 
 
-#Возможно ненужная
-import random
-@router.get("/get_many_profiles", response_model=Dict[str, Any])
-async def get_random_profiles(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
-    page_size = 10
-    page = 1 
-
-    result = await UserDAO.paginate(
-        session=db,
-        page=page,
-        page_size=page_size,
-    )
-
-    if not result.values:
-        return {"profiles": []}  # Возвращаем пустой массив, если профилей нет
-
-    # Перемешиваем профили случайным образом
-    random.shuffle(result.values)
-
-    return {
-        "profiles": [
-            {
-                "profile_id": profile.id,
-                "name": profile.name,
-                "email": profile.email,
-                "birth_date": profile.birth_date,
-                "city": profile.city,
-                "about": profile.about,
-                "tg_id": profile.tg_id,
-            }
-            for profile in result.values
-        ]
-    }
-
 #Возможно ненужная
 @router.post("/login", response_model=Dict[str, Any])
 async def login_user(
     login_data: UserLogin,  # Принимаем словарь с tg_id и password
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db, scope="function")
 ) -> Dict[str, Any]:
     # Ищем пользователя по tg_id
     result = await db.execute(
@@ -104,7 +116,7 @@ async def login_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User with this Telegram ID not found"
         )
-    if not pwd_context.verify(login_data.password, user.password):
+    if not await verify_password(db, user, login_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password"
@@ -125,14 +137,19 @@ async def login_user(
 @router.post("/auth", response_model=dict)
 async def authenticate_user(
         form_data: OAuth2PasswordRequestForm = Depends(),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_db, scope="function")
 ):
-    user = (await UserDAO.paginate(
+    users = (await UserDAO.paginate(
+        session=db,
+        page_size=1,
+        total_mode=TotalMode.NONE,
+        load="auth",
         tg_id=form_data.username
         )
-    ).values[0]
+    ).values
+    user = users[0] if users else None
 
-    if not user or not pwd_context.verify(form_data.password, user.password):
+    if not user or not await verify_password(db, user, form_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный email или пароль",
@@ -142,10 +159,12 @@ async def authenticate_user(
     return {"access_token": access_token, "token_type": "bearer"}
 
 # Получение текущего пользователя
+# Сессию запроса не открывает: при промахе кэша снимок читается в
+# короткой сессии на primary (см. UserDAO.get_principal), а чтения
+# обработчика остаются на реплике
 async def get_current_user(
         token: str = Depends(oauth2_scheme),
-        db: AsyncSession = Depends(get_db)
-) -> User:
+) -> UserPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Не удалось проверить учетные данные",
@@ -160,36 +179,98 @@ async def get_current_user(
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except PyJWTError:
+        user_id = uuid.UUID(user_id)
+    except (PyJWTError, ValueError):
         raise credentials_exception
 
-    user = await UserDAO.get(
-        session=db,
+    user = await UserDAO.get_principal(
+        session=None,
         id=user_id
     )
     if user is None:
         raise credentials_exception
     return user
 
+# Лента профилей: следующие кандидаты из колоды текущего пользователя
+@router.get("/get_many_profiles", response_model=Dict[str, Any])
+async def get_random_profiles(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db, scope="function")
+) -> Dict[str, Any]:
+    candidate_ids = await candidate_deck.take(
+        session=db,
+        user_id=current_user.id,
+        count=limit,
+    )
+    if not candidate_ids:
+        return {"profiles": []}  # Возвращаем пустой массив, если профилей нет
+
+    result = await UserDAO.paginate(
+        session=db,
+        base_query=select(User).where(User.id.in_(candidate_ids)),
+        load="public",
+    )
+    # Сохраняем порядок колоды; удалённые пользователи пропускаются
+    profiles_by_id = {profile.id: profile for profile in result.values}
+    profiles = [
+        profiles_by_id[candidate_id]
+        for candidate_id in candidate_ids
+        if candidate_id in profiles_by_id
+    ]
+
+    return {
+        "profiles": [
+            {
+                "profile_id": profile.id,
+                "name": profile.name,
+                "email": profile.email,
+                "birth_date": profile.birth_date,
+                "city": profile.city,
+                "about": profile.about,
+                "tg_id": profile.tg_id,
+            }
+            for profile in profiles
+        ]
+    }
+
 # Эндпоинт получения профиля текущего пользователя
 @router.get("/get_profile", response_model=UserProfileResponse)
 async def read_profile(
-        current_user: User = Depends(get_current_user)
+        request: Request,
+        response: Response,
+        current_user: UserPrincipal = Depends(get_current_user),
+        db: AsyncSession = Depends(get_read_db, scope="function")
 ):
-    return current_user
+    # Версия профиля выбирается из базы: снимок в principal_cache у
+    # каждого процесса свой и после изменения профиля в другом процессе
+    # остаётся старым до истечения TTL
+    updated_at = await UserDAO.get_version(session=db, id=current_user.id)
+    validators = Validators.of_row(current_user.id, updated_at)
+    if not_modified(request, validators):
+        return not_modified_response(validators.headers(PRIVATE_CACHE_CONTROL))
+
+    profile = current_user
+    if current_user.updated_at != updated_at:
+        UserDAO.invalidate_principal(None, current_user.id)
+        profile = await UserDAO.get_principal(db, current_user.id)
+    response.headers.update(validators.headers(PRIVATE_CACHE_CONTROL))
+    return profile
 
 
 # Эндпоинт обновления профиля текущего пользователя
 @router.put("/update_profile", response_model=UserProfileResponse)
 async def update_profile(
         user_update: UserCreate,
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_db, scope="function"),
+        current_user: UserPrincipal = Depends(get_current_user)
 ):
     update_data = user_update.dict(exclude_unset=True)
 
     if "password" in update_data:
-        update_data["password"] = pwd_context.hash(update_data["password"])
+        update_data["password"] = await password_hasher.hash(
+            update_data["password"]
+        )
 
     updated_user = await UserDAO.update(session=db, id=current_user.id, **update_data)
 
@@ -198,37 +279,96 @@ async def update_profile(
 #эндпоинт получения всех пользователей
 @router.get("/users", response_model=list[UserProfileResponse])
 async def get_all_users_except_current(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(DEFAULT_USERS_PAGE_SIZE, ge=1, le=MAX_CURSOR_PAGE_SIZE),
+    city: Optional[str] = None,
+    min_age: Optional[int] = Query(None, ge=0, le=150),
+    max_age: Optional[int] = Query(None, ge=0, le=150),
+    q: Optional[str] = Query(None, min_length=1, max_length=100),
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_CURSOR_PAGE_SIZE),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db, scope="function")
 ):
-    users = await UserDAO.get_all_users(db)
-    return [user for user in users if user.id != current_user.id]
+    # Все условия, включая исключение текущего пользователя,
+    # выполняются на стороне БД
+    filters: Dict[str, Any] = {"id__ne": current_user.id}
+    if city is not None:
+        filters["city"] = city
+    if min_age is not None:
+        filters["birth_date__lte"] = years_ago(min_age)
+    if max_age is not None:
+        filters["birth_date__gt"] = years_ago(max_age + 1)
+
+    # Курсорный режим включается параметрами after/before/limit,
+    # курсоры соседних страниц передаются в заголовках ответа
+    if limit is not None or after is not None or before is not None:
+        cursor_page = await UserDAO.cursor_paginate(
+            session=db,
+            page_size=limit or DEFAULT_CURSOR_PAGE_SIZE,
+            after=after,
+            before=before,
+            search_query=q,
+            search_fields=USER_SEARCH_FIELDS,
+            load="public",
+            columns=profile_rows.columns,
+            **filters
+        )
+        response.headers.update(cursor_page.headers())
+        return profile_rows.respond(cursor_page.values, cursor_page.headers())
+
+    result = await UserDAO.paginate(
+        session=db,
+        page=page,
+        page_size=page_size,
+        search_query=q,
+        search_fields=USER_SEARCH_FIELDS,
+        total_mode=TotalMode.WINDOW,
+        load="public",
+        columns=profile_rows.columns,
+        **filters
+    )
+    response.headers.update(result.headers())
+    return profile_rows.respond(result.values, result.headers())
+
+def changes_matches(action: SwipeAction, is_updated: bool, is_match: bool) -> bool:
+    """Мог ли свайп изменить мэтчи (и ленты мэтчей) обоих пользователей:
+    новый мэтч или дизлайк вместо прежнего лайка, разрывающий мэтч"""
+    return is_match or (is_updated and action == SwipeAction.DISLIKE)
 
 #эндпоинт работы со свайпами
 @router.post("/swipes", status_code=status.HTTP_200_OK)
 async def handle_swipe(
     swipe_data: SwipeCreate,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db, scope="function")
 ):
+    # Нельзя свайпать себя
+    if current_user.id == swipe_data.target_user_id:
+        raise HTTPException(status_code=400, detail="Cannot swipe yourself")
+
     # Проверка что target_user существует
     target_user = await UserDAO.get(
         session=db, 
-        id=swipe_data.target_user_id
+        id=swipe_data.target_user_id,
+        load="public",
     )
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Нельзя свайпать себя
-    if current_user.id == swipe_data.target_user_id:
-        raise HTTPException(status_code=400, detail="Cannot swipe yourself")
-    
-    is_updated, is_match = await UserDAO.add_swipe(
+    is_updated, is_match = await SwipeDAO.add_swipe(
         session=db,
         user_id=current_user.id,
         target_user_id=swipe_data.target_user_id,
         action=swipe_data.action.value
     )
+    candidate_deck.discard(db, current_user.id, swipe_data.target_user_id)
+    if changes_matches(swipe_data.action, is_updated, is_match):
+        PostDAO.invalidate_feed(
+            db, current_user.id, swipe_data.target_user_id
+        )
     
     if is_match:
         return {
@@ -241,3 +381,66 @@ async def handle_swipe(
         }
     
     return {"status": "success", "updated": is_updated}
+
+#эндпоинт пакетной отправки свайпов
+@router.post("/swipes/batch", status_code=status.HTTP_200_OK)
+async def handle_swipe_batch(
+    batch: SwipeBatchCreate,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db, scope="function")
+):
+    # Свайпы применяются по порядку: для повторяющейся цели
+    # действует последний свайп, предыдущие помечаются как пропущенные
+    last_index = {
+        swipe.target_user_id: index
+        for index, swipe in enumerate(batch.swipes)
+    }
+    target_ids = [
+        target_id for target_id in last_index
+        if target_id != current_user.id
+    ]
+
+    # Проверка существования всех целей одним запросом
+    targets = await UserDAO.get_many(
+        session=db,
+        ids=target_ids,
+        load="public",
+    )
+    target_names = {user_id: user.name for user_id, user in targets.items()}
+
+    swipe_results = await SwipeDAO.add_swipes(
+        session=db,
+        user_id=current_user.id,
+        actions={
+            target_id: batch.swipes[last_index[target_id]].action.value
+            for target_id in target_ids
+            if target_id in target_names
+        },
+    )
+
+    results = []
+    for index, swipe in enumerate(batch.swipes):
+        target_id = swipe.target_user_id
+        item = {"target_user_id": target_id}
+        if target_id == current_user.id:
+            item.update(status="error", detail="Cannot swipe yourself")
+        elif target_id not in target_names:
+            item.update(status="error", detail="User not found")
+        elif last_index[target_id] != index:
+            item.update(status="skipped", detail="Superseded by a later swipe")
+        else:
+            candidate_deck.discard(db, current_user.id, target_id)
+            is_updated, is_match = swipe_results[target_id]
+            if changes_matches(swipe.action, is_updated, is_match):
+                PostDAO.invalidate_feed(db, current_user.id, target_id)
+            if is_match:
+                item.update(
+                    status="match",
+                    message="It's a match!",
+                    user={"id": target_id, "name": target_names[target_id]},
+                )
+            else:
+                item.update(status="success", updated=is_updated)
+        results.append(item)
+
+    return {"results": results}
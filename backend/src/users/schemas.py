@@ -1,7 +1,7 @@
 from pydantic import EmailStr
-from pydantic import BaseModel
-from datetime import date
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import date, datetime
+from typing import List, Optional
 import uuid
 from uuid import UUID
 from enum import Enum
@@ -29,6 +29,13 @@ class UserProfileResponse(BaseModel):
     about: Optional[str] = None
     # Другие поля
 
+class UserPrincipal(UserProfileResponse):
+    """Снимок аутентифицированного пользователя для кэша (без постов)"""
+    model_config = ConfigDict(frozen=True)
+
+    # Версия профиля для ETag/Last-Modified (в ответ не попадает)
+    updated_at: Optional[datetime] = None
+
 class SwipeAction(str, Enum):
     LIKE = "like"
     DISLIKE = "dislike"
@@ -36,3 +43,10 @@ class SwipeAction(str, Enum):
 class SwipeCreate(BaseModel):
     target_user_id: UUID
     action: SwipeAction
+
+MAX_SWIPE_BATCH_SIZE = 100
+
+class SwipeBatchCreate(BaseModel):
+    swipes: List[SwipeCreate] = Field(
+        min_length=1, max_length=MAX_SWIPE_BATCH_SIZE
+    )
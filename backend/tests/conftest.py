@@ -0,0 +1,87 @@
+"""Общие фикстуры тестов.
+
+Тесты с базой работают с PostgreSQL из тех же переменных окружения
+POSTGRES_*, что и приложение (схема - alembic upgrade head), и
+пропускаются, если база недоступна. Асинхронные тесты выполняются
+через плагин anyio (pytest.mark.anyio).
+"""
+import uuid
+from datetime import date
+from typing import AsyncIterator, Dict, List
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from src.dao.database import engine, replica_engines, unit_of_work
+from src.main import app
+from src.users.UserDao import UserDAO
+from src.users.router import create_access_token
+
+pytest_plugins = ["pytester", "query_budget_plugin"]
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def db() -> AsyncIterator[None]:
+    """Проверяет доступность базы; после теста закрывает соединения пулов
+    (у каждого теста свой цикл событий)"""
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    except (OSError, DBAPIError) as error:
+        pytest.skip(f"PostgreSQL недоступен: {error}")
+    yield
+    await engine.dispose()
+    for replica_engine in replica_engines:
+        await replica_engine.dispose()
+
+
+@pytest.fixture
+async def users(db: None) -> AsyncIterator[List[uuid.UUID]]:
+    """Четыре новых пользователя (удаляются после теста вместе со свайпами)"""
+    tag = uuid.uuid4().hex[:12]
+    values = [
+        {
+            "id": uuid.uuid4(),
+            "email": f"test-{tag}-{index}@example.com",
+            "password": "-",
+            "tg_id": f"test-{tag}-{index}",
+            "name": f"Test {index}",
+            "birth_date": date(1990, 1, 1),
+            "city": "Тест",
+        }
+        for index in range(4)
+    ]
+    async with unit_of_work() as uow:
+        await UserDAO.create_many(
+            session=uow.session, values=values, returning=False
+        )
+    user_ids = [value["id"] for value in values]
+    yield user_ids
+    async with unit_of_work() as uow:
+        await UserDAO.delete_many(session=uow.session, ids=user_ids)
+    for user_id in user_ids:
+        UserDAO.invalidate_principal(None, user_id)
+
+
+@pytest.fixture
+async def auth_headers(users: List[uuid.UUID]) -> Dict[str, str]:
+    """Заголовки первого пользователя; его снимок уже в principal_cache"""
+    async with unit_of_work(read_only=True) as uow:
+        await UserDAO.get_principal(uow.session, users[0])
+    token = create_access_token({"sub": str(users[0])})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def client() -> AsyncIterator[httpx.AsyncClient]:
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as async_client:
+        yield async_client
@@ -0,0 +1,75 @@
+"""Плагин pytest для проверки числа SQL-запросов.
+
+Подключается в tests/conftest.py (pytest_plugins) или из командной
+строки: pytest -p query_budget_plugin (каталог tests - в pythonpath,
+см. pytest.ini).
+
+Запросы записываются во всём процессе (global_scope=True), поэтому
+учитываются и запросы приложения под fastapi.testclient.TestClient,
+которое выполняется в отдельном потоке.
+
+Примеры:
+    @pytest.mark.query_budget(max_statements=3, max_repeats=1, max_connections=1)
+    def test_handle_swipe(client, auth_headers, target_id):
+        client.post("/api/swipes", headers=auth_headers, json={...})
+
+    def test_update_post(client, query_budget):
+        with query_budget(max_statements=2, label="update_post"):
+            client.put(...)
+
+    def test_feed(client, captured_queries):
+        client.get("/api_post/feed/matches", headers=...)
+        assert not captured_queries.duplicates()
+"""
+import pytest
+
+from src.dao.query_budget import (
+    capture_queries, check_budget, query_budget as _query_budget
+)
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_statements=None, max_repeats=None, "
+        "max_duration=None, max_connections=None): fail the test if "
+        "its body exceeds the SQL query budget",
+    )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+
+    # Учитывается только тело теста, без подготовки фикстур
+    with capture_queries(global_scope=True) as capture:
+        result = yield
+    check_budget(capture, label=item.nodeid, **marker.kwargs)
+    return result
+
+
+@pytest.fixture
+def query_budget():
+    """Контекстный менеджер query_budget, записывающий запросы процесса"""
+    def budget(
+        max_statements=None, max_repeats=None, max_duration=None,
+        label="block", max_connections=None,
+    ):
+        return _query_budget(
+            max_statements=max_statements,
+            max_repeats=max_repeats,
+            max_duration=max_duration,
+            label=label,
+            global_scope=True,
+            max_connections=max_connections,
+        )
+    return budget
+
+
+@pytest.fixture
+def captured_queries():
+    """Все SQL-запросы, выполненные во время теста"""
+    with capture_queries(global_scope=True) as capture:
+        yield capture
@@ -0,0 +1,66 @@
+import io
+import json
+import threading
+
+import pytest
+
+from src.bulk import importer
+from src.bulk.importer import PostImporter, read_records
+from src.bulk.schemas import BulkFormat
+from src.dao.database import db_router, unit_of_work
+from src.internal import router as internal_router
+from src.posts.dao import PostDAO
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def internal_headers(monkeypatch):
+    monkeypatch.setattr(internal_router, "INTERNAL_API_TOKEN", "test-token")
+    return {"X-Internal-Token": "test-token"}
+
+
+async def test_import_reads_records_off_event_loop(users, monkeypatch):
+    monkeypatch.setattr(importer, "IMPORT_BATCH_SIZE", 2)
+    source = io.StringIO("".join(
+        json.dumps({"user_id": str(users[1]), "content": f"Пост {number}"})
+        + "\n"
+        for number in range(5)
+    ))
+    threads = set()
+
+    def records():
+        for record in read_records(source, BulkFormat.NDJSON):
+            threads.add(threading.current_thread())
+            yield record
+
+    async with db_router.session() as session:
+        async with session.begin() as transaction:
+            result = await PostImporter.run(session, records())
+            await transaction.rollback()
+
+    assert (result.total, result.inserted, result.failed) == (5, 5, 0)
+    assert threading.current_thread() not in threads
+
+
+async def test_import_endpoint(client, users, internal_headers):
+    lines = [
+        {"user_id": str(users[1]), "content": "Первый"},
+        {"user_id": str(users[1]), "content": ""},
+        {"user_id": str(users[1]), "content": "Второй"},
+    ]
+    body = "".join(json.dumps(line) + "\n" for line in lines)
+
+    try:
+        response = await client.post(
+            "/internal/import/posts",
+            headers=internal_headers,
+            files={"file": ("posts.ndjson", body.encode())},
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert (result["inserted"], result["failed"]) == (2, 1)
+        assert result["errors"][0]["row"] == 2
+    finally:
+        async with unit_of_work() as uow:
+            await PostDAO.delete_where(session=uow.session, user_id=users[1])
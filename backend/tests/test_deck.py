@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from src.dao.database import unit_of_work
+from src.users.SwipeDao import SwipeDAO
+from src.users.deck import CandidateDeck
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowFetchDeck(CandidateDeck):
+    """Колода, пачка которой выбирается до свайпа, а добавляется после"""
+
+    def __init__(self, candidate_ids):
+        super().__init__()
+        self.candidate_ids = candidate_ids
+        self.fetched = asyncio.Event()
+        self.resume = asyncio.Event()
+
+    async def _fetch_batch(self, session, user_id, deck, limit):
+        self.fetched.set()
+        await self.resume.wait()
+        return self.candidate_ids[:limit]
+
+
+async def test_discard_waits_for_commit(users):
+    deck = SlowFetchDeck([users[1], users[2]])
+    deck.resume.set()
+    user_deck = deck._get_deck(users[0])
+    await deck._refill(None, users[0], user_deck)
+    assert user_deck.members == {users[1], users[2]}
+
+    async with unit_of_work() as uow:
+        await SwipeDAO.add_swipe(
+            session=uow.session,
+            user_id=users[0],
+            target_user_id=users[1],
+            action="like",
+        )
+        deck.discard(uow.session, users[0], users[1])
+        assert users[1] in user_deck.members
+
+    assert user_deck.members == {users[2]}
+
+
+async def test_refill_started_before_commit_skips_swiped(users):
+    deck = SlowFetchDeck([users[1], users[2]])
+    user_deck = deck._get_deck(users[0])
+    refill = asyncio.create_task(deck._refill(None, users[0], user_deck))
+    await deck.fetched.wait()
+
+    async with unit_of_work() as uow:
+        await SwipeDAO.add_swipe(
+            session=uow.session,
+            user_id=users[0],
+            target_user_id=users[1],
+            action="like",
+        )
+        deck.discard(uow.session, users[0], users[1])
+    deck.resume.set()
+    await refill
+
+    assert user_deck.members == {users[2]}
+    assert not user_deck.swiped_during_refill
@@ -0,0 +1,78 @@
+import asyncio
+import uuid
+
+import pytest
+
+from src.dao.database import unit_of_work
+from src.posts.dao import PostDAO
+from src.posts.schemas import PostBase
+from src.users.SwipeDao import SwipeDAO
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def post(users):
+    """Пост второго пользователя, который уже лайкнул первого"""
+    async with unit_of_work() as uow:
+        await SwipeDAO.add_swipe(
+            session=uow.session,
+            user_id=users[1],
+            target_user_id=users[0],
+            action="like",
+        )
+        created = await PostDAO.create_post(
+            uow.session, users[1], PostBase(content="Пост для ленты")
+        )
+    yield created.id
+    async with unit_of_work() as uow:
+        await PostDAO.delete_where(session=uow.session, user_id=users[1])
+    PostDAO.feed_cache.clear()
+
+
+async def feed_ids(client, auth_headers):
+    response = await client.get("/api_post/feed/matches", headers=auth_headers)
+    assert response.status_code == 200
+    return [uuid.UUID(item["id"]) for item in response.json()]
+
+
+async def swipe(client, auth_headers, target_id, action):
+    response = await client.post(
+        "/api/swipes",
+        headers=auth_headers,
+        json={"target_user_id": str(target_id), "action": action},
+    )
+    assert response.status_code == 200
+
+
+async def test_feed_follows_match_and_unmatch(
+    client, users, auth_headers, post
+):
+    assert await feed_ids(client, auth_headers) == []
+
+    await swipe(client, auth_headers, users[1], "like")
+    assert await feed_ids(client, auth_headers) == [post]
+
+    # В кэше - данные колонок, а не объекты сессии запроса
+    limit, rows, next_cursor = PostDAO.feed_cache.get(users[0])
+    assert [row["id"] for row in rows] == [post]
+    assert all(type(row) is dict for row in rows)
+
+    await swipe(client, auth_headers, users[1], "dislike")
+    assert await feed_ids(client, auth_headers) == []
+
+
+async def test_feed_invalidated_after_commit(
+    client, users, auth_headers, post
+):
+    await swipe(client, auth_headers, users[1], "like")
+
+    async with unit_of_work() as uow:
+        await PostDAO.create_post(
+            uow.session, users[1], PostBase(content="Ещё пост")
+        )
+        # Параллельный запрос до коммита кэширует ленту без нового поста
+        stale = await asyncio.create_task(feed_ids(client, auth_headers))
+        assert PostDAO.feed_cache.get(users[0]) is not None
+
+    assert len(await feed_ids(client, auth_headers)) == len(stale) + 1
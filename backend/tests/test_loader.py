@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from src.dao.loader import DataLoader
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingFetch:
+    """fetch, который запоминает пачки и число одновременных вызовов"""
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.batches = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, keys):
+        self.batches.append(list(keys))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            return {key: f"value-{key}" for key in keys if key != "missing"}
+        finally:
+            self.running -= 1
+
+
+async def test_same_tick_loads_are_one_batch():
+    fetch = RecordingFetch()
+    loader = DataLoader(fetch)
+
+    values = await asyncio.gather(
+        loader.load(1), loader.load(2), loader.load(1), loader.load("missing")
+    )
+
+    assert values == ["value-1", "value-2", "value-1", None]
+    assert len(fetch.batches) == 1
+    assert set(fetch.batches[0]) == {1, 2, "missing"}
+
+
+async def test_loaded_values_and_misses_are_cached():
+    fetch = RecordingFetch()
+    loader = DataLoader(fetch)
+    await loader.load_many([1, "missing"])
+
+    assert await loader.load_many(["missing", 1]) == [None, "value-1"]
+    assert len(fetch.batches) == 1
+
+
+async def test_loads_during_a_batch_wait_for_it():
+    fetch = RecordingFetch(delay=0.01)
+    loader = DataLoader(fetch)
+
+    async def load_later(key):
+        await asyncio.sleep(0.001)
+        return await loader.load(key)
+
+    values = await asyncio.gather(
+        loader.load(1), load_later(2), load_later(3)
+    )
+
+    assert values == ["value-1", "value-2", "value-3"]
+    assert fetch.max_running == 1
+    assert fetch.batches == [[1], [2, 3]]
+    assert loader.batches == 2
+
+
+async def test_batch_error_reaches_every_waiter():
+    loader = DataLoader(RecordingFetch(error=RuntimeError("db is down")))
+
+    results = await asyncio.gather(
+        loader.load(1), loader.load(2), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["db is down"] * 2
+    assert not loader.cache
+
+
+async def test_cancelled_batch_does_not_leave_queued_loads_waiting():
+    loader = DataLoader(RecordingFetch(delay=1))
+    leader = asyncio.ensure_future(loader.load(1))
+    await asyncio.sleep(0.001)
+    queued = asyncio.ensure_future(loader.load(2))
+    await asyncio.sleep(0.001)
+
+    leader.cancel()
+    done, _ = await asyncio.wait([leader, queued], timeout=0.5)
+
+    assert done == {leader, queued}
+    assert queued.cancelled()
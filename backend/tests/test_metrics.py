@@ -0,0 +1,19 @@
+import pytest
+
+from src.dao.database import engine
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_pool_counters_survive_dispose():
+    """engine.dispose() заменяет пул, но счётчик отказов не сбрасывается"""
+    pool = engine.pool
+    checkout_wait = pool.checkout_wait
+    pool.checkout_timeouts += 2
+    expected = pool.checkout_timeouts
+
+    await engine.dispose()
+
+    assert engine.pool is not pool
+    assert engine.pool.checkout_timeouts == expected
+    assert engine.pool.checkout_wait is checkout_wait
@@ -0,0 +1,57 @@
+import uuid
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+
+from src.internal.observability import (
+    HttpMetrics, ObservabilityMiddleware, UNMATCHED_ROUTE
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def make_app(metrics: HttpMetrics) -> FastAPI:
+    router = APIRouter()
+
+    @router.get("/items/{item_id}")
+    async def get_item(item_id: uuid.UUID):
+        return {"id": str(item_id)}
+
+    @router.get("/users/{user_id}/posts/{post_id}")
+    async def get_post(user_id: int, post_id: int):
+        return {}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.add_middleware(ObservabilityMiddleware, metrics=metrics)
+    return app
+
+
+async def test_route_label_is_route_template():
+    """Метка маршрута не зависит от значений параметров пути, в том числе
+    от неканонической записи UUID"""
+    metrics = HttpMetrics()
+    transport = httpx.ASGITransport(app=make_app(metrics))
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as client:
+        item = uuid.uuid4()
+        for path in (
+            f"/api/items/{item}",
+            f"/api/items/{str(item).upper()}",
+            f"/api/items/{item.hex}",
+            "/api/users/1/posts/1",
+            "/api/users/01/posts/2",
+            "/api/missing/1",
+        ):
+            await client.get(path)
+
+    assert set(metrics.routes) == {
+        ("GET", UNMATCHED_ROUTE),
+        ("GET", "/api/items/{item_id}"),
+        ("GET", "/api/users/{user_id}/posts/{post_id}"),
+    }
+    assert metrics.routes[("GET", "/api/items/{item_id}")].responses == {
+        200: 3
+    }
@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import text
+
+from src.dao.database import unit_of_work
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_profile_validators_follow_database(client, users, auth_headers):
+    """Изменение профиля в другом процессе (principal_cache этого процесса
+    его не видит) меняет ETag и тело ответа, а не даёт 304"""
+    response = await client.get("/api/get_profile", headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = await client.get(
+        "/api/get_profile", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    async with unit_of_work() as uow:
+        await uow.session.execute(
+            text(
+                "UPDATE users SET about = 'changed elsewhere', "
+                "updated_at = updated_at + interval '1 second' WHERE id = :id"
+            ),
+            {"id": users[0]},
+        )
+
+    response = await client.get(
+        "/api/get_profile", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["about"] == "changed elsewhere"
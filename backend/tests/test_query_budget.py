@@ -0,0 +1,96 @@
+import os
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from src.dao.database import engine
+from src.dao.query_budget import (
+    QueryBudgetExceeded, capture_queries, check_budget, query_budget
+)
+
+pytestmark = pytest.mark.anyio
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+async def execute(*statements: str) -> None:
+    async with engine.connect() as connection:
+        for statement in statements:
+            await connection.execute(text(statement))
+
+
+async def test_capture_counts_statements_and_repeats(db):
+    with capture_queries() as capture:
+        await execute("SELECT 1", "SELECT 1", "SELECT 2")
+
+    assert capture.statements == 3
+    assert capture.checkouts == 1
+    assert capture.max_connections == 1
+    assert list(capture.duplicates().values()) == [2]
+
+
+async def test_check_budget_within_limits(db):
+    with capture_queries() as capture:
+        await execute("SELECT 1", "SELECT 1")
+
+    check_budget(capture, max_statements=2, max_repeats=2, max_connections=1)
+
+
+async def test_check_budget_reports_every_exceeded_limit(db):
+    with capture_queries() as capture:
+        await execute("SELECT 1", "SELECT 1", "SELECT 1")
+
+    with pytest.raises(QueryBudgetExceeded) as error:
+        check_budget(capture, max_statements=2, max_repeats=1, label="block")
+    message = str(error.value)
+    assert "Query budget exceeded for block" in message
+    assert "3 statements > 2" in message
+    assert "repeated more than 1 times" in message
+
+
+async def test_query_budget_counts_connections_held_at_once(db):
+    with pytest.raises(QueryBudgetExceeded, match="2 connections held"):
+        with query_budget(max_connections=1):
+            async with engine.connect() as first:
+                await first.execute(text("SELECT 1"))
+                await execute("SELECT 2")
+
+
+async def test_marker_fails_only_tests_over_budget(db, pytester, monkeypatch):
+    monkeypatch.setenv(
+        "PYTHONPATH",
+        os.pathsep.join([str(BACKEND_DIR), str(BACKEND_DIR / "tests")]),
+    )
+    pytester.makepyfile(
+        """
+        import asyncio
+
+        import pytest
+        from sqlalchemy import text
+
+        from src.dao.database import engine
+
+
+        def two_statements():
+            async def run():
+                async with engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+                    await connection.execute(text("SELECT 2"))
+                await engine.dispose()
+            asyncio.run(run())
+
+
+        @pytest.mark.query_budget(max_statements=1)
+        def test_over_budget():
+            two_statements()
+
+
+        @pytest.mark.query_budget(max_statements=2, max_connections=1)
+        def test_within_budget():
+            two_statements()
+        """
+    )
+    result = pytester.runpytest_subprocess("-p", "query_budget_plugin")
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines(["*Query budget exceeded*2 statements > 1*"])
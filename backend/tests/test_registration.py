@@ -0,0 +1,58 @@
+import uuid
+from datetime import date
+
+import pytest
+from sqlalchemy import delete
+
+from src.dao.database import unit_of_work
+from src.users.UserDao import UserDAO
+from src.users.models import User
+from src.users.schemas import UserCreate
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def new_user(db):
+    tag = uuid.uuid4().hex[:12]
+    user = UserCreate(
+        email=f"reg-{tag}@example.com",
+        password="password",
+        tg_id=f"reg-{tag}",
+        name="Reg",
+        birth_date=date(1990, 1, 1),
+        city="Тест",
+    )
+    yield user
+    async with unit_of_work() as uow:
+        await uow.session.execute(delete(User).where(User.tg_id == user.tg_id))
+    UserDAO.taken_keys.invalidate(("email", user.email))
+    UserDAO.taken_keys.invalidate(("tg_id", user.tg_id))
+
+
+def is_taken(user: UserCreate) -> bool:
+    return bool(UserDAO.taken_keys.get(("tg_id", user.tg_id)))
+
+
+async def test_rolled_back_registration_is_not_remembered(new_user):
+    with pytest.raises(RuntimeError):
+        async with unit_of_work() as uow:
+            await UserDAO.registration(uow.session, new_user)
+            assert not is_taken(new_user)
+            raise RuntimeError("request failed after registration")
+
+    assert not is_taken(new_user)
+    async with unit_of_work() as uow:
+        await UserDAO.registration(uow.session, new_user)
+    assert is_taken(new_user)
+
+
+async def test_conflict_is_remembered(client, new_user):
+    body = new_user.model_dump(mode="json")
+    response = await client.post("/api/register", json=body)
+    assert response.status_code == 200
+    UserDAO.taken_keys.clear()
+
+    response = await client.post("/api/register", json=body)
+    assert response.status_code == 400
+    assert is_taken(new_user)
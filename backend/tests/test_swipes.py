@@ -0,0 +1,89 @@
+import pytest
+
+from src.dao.database import unit_of_work
+from src.users.SwipeDao import SwipeDAO
+from src.users.UserDao import UserDAO
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.query_budget(max_statements=3, max_repeats=1, max_connections=1)
+async def test_swipe(client, users, auth_headers):
+    response = await client.post(
+        "/api/swipes",
+        headers=auth_headers,
+        json={"target_user_id": str(users[1]), "action": "like"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "success", "updated": True}
+
+
+async def test_swipe_match(client, users, auth_headers, query_budget):
+    async with unit_of_work() as uow:
+        await SwipeDAO.add_swipe(
+            session=uow.session,
+            user_id=users[1],
+            target_user_id=users[0],
+            action="like",
+        )
+
+    with query_budget(max_statements=3, max_repeats=1, max_connections=1):
+        response = await client.post(
+            "/api/swipes",
+            headers=auth_headers,
+            json={"target_user_id": str(users[1]), "action": "like"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "match"
+
+
+async def test_swipe_loads_principal_on_cache_miss(
+    client, users, auth_headers, query_budget
+):
+    UserDAO.invalidate_principal(None, users[0])
+
+    with query_budget(max_statements=4, max_repeats=1, max_connections=1):
+        response = await client.post(
+            "/api/swipes",
+            headers=auth_headers,
+            json={"target_user_id": str(users[1]), "action": "dislike"},
+        )
+
+    assert response.status_code == 200
+
+
+@pytest.mark.query_budget(max_statements=1, max_connections=1)
+async def test_swipe_unknown_target(client, users, auth_headers):
+    response = await client.post(
+        "/api/swipes",
+        headers=auth_headers,
+        json={
+            "target_user_id": "00000000-0000-0000-0000-000000000000",
+            "action": "like",
+        },
+    )
+
+    assert response.status_code == 404
+
+
+@pytest.mark.query_budget(max_statements=3, max_repeats=1, max_connections=1)
+async def test_swipe_batch_does_not_grow_with_batch_size(
+    client, users, auth_headers
+):
+    response = await client.post(
+        "/api/swipes/batch",
+        headers=auth_headers,
+        json={
+            "swipes": [
+                {"target_user_id": str(target_id), "action": "like"}
+                for target_id in users[1:]
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()["results"]] == [
+        "success"
+    ] * 3
@@ -0,0 +1,58 @@
+import uuid
+
+import httpx
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.dao.database import UnitOfWorkRoute, get_db, unit_of_work
+from src.users.UserDao import UserDAO
+from src.users.models import User
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_read_unit_of_work_switches_to_write_before_reading(users):
+    async with unit_of_work(read_only=True) as uow:
+        await UserDAO.update(id=users[0], about="before read")
+        assert not uow.read_only
+
+    async with unit_of_work(read_only=True):
+        assert (await UserDAO.get(id=users[0])).about == "before read"
+
+
+async def test_read_unit_of_work_refuses_write_after_read(users):
+    async with unit_of_work(read_only=True) as uow:
+        await uow.session.execute(text("SELECT 1"))
+        with pytest.raises(RuntimeError):
+            await UserDAO.update(id=users[0], about="after read")
+        with pytest.raises(RuntimeError):
+            async with unit_of_work():
+                pass
+
+
+async def test_write_is_not_committed_before_response_validation(users):
+    """Ответ, не прошедший проверку response_model, откатывает изменения
+    обработчика (UnitOfWorkRoute не фиксирует единицу работы записи)"""
+    router = APIRouter(route_class=UnitOfWorkRoute)
+
+    @router.post("/broken", response_model=uuid.UUID)
+    async def broken(db: AsyncSession = Depends(get_db, scope="function")):
+        await UserDAO.update(session=db, id=users[0], about="rolled back")
+        return "not a uuid"
+
+    app = FastAPI()
+    app.include_router(router)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as client:
+        response = await client.post("/broken")
+
+    assert response.status_code == 500
+    async with unit_of_work(read_only=True) as uow:
+        about = await uow.session.scalar(
+            select(User.about).where(User.id == users[0])
+        )
+    assert about != "rolled back"